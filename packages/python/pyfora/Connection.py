@@ -178,6 +178,45 @@ class Connection(object):
             })
 
 
+    def setProfilingInterval(self, sampleIntervalSeconds, onCompletedCallback):
+        """Turn the cluster's sampling profiler on, or off if 'sampleIntervalSeconds' is None.
+
+        onCompletedCallback - called with either an error or None on success
+        """
+        cluster = self.webObjectFactory.PyforaCluster({})
+        def onSuccess(_):
+            onCompletedCallback(None)
+
+        def onFailure(err):
+            onCompletedCallback(Exceptions.PyforaError(err['message']))
+
+        callbacks = {
+            'onSuccess': onSuccess,
+            'onFailure': onFailure
+            }
+
+        if sampleIntervalSeconds is None:
+            cluster.stopProfiling({}, callbacks)
+        else:
+            cluster.startProfiling(sampleIntervalSeconds, callbacks)
+
+    def getComputationProfile(self, computedValue, onCompletedCallback):
+        """Retrieve the profile the cluster has collected for a computation.
+
+        onCompletedCallback - called with the profile as a dict (or None if no
+            worker responded), or with a pyfora exception
+        """
+        def onSuccess(profile):
+            onCompletedCallback(profile)
+
+        def onFailure(err):
+            onCompletedCallback(Exceptions.PyforaError(err['message']))
+
+        computedValue.getProfile({}, {
+            'onSuccess': onSuccess,
+            'onFailure': onFailure
+            })
+
     def triggerS3DatasetExportOnFinishedCalculation(self,
                                                     computedValue,
                                                     bucketname,
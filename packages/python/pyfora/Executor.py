@@ -100,6 +100,29 @@ class Executor(object):
             raise res
         return res['workerCount']
 
+    def startProfiling(self, sampleIntervalSeconds=0.01):
+        """Start sampling the stacks of running computations on every worker.
+
+        Samples are attributed to the Python source lines on the stack, and can be
+        retrieved for any computation with :func:`~Future.Future.profile`.
+        Starting a new profiling session discards samples from the previous one.
+
+        Args:
+            sampleIntervalSeconds (float): how often each worker samples its
+                running computations.
+        """
+        self._raiseIfClosed()
+        self._waitForCallback(
+            lambda onCompleted: self.connection.setProfilingInterval(sampleIntervalSeconds, onCompleted)
+            )
+
+    def stopProfiling(self):
+        """Stop sampling. Samples collected so far remain available."""
+        self._raiseIfClosed()
+        self._waitForCallback(
+            lambda onCompleted: self.connection.setProfilingInterval(None, onCompleted)
+            )
+
     def importS3Dataset(self, bucketname, keyname, verify=True):
         """Creates a :class:`~RemotePythonObject.RemotePythonObject` that represents
         the content of an S3 key as a string.
@@ -288,11 +311,26 @@ class Executor(object):
             raise Exceptions.PyforaError('Attempted operation on a closed executor')
 
 
-    def _create_future(self, onCancel=None):
-        future = Future.Future(onCancel=onCancel)
+    def _create_future(self, onCancel=None, onProfile=None):
+        future = Future.Future(onCancel=onCancel, onProfile=onProfile)
         return future
 
 
+    def _waitForCallback(self, operation):
+        event = threading.Event()
+        res = [None]
+        def onCompleted(result):
+            res[0] = result
+            event.set()
+
+        operation(onCompleted)
+        event.wait()
+
+        if isinstance(res[0], Exception):
+            raise res[0]
+        return res[0]
+
+
     def _resolve_future(self, future, result):
         if isinstance(result, Exceptions.PyforaError):
             future.set_exception(result)
@@ -440,7 +478,10 @@ class Executor(object):
         return future
 
     def _callRemoteObject(self, fnHandle, argHandles):
-        future = self._create_future(onCancel=self._cancelComputation)
+        future = self._create_future(
+            onCancel=self._cancelComputation,
+            onProfile=self._profileComputation
+            )
         def onComputationCreated(result):
             if isinstance(result, Exception):
                 self._resolve_future(future, result)
@@ -478,3 +519,31 @@ class Executor(object):
     def _cancelComputation(self, computation):
         self.connection.cancelComputation(computation)
         return True
+
+    def _profileComputation(self, computation):
+        self._raiseIfClosed()
+        future = self._create_future()
+        def onProfile(result):
+            if isinstance(result, Exceptions.PyforaError):
+                self._resolve_future(future, result)
+            else:
+                self._resolve_future(future, self._translate_profile(result))
+
+        self.connection.getComputationProfile(computation, onProfile)
+        return future
+
+    @staticmethod
+    def _translate_profile(profileJson):
+        if profileJson is None:
+            profileJson = {'totalSamples': 0, 'sampleIntervalSeconds': 0.0, 'stacks': {}}
+
+        stacks = profileJson['stacks']
+
+        return {
+            'totalSamples': int(profileJson['totalSamples']),
+            'sampleIntervalSeconds': profileJson['sampleIntervalSeconds'],
+            'stacks': dict((stack, int(count)) for stack, count in stacks.iteritems()),
+            'folded': "".join(
+                "%s %d\n" % (stack, count) for stack, count in sorted(stacks.iteritems())
+                )
+            }
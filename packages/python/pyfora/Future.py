@@ -22,6 +22,7 @@ import time
 import logging
 import traceback
 import concurrent.futures._base as Futures
+import pyfora.Exceptions as Exceptions
 
 KEYBOARD_INTERRUPT_WAKEUP_INTERVAL = 0.01
 
@@ -38,10 +39,11 @@ class Future(Futures.Future):
     The pyfora Future object extends the concurrent.futures object by
     supporting cancellation with the :func:`~pyfora.Future.Future.cancel` method.
     """
-    def __init__(self, onCancel=None):
+    def __init__(self, onCancel=None, onProfile=None):
         super(Future, self).__init__()
         self._computedValue = None
         self._onCancel = onCancel
+        self._onProfile = onProfile
 
 
     def cancel(self):
@@ -60,6 +62,22 @@ class Future(Futures.Future):
         self._invoke_callbacks()
         return True
 
+    def profile(self):
+        """Retrieve the samples collected for this computation while profiling was on.
+
+        Profiling must be turned on with :func:`~pyfora.Executor.Executor.startProfiling`.
+
+        Returns:
+            A :class:`~pyfora.Future.Future` that resolves to a dict with the keys
+            ``totalSamples``, ``sampleIntervalSeconds``, ``stacks`` (a dict from
+            ';'-separated stacks of ``file:line`` frames to sample counts) and
+            ``folded`` (the same stacks as text, ready for flamegraph.pl).
+        """
+        if self._onProfile is None or self._computedValue is None:
+            raise Exceptions.PyforaError("This future doesn't represent a remote computation")
+
+        return self._onProfile(self._computedValue)
+
     def setComputedValue(self, computedValue):
         ''' Should only be called by Executor '''
         self._computedValue = computedValue
@@ -22,6 +22,8 @@ class Solver(object):
 
 
 class ReturnValue(object):
-    def __init__(self, weights, iterations):
+    def __init__(self, weights, iterations, dataPasses=None):
         self.weights = weights
         self.iterations = iterations
+        # the number of full passes over the data, if the solver counts them
+        self.dataPasses = dataPasses
@@ -81,7 +81,8 @@ class TrustRegionConjugateGradientSolver(Solver):
             self.X,
             self.normalized_y_value,
             self.C,
-            weights)
+            weights,
+            self.splitLimit)
 
         gradient = objectiveFun.gradient()
 
@@ -92,7 +93,8 @@ class TrustRegionConjugateGradientSolver(Solver):
             objectiveFun=objectiveFun,
             gradient=gradient,
             normGradient=normGradient,
-            delta=delta)
+            delta=delta,
+            dataPasses=3)
 
         while solverState.iterationIx < self.maxIters and \
               solverState.normGradient > self.eps * normGradientAtZeroWeights:
@@ -100,11 +102,15 @@ class TrustRegionConjugateGradientSolver(Solver):
 
         return ReturnValue(
             weights=solverState.objectiveFun.w,
-            iterations=solverState.iterationIx - 1
+            iterations=solverState.iterationIx - 1,
+            dataPasses=solverState.dataPasses
             )
         
     def update(self, solverState):
-        step, r = self.trustRegionConjugateGradientSearch(
+        # we read X once for each Hessian-vector product, once to build the
+        # candidate objective function, and once more for its gradient if we
+        # accept it
+        step, r, hessianProducts = self.trustRegionConjugateGradientSearch(
             solverState.objectiveFun,
             solverState.gradient,
             solverState.normGradient,
@@ -122,10 +128,12 @@ class TrustRegionConjugateGradientSolver(Solver):
             newObjectiveFun = candidateObjectiveFun
             newGradient = candidateObjectiveFun.gradient()
             newNormGradient = self.norm(newGradient)
+            dataPasses = hessianProducts + 2
         else:
             newObjectiveFun = solverState.objectiveFun
             newGradient = solverState.gradient
             newNormGradient = solverState.normGradient
+            dataPasses = hessianProducts + 1
 
         newDelta = self.updateDelta(
             solverState.delta,
@@ -141,7 +149,8 @@ class TrustRegionConjugateGradientSolver(Solver):
             gradient=newGradient,
             normGradient=newNormGradient,
             delta=newDelta,
-            iterationIx=solverState.iterationIx + 1)
+            iterationIx=solverState.iterationIx + 1,
+            dataPasses=solverState.dataPasses + dataPasses)
 
     def normGradientAtZeroWeights(self):
         nSamples = len(self.X)
@@ -200,6 +209,7 @@ class TrustRegionConjugateGradientSolver(Solver):
         r_norm_squared = r.dot(r)
         d = r
         Hd = objectiveFun.hessian_dot_vec(d)
+        hessianProducts = 1
 
         iters = 1
         while iters < self.maxIters and \
@@ -209,7 +219,8 @@ class TrustRegionConjugateGradientSolver(Solver):
             step = step + (d * alpha)
 
             if self.norm(step) >= delta:
-                return self.touchedTrustRegion(step, d, alpha, delta, Hd, r)
+                step, r = self.touchedTrustRegion(step, d, alpha, delta, Hd, r)
+                return step, r, hessianProducts
 
             r = r - (Hd * alpha)
             old_r_norm_squared = r_norm_squared
@@ -219,8 +230,9 @@ class TrustRegionConjugateGradientSolver(Solver):
             d = r + (d * beta)
 
             Hd = objectiveFun.hessian_dot_vec(d)
+            hessianProducts = hessianProducts + 1
 
-        return step, r
+        return step, r, hessianProducts
 
     def touchedTrustRegion(self, step, d, alpha, delta, Hd, r):
         step = (d * -alpha) + step
@@ -252,69 +264,114 @@ class SolverState(object):
             gradient,
             normGradient,
             delta,
-            iterationIx=1):
+            iterationIx=1,
+            dataPasses=0):
         self.objectiveFun = objectiveFun
         self.gradient = gradient
         self.normGradient = normGradient
         self.delta = delta
         self.iterationIx = iterationIx
+        self.dataPasses = dataPasses
 
 
 class ObjectiveFunctionAtWeights(object):
-    def __init__(self, X, normalized_y_value, regularlizer, weights):
+    """
+    The regularized logistic loss at the weights `w`, and its derivatives.
+
+    The per-row quantities that only depend on the margins y_i * (X.w)_i --
+    the loss, the gradient's row multipliers, and the diagonal D of the
+    Hessian -- are computed once, when the object is built. After that,
+    `value` is free, and `gradient` and each `hessian_dot_vec` read X once.
+    """
+    def __init__(
+            self, X, normalized_y_value, regularlizer, weights,
+            splitLimit=1000000):
         self.X = X
         self.normalized_y_value = normalized_y_value
         self.C = regularlizer
         self.w = numpy.array(weights)
-        self.Xw = X.dot(weights)
+        self.splitLimit = splitLimit
+
+        Xw = X.dot(weights, splitLimit)
+        nSamples = len(Xw)
+
+        ys = [normalized_y_value(ix) for ix in xrange(nSamples)]
+        sigmas = [self.sigma(ys[ix] * Xw[ix]) for ix in xrange(nSamples)]
+
+        self.rowMultipliers = [
+            (sigmas[ix] - 1.0) * ys[ix] for ix in xrange(nSamples)
+            ]
+        self.D = [sigma * (1.0 - sigma) for sigma in sigmas]
+
+        # log(1 + exp(-t)) == -log(sigma(t))
+        self._value = 0.5 * self.w.dot(self.w) - \
+            self.C * sum(math.log(sigma) for sigma in sigmas)
 
     def withWeights(self, newWeights):
         return ObjectiveFunctionAtWeights(
             self.X,
             self.normalized_y_value,
             self.C,
-            newWeights
+            newWeights,
+            self.splitLimit
             )
 
     def value(self):
-        return 0.5 * self.w.dot(self.w) + self.C * sum(
-            math.log(1.0 + math.exp(-self.normalized_y_value(ix) * self.Xw[ix])) \
-            for ix in xrange(len(self.Xw))
-            )
+        return self._value
 
     def sigma(self, t):
         return 1.0 / (1.0 + math.exp(-t))
 
     def gradient(self):
-        def rowMultiplier(rowIx):
-            y_rowIx = self.normalized_y_value(rowIx)
-            return (self.sigma(y_rowIx * self.Xw[rowIx]) - 1) * y_rowIx
-
-        rowMultipliers = [rowMultiplier(ix) for ix in xrange(len(self.X))]
-
-        tr = numpy.array(
-            [self.C * column.dot(rowMultipliers) for column in self.X.columns()]
+        tr = _transposeDot(
+            self.X.columns(),
+            self.rowMultipliers,
+            self.splitLimit,
+            0,
+            len(self.X)
             )
 
-        tr = tr + self.w
-
-        return tr
+        return tr * self.C + self.w
 
     def hessian_dot_vec(self, v):
         # Hess = I + C * X^t * D * X
-        Xv = self.X.dot(v)
+        tr = _hessianDotVec(
+            self.X,
+            self.D,
+            v,
+            self.splitLimit,
+            0,
+            len(self.X)
+            )
 
-        def D_fun(ix):
-            sigma = self.sigma(self.normalized_y_value(ix) * self.Xw[ix])
-            return sigma * (1 - sigma)
+        return tr * self.C + v
 
-        DXv = [Xv[ix] * D_fun(ix) for ix in xrange(len(Xv))]
 
-        # this part doesn't seem so natural. What if we had a row major self.X?
-        tr = numpy.array(
-            [self.C * column.dot(DXv) for column in self.X.columns()]
+def _transposeDot(columns, rowWeights, splitLimit, low, high):
+    # X^t . rowWeights, restricted to the rows [low, high)
+    if high - low <= splitLimit:
+        weights = rowWeights[low:high]
+        return numpy.array(
+            [column[low:high].dot(weights) for column in columns]
             )
 
-        tr = tr + v
+    mid = (low + high) / 2
+    return _transposeDot(columns, rowWeights, splitLimit, low, mid) + \
+        _transposeDot(columns, rowWeights, splitLimit, mid, high)
+
+
+def _hessianDotVec(X, D, v, splitLimit, low, high):
+    # X^t . D . X . v, restricted to the rows [low, high). We compute X.v and
+    # X^t.(D X v) for one block of rows at a time, so that the block is still
+    # in cache when we need it the second time, and X is only read once.
+    if high - low <= splitLimit:
+        block = X.iloc[low:high]
+        Xv = block.dot(v, splitLimit)
+        DXv = [D[low + ix] * Xv[ix] for ix in xrange(high - low)]
+        return numpy.array(
+            [column.dot(DXv) for column in block.columns()]
+            )
 
-        return tr
+    mid = (low + high) / 2
+    return _hessianDotVec(X, D, v, splitLimit, low, mid) + \
+        _hessianDotVec(X, D, v, splitLimit, mid, high)
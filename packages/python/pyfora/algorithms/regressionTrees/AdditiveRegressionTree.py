@@ -32,15 +32,40 @@ class AdditiveRegressionTree:
     def __add__(self, tree):
         return AdditiveRegressionTree(self.trees + [tree])
 
-    def predict(self, x, nEstimators=None):
+    def predict(self, x, nEstimators=None, _splitLimit=100000):
         if isinstance(x, PurePandas.PurePythonDataFrame):
-            return x.apply(
-                lambda row: self._predictionFunction(row, nEstimators),
-                1
+            if nEstimators is None:
+                nEstimators = len(self.trees)
+
+            flatTrees = [tree.flatten() for tree in self.trees[:nEstimators]]
+            columns = [column.values for column in x.columns()]
+
+            return PurePandas.PurePythonSeries(
+                self._predictBlocks(flatTrees, columns, _splitLimit, 0, len(x))
                 )
         else:
             return self._predictionFunction(x, nEstimators)
 
+    def _predictBlocks(self, flatTrees, columns, splitLimit, low, high):
+        if high - low <= splitLimit:
+            return self._predictBlock(flatTrees, columns, low, high)
+
+        mid = (low + high) / 2
+        return self._predictBlocks(flatTrees, columns, splitLimit, low, mid) + \
+            self._predictBlocks(flatTrees, columns, splitLimit, mid, high)
+
+    def _predictBlock(self, flatTrees, columns, low, high):
+        # tree-by-tree over the whole block, so each tree's lists stay hot
+        predictions = [0.0 for _ in xrange(low, high)]
+
+        for tree in flatTrees:
+            predictions = [
+                predictions[ix - low] + tree.predictRow(columns, ix)
+                for ix in xrange(low, high)
+                ]
+
+        return predictions
+
     def _predictionFunction(self, row, nEstimators=None):
         if nEstimators is None:
             nEstimators = len(self.trees)
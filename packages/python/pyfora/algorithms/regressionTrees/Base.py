@@ -103,6 +103,9 @@ class SampleSummaryHistogram:
 
         self.samples.augmentItem(bucket, sample)
 
+    def observeBin(self, binIx, sample):
+        self.samples.augmentItem(binIx, sample)
+
     def bestSplitPointAndImpurityImprovement(self):
         above = SampleSummary()
         for sample in self.samples:
@@ -151,6 +154,71 @@ class SampleSummaryHistogram:
             True
             )
 
+    def __sub__(self, other):
+        assert self.x0 == other.x0 and self.x1 == other.x1
+
+        newSamples = []
+        for ix in xrange(len(self.samples)):
+            newSamples = newSamples + [self.samples[ix] - other.samples[ix]]
+
+        return SampleSummaryHistogram(
+            self.x0,
+            self.x1,
+            newSamples,
+            True
+            )
+
+
+class BinnedFeatures:
+    """Predictor columns quantized once into `SampleSummaryHistogram` bucket
+    indices.
+
+    Each column is bucketed over ``mean +/- 3 * stdev`` of the whole column,
+    so trees fit repeatedly to the same predictors (as in boosting) can build
+    their split histograms from the bucket indices directly.
+    """
+    def __init__(self, X, xDimensions, numBuckets):
+        self.xDimensions = xDimensions
+        self.numBuckets = numBuckets
+        self.bounds = [
+            BinnedFeatures.bucketBounds(X.iloc[:, xDim]) for xDim in xDimensions
+            ]
+        self.binColumns = [
+            BinnedFeatures.binColumn(
+                X.iloc[:, xDimensions[dimIx]],
+                self.bounds[dimIx][0],
+                self.bounds[dimIx][1],
+                numBuckets
+                )
+            for dimIx in xrange(len(xDimensions))
+            ]
+
+    @staticmethod
+    def bucketBounds(xColumn):
+        summary = sum(
+            (SampleSummary(xColumn[ix]) for ix in xrange(len(xColumn))),
+            SampleSummary()
+            )
+
+        return (summary.mean - summary.stdev * 3.0,
+                summary.mean + summary.stdev * 3.0)
+
+    @staticmethod
+    def binColumn(xColumn, x0, x1, count):
+        def binIx(xValue):
+            if x1 == x0:
+                if xValue > x0:
+                    return count - 1
+                return 0
+
+            bucket = (xValue - x0) / (x1 - x0) * count
+            bucket = max(bucket, 0)
+            bucket = min(bucket, count - 1)
+
+            return int(bucket)
+
+        return [binIx(xColumn[ix]) for ix in xrange(len(xColumn))]
+
 
 class _MutableVector:
     def __init__(self, count, defaultValue):
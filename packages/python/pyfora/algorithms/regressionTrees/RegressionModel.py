@@ -13,6 +13,7 @@
 #   limitations under the License.
 
 
+import Base
 import RegressionTree
 
 
@@ -33,7 +34,8 @@ class RegressionModel:
             yAsSeries,
             loss,
             regressionTreeBuilder,
-            learningRate
+            learningRate,
+            binnedFeatures=None
             ):
         self.additiveRegressionTree = additiveRegressionTree
         self.X = X
@@ -42,6 +44,7 @@ class RegressionModel:
         self.loss = loss
         self.regressionTreeBuilder = regressionTreeBuilder
         self.learningRate = learningRate
+        self.binnedFeatures = binnedFeatures
 
     def score(self, X, yTrue):
         """
@@ -115,6 +118,12 @@ class RegressionModel:
             treeBuilderArgs.numBuckets
             )
 
+        # the predictors don't change between boosting rounds, so we bucket
+        # them once here rather than in every round's tree
+        binnedFeatures = Base.BinnedFeatures(
+            X, XDimensions, treeBuilderArgs.numBuckets
+            )
+
         if loss.needsOriginalYValues:
             X = X.pyfora_addColumn("__originalValues", yAsSeries)
 
@@ -125,7 +134,8 @@ class RegressionModel:
             yAsSeries,
             loss,
             baseModelBuilder,
-            learningRate
+            learningRate,
+            binnedFeatures
             )
 
     def boost(self, predictions, pseudoResiduals):
@@ -137,13 +147,11 @@ class RegressionModel:
         if self.loss.needsPredictedValues:
             localX = localX.pyfora_addColumn("__predictedValues", predictions)
 
-        nextRegressionTree = self.regressionTreeBuilder.fit_(
+        nextRegressionTree = self.regressionTreeBuilder.fitBinned_(
             localX,
             targetDim,
-            None,
-            self.XDimensions,
-            self.loss.leafValueFun(self.learningRate),
-            None)
+            self.binnedFeatures,
+            self.loss.leafValueFun(self.learningRate))
 
         return RegressionModel(
             self.additiveRegressionTree + nextRegressionTree,
@@ -152,7 +160,8 @@ class RegressionModel:
             self.yAsSeries,
             self.loss,
             self.regressionTreeBuilder,
-            self.learningRate)
+            self.learningRate,
+            self.binnedFeatures)
 
     def featureImportances(self):
         raise NotImplementedError()
@@ -70,6 +70,33 @@ class RegressionTree:
         else:
             return self._predictionFunction(x, depth)
 
+    def flatten(self):
+        """Return a :class:`~pyfora.algorithms.regressionTrees.RegressionTree.FlatRegressionTree`
+        holding this tree's rules as parallel lists."""
+        features = []
+        thresholds = []
+        lessChildren = []
+        higherChildren = []
+        values = []
+
+        for ix in xrange(len(self.rules)):
+            rule = self.rules[ix]
+            if isinstance(rule, Base.SplitRule):
+                features = features + [rule.rule.dimension]
+                thresholds = thresholds + [rule.rule.splitPoint]
+                lessChildren = lessChildren + [ix + rule.jumpIfLess]
+                higherChildren = higherChildren + [ix + rule.jumpIfHigher]
+            else:
+                features = features + [-1]
+                thresholds = thresholds + [0.0]
+                lessChildren = lessChildren + [-1]
+                higherChildren = higherChildren + [-1]
+            values = values + [rule.leafValue]
+
+        return FlatRegressionTree(
+            features, thresholds, lessChildren, higherChildren, values
+            )
+
     def _predictionFunction(self, row, depth=None):
         if depth is None:
             depth = 1000000
@@ -133,6 +160,33 @@ class RegressionTree:
         return 1.0 - u / v
 
 
+class FlatRegressionTree:
+    """A regression tree as parallel lists indexed by node: the column a node
+    splits on (-1 for leaves), its split point, the indices of its children,
+    and its value. Predicting walks these lists and reads feature values
+    straight out of the columns, rather than building row objects and
+    dispatching on rule classes.
+    """
+    def __init__(self, features, thresholds, lessChildren, higherChildren, values):
+        self.features = features
+        self.thresholds = thresholds
+        self.lessChildren = lessChildren
+        self.higherChildren = higherChildren
+        self.values = values
+
+    def predictRow(self, columns, rowIx):
+        ix = 0
+        feature = self.features[0]
+        while feature >= 0:
+            if columns[feature][rowIx] < self.thresholds[ix]:
+                ix = self.lessChildren[ix]
+            else:
+                ix = self.higherChildren[ix]
+            feature = self.features[ix]
+
+        return self.values[ix]
+
+
 class RegressionLeafRule:
     def __init__(self, leafValue):
         self.leafValue = leafValue
@@ -355,6 +409,163 @@ class RegressionTreeBuilder:
             len(xDimensions)
             )
 
+    def fitBinned_(self,
+                   df,
+                   yDim,
+                   binnedFeatures,
+                   leafValueFun,
+                   maxDepth=None,
+                   activeIndices=None,
+                   histograms=None):
+        """Like `fit_`, but finds splits from the bucket indices in
+        `binnedFeatures` (a :class:`~pyfora.algorithms.regressionTrees.Base.BinnedFeatures`
+        built from the predictor columns of `df`).
+
+        Only the smaller child of each split has its histograms built from its
+        rows: the larger child's are the parent's minus the smaller's.
+        """
+        if maxDepth is None:
+            maxDepth = self.maxDepth
+
+        if activeIndices is None:
+            activeIndices = range(len(df))
+
+        numDimensions = len(binnedFeatures.xDimensions)
+
+        if len(activeIndices) < self.minSamplesSplit or maxDepth == 0:
+            return RegressionTree(
+                [RegressionLeafRule(
+                    leafValueFun(df, activeIndices)
+                    )],
+                numDimensions
+                )
+
+        yColumn = df.iloc[:, yDim]
+
+        if histograms is None:
+            histograms = self.binnedHistograms(binnedFeatures, yColumn, activeIndices)
+
+        bestRule = self.bestRuleFromHistograms(
+            binnedFeatures, histograms, len(activeIndices)
+            )
+
+        leftIndices, rightIndices = bestRule.splitDataframe(df, activeIndices)
+
+        if len(leftIndices) == 0 or len(rightIndices) == 0:
+            return RegressionTree(
+                [RegressionLeafRule(
+                    leafValueFun(df, activeIndices)
+                    )],
+                numDimensions
+                )
+
+        nextDepth = maxDepth - 1
+
+        leftHistograms = None
+        rightHistograms = None
+        if nextDepth > 0:
+            if len(leftIndices) <= len(rightIndices):
+                leftHistograms = self.binnedHistograms(
+                    binnedFeatures, yColumn, leftIndices
+                    )
+                rightHistograms = [
+                    histograms[dimIx] - leftHistograms[dimIx]
+                    for dimIx in xrange(numDimensions)
+                    ]
+            else:
+                rightHistograms = self.binnedHistograms(
+                    binnedFeatures, yColumn, rightIndices
+                    )
+                leftHistograms = [
+                    histograms[dimIx] - rightHistograms[dimIx]
+                    for dimIx in xrange(numDimensions)
+                    ]
+
+        treeLeft = self.fitBinned_(
+            df, yDim, binnedFeatures,
+            leafValueFun,
+            nextDepth,
+            leftIndices,
+            leftHistograms
+            )
+        treeRight = self.fitBinned_(
+            df, yDim, binnedFeatures,
+            leafValueFun,
+            nextDepth,
+            rightIndices,
+            rightHistograms
+            )
+
+        treeLeft = treeLeft.rules
+        treeRight = treeRight.rules
+
+        leafValue = (len(leftIndices) * treeLeft[0].leafValue + \
+                     len(rightIndices) * treeRight[0].leafValue) / \
+            (len(leftIndices) + len(rightIndices))
+
+        return RegressionTree(
+            [Base.SplitRule(
+                bestRule,
+                1,
+                1 + len(treeLeft),
+                leafValue
+                )] + treeLeft + treeRight,
+            numDimensions
+            )
+
+    def binnedHistograms(self, binnedFeatures, yColumn, activeIndices):
+        return [
+            self.binnedHistogram(binnedFeatures, dimIx, yColumn, activeIndices)
+            for dimIx in xrange(len(binnedFeatures.xDimensions))
+            ]
+
+    def binnedHistogram(
+            self, binnedFeatures, dimIx, yColumn, activeIndices, low=0, high=None):
+        if high is None:
+            high = len(activeIndices)
+
+        if high - low < self.minSplitThresh:
+            x0, x1 = binnedFeatures.bounds[dimIx]
+            binColumn = binnedFeatures.binColumns[dimIx]
+
+            hist = Base.SampleSummaryHistogram(
+                x0, x1, binnedFeatures.numBuckets, False
+                )
+
+            for ix in xrange(low, high):
+                rowIx = activeIndices[ix]
+                hist.observeBin(binColumn[rowIx], Base.SampleSummary(yColumn[rowIx]))
+
+            return hist.freeze()
+
+        mid = (low + high) / 2
+
+        return self.binnedHistogram(
+            binnedFeatures, dimIx, yColumn, activeIndices, low, mid) + \
+            self.binnedHistogram(
+                binnedFeatures, dimIx, yColumn, activeIndices, mid, high)
+
+    def bestRuleFromHistograms(self, binnedFeatures, histograms, numSamples):
+        bestRuleByDimension = [
+            self.ruleFromHistogram(
+                binnedFeatures.xDimensions[dimIx], histograms[dimIx], numSamples
+                )
+            for dimIx in xrange(len(histograms))
+            ]
+
+        bestRuleIx = argmax(
+            [rule.impurityImprovement for rule in bestRuleByDimension]
+            )
+
+        return bestRuleByDimension[bestRuleIx]
+
+    @staticmethod
+    def ruleFromHistogram(xDim, histogram, numSamples):
+        splitPoint, impurityImprovement = \
+            histogram.bestSplitPointAndImpurityImprovement()
+
+        return Base.Rule(xDim, splitPoint, impurityImprovement, numSamples)
+
     @staticmethod
     def defaultLeafValueFun(yDim):
         def tr(values, activeIndices):
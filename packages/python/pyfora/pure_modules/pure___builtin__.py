@@ -379,24 +379,34 @@ class XRange(object):
 
 @pureMapping(sorted)
 class Sorted(object):
-    def __call__(self, iterable, _ufora_cutoff=1000000):
+    """
+    Lists smaller than `_merge_cutoff` are sorted in one piece. Lists smaller
+    than `_ufora_cutoff` are merge-sorted in memory, splitting across the
+    local cores, and anything larger goes through the distributed sort.
+    """
+    def __call__(self, iterable, _ufora_cutoff=1000000, _merge_cutoff=50000):
         if isinstance(iterable, list):
             return Sorted._sortList(iterable,
-                                    _ufora_cutoff=_ufora_cutoff)
+                                    _ufora_cutoff=_ufora_cutoff,
+                                    _merge_cutoff=_merge_cutoff)
         else:
             return Sorted._sortList([val for val in iterable],
-                                    _ufora_cutoff=_ufora_cutoff)
+                                    _ufora_cutoff=_ufora_cutoff,
+                                    _merge_cutoff=_merge_cutoff)
 
     @staticmethod
-    def _sortList(xs, _ufora_cutoff):
+    def _sortList(xs, _ufora_cutoff, _merge_cutoff):
         return __inline_fora(
-            """fun(@unnamed_args:(xs), @named_args:(cutoff:), *args) {
-                   if (size(xs.@m) < cutoff.@m)
+            """fun(@unnamed_args:(xs), @named_args:(cutoff:, mergeCutoff:), *args) {
+                   if (size(xs.@m) < mergeCutoff.@m)
                        return purePython.PyforaBuiltins.sorted(xs)
 
+                   if (size(xs.@m) < cutoff.@m)
+                       return purePython.PyforaBuiltins.mergeSorted(xs)
+
                    return PyList(cached`(#ExternalIoTask(#DistributedDataOperation(#Sort(xs.@m.paged)))))
                    }"""
-            )(xs, cutoff=_ufora_cutoff)
+            )(xs, cutoff=_ufora_cutoff, mergeCutoff=_merge_cutoff)
 
 
 @pureMapping(round)
@@ -137,6 +137,46 @@ class PurePythonDataFrame(object):
         # NOTE: this is not pandas-API compatible.
         return self._columns
 
+    def groupby(self, by):
+        return _PurePythonDataFrameGroupBy(self, by)
+
+    def merge(self, right, on, how='inner', _broadcastLimit=1000000):
+        """
+        Join with `right` on the column `on`, using a hash join.
+
+        If the side we'd build a hash table on has at most `_broadcastLimit`
+        rows, we build it once and probe it with every row of the other side
+        (a broadcast join). Otherwise, both sides are partitioned by the hash
+        of their keys and the partitions are joined independently.
+
+        An inner join builds on whichever side is smaller. A left join has to
+        probe with the left side to find its unmatched rows, so it always
+        builds on `right`, and only broadcasts if `right` is small.
+
+        NOTE: only how='inner' and how='left' are supported, and the order of
+        the result's rows may differ from pandas.
+        """
+        if how != 'inner' and how != 'left':
+            raise NotImplementedError("merge only supports how='inner' or how='left'")
+
+        leftKeys = self[on]
+        rightKeys = right[on]
+
+        buildSize = len(rightKeys)
+        if how == 'inner':
+            buildSize = min(len(leftKeys), len(rightKeys))
+
+        if buildSize <= _broadcastLimit:
+            rowPairs = _broadcastHashJoin(leftKeys, rightKeys, how)
+        else:
+            partitionCount = min(
+                256,
+                max(2, (len(leftKeys) + len(rightKeys)) / max(1, _broadcastLimit))
+                )
+            rowPairs = _partitionedHashJoin(leftKeys, rightKeys, how, partitionCount)
+
+        return _mergedFrame(self, right, on, rowPairs)
+
     def _dot(self, other, splitLimit, low, high):
         sz = high - low
         if sz <= splitLimit:
@@ -179,6 +219,339 @@ def _addVecsOnRange(vec1, vec2, vec2Multiplier, lowIx, highIx):
 
 
 
+class _PurePythonDataFrameGroupBy(object):
+    def __init__(self, df, by):
+        if by not in df._columnNames:
+            raise KeyError(by)
+
+        self._df = df
+        self._by = by
+
+    def agg(self, func):
+        """
+        func: {columnName: aggName or [aggName, ...]} -> DataFrame
+
+        aggName is one of 'sum', 'count', 'mean', 'min', or 'max'.
+
+        NOTE: this is not pandas-compliant: the result has no index. Instead,
+        the group keys (in sorted order) are its first column, as for
+        `df.groupby(by).agg(func).reset_index()` in pandas. A column given a
+        list of aggregations produces one column per aggregation, named
+        `(columnName, aggName)`.
+        """
+        outputNames = []
+        valueColumns = []
+        aggregators = []
+        for columnName in func:
+            aggNames = func[columnName]
+            if isinstance(aggNames, list):
+                for aggName in aggNames:
+                    outputNames = outputNames + [(columnName, aggName)]
+                    valueColumns = valueColumns + [self._df[columnName]]
+                    aggregators = aggregators + [_aggregator(aggName)]
+            else:
+                outputNames = outputNames + [columnName]
+                valueColumns = valueColumns + [self._df[columnName]]
+                aggregators = aggregators + [_aggregator(aggNames)]
+
+        partials = _groupRows(self._df[self._by], valueColumns, aggregators)
+
+        keys = sorted(partials.keys())
+
+        resultColumns = [keys]
+        for aggIx in xrange(len(aggregators)):
+            aggregator = aggregators[aggIx]
+            resultColumns = resultColumns + \
+                [[aggregator.finish(partials[key][aggIx]) for key in keys]]
+
+        return PurePythonDataFrame(resultColumns, [self._by] + outputNames)
+
+
+def _groupRows(keys, valueColumns, aggregators):
+    """
+    Reduce the rows into a dict from each key to the list of its aggregation
+    states. Rows are reduced with the splittable associativeReduce of xrange's
+    generator, so that large frames are aggregated in parallel, and the
+    per-chunk dicts are merged pairwise.
+    """
+    aggCount = len(aggregators)
+
+    def addRow(partials, rowIx):
+        key = keys[rowIx]
+        if key in partials:
+            states = partials[key]
+            newStates = [
+                aggregators[aggIx].add(states[aggIx], valueColumns[aggIx][rowIx])
+                for aggIx in xrange(aggCount)
+                ]
+        else:
+            newStates = [
+                aggregators[aggIx].add(aggregators[aggIx].initial(), valueColumns[aggIx][rowIx])
+                for aggIx in xrange(aggCount)
+                ]
+
+        return _dictWithItem(partials, key, newStates)
+
+    def merge(partials1, partials2):
+        res = partials1
+        for key in partials2:
+            states = partials2[key]
+            if key in res:
+                otherStates = res[key]
+                states = [
+                    aggregators[aggIx].merge(otherStates[aggIx], states[aggIx])
+                    for aggIx in xrange(aggCount)
+                    ]
+            res = _dictWithItem(res, key, states)
+        return res
+
+    return xrange(len(keys)).__pyfora_generator__().associativeReduce({}, addRow, merge, {})
+
+
+def _indexRows(rowKeys, rowIxs):
+    """
+    Return a dict from key to the list of row indices in `rowIxs` (in order)
+    whose `rowKeys` entry is that key. As in `_groupRows`, each chunk of rows
+    builds its own dict, and the per-chunk dicts are merged pairwise.
+    """
+    def addRow(index, ix):
+        rowIx = rowIxs[ix]
+        key = rowKeys[rowIx]
+        if key in index:
+            return _dictWithItem(index, key, index[key] + [rowIx])
+        return _dictWithItem(index, key, [rowIx])
+
+    def merge(index1, index2):
+        # index1's rows all come before index2's, so concatenating keeps them in order
+        res = index1
+        for key in index2:
+            rows = index2[key]
+            if key in res:
+                rows = res[key] + rows
+            res = _dictWithItem(res, key, rows)
+        return res
+
+    return xrange(len(rowIxs)).__pyfora_generator__().associativeReduce({}, addRow, merge, {})
+
+
+def _matchingRows(index, key, unmatched):
+    if key in index:
+        return index[key]
+    return unmatched
+
+
+def _probe(index, probeKeys, probeRows, how):
+    """
+    Return the (probeRowIx, buildRowIx) pairs for the rows in `probeRows`
+    matching an entry of `index`. If how == 'left', unmatched probe rows are
+    paired with None.
+    """
+    unmatched = []
+    if how == 'left':
+        unmatched = [None]
+
+    return [
+        (probeIx, buildIx)
+        for probeIx in probeRows
+        for buildIx in _matchingRows(index, probeKeys[probeIx], unmatched)
+        ]
+
+
+def _hashJoin(leftKeys, leftRows, rightKeys, rightRows, how):
+    """
+    Return the (leftRowIx, rightRowIx) pairs joining the rows in `leftRows`
+    with the rows in `rightRows`. Inner joins index the smaller side; left
+    joins must probe with the left side, so they always index the right.
+    """
+    if how == 'inner' and len(leftRows) < len(rightRows):
+        index = _indexRows(leftKeys, leftRows)
+        rightAndLeft = _probe(index, rightKeys, rightRows, how)
+        return [(pair[1], pair[0]) for pair in rightAndLeft]
+
+    index = _indexRows(rightKeys, rightRows)
+    return _probe(index, leftKeys, leftRows, how)
+
+
+def _broadcastHashJoin(leftKeys, rightKeys, how):
+    return _hashJoin(
+        leftKeys,
+        range(len(leftKeys)),
+        rightKeys,
+        range(len(rightKeys)),
+        how
+        )
+
+
+def _partitionedHashJoin(leftKeys, rightKeys, how, partitionCount):
+    # equal keys have equal hashes, so all the rows that can match each other
+    # land in the same partition
+    leftPartitions = _indexRows(
+        [_keyHash(key) % partitionCount for key in leftKeys],
+        range(len(leftKeys))
+        )
+    rightPartitions = _indexRows(
+        [_keyHash(key) % partitionCount for key in rightKeys],
+        range(len(rightKeys))
+        )
+
+    joinedPartitions = [
+        _hashJoin(
+            leftKeys,
+            _matchingRows(leftPartitions, partitionIx, []),
+            rightKeys,
+            _matchingRows(rightPartitions, partitionIx, []),
+            how
+            )
+        for partitionIx in xrange(partitionCount)
+        ]
+
+    return [pair for pairs in joinedPartitions for pair in pairs]
+
+
+def _keyHash(key):
+    # python's builtin hash isn't available in pyfora, so we use FORA's hash
+    # of the value, which is non-negative and depends only on its contents
+    return __inline_fora(
+        """fun(@unnamed_args:(key), *args) {
+               PyInt(`ValueHash(key))
+               }"""
+        )(key)
+
+
+def _valueOrNone(column, ix):
+    if ix is None:
+        return None
+    return column[ix]
+
+
+def _mergedFrame(left, right, on, rowPairs):
+    leftKeys = left[on]
+    columns = [[leftKeys[pair[0]] for pair in rowPairs]]
+    names = [on]
+
+    for name in left._columnNames:
+        if name != on:
+            column = left[name]
+            columns = columns + [[column[pair[0]] for pair in rowPairs]]
+            if name in right._columnNames:
+                names = names + [name + "_x"]
+            else:
+                names = names + [name]
+
+    for name in right._columnNames:
+        if name != on:
+            column = right[name]
+            columns = columns + [[_valueOrNone(column, pair[1]) for pair in rowPairs]]
+            if name in left._columnNames:
+                names = names + [name + "_y"]
+            else:
+                names = names + [name]
+
+    return PurePythonDataFrame(columns, names)
+
+
+def _dictWithItem(d, key, value):
+    # dicts can't be mutated in pyfora; this builds a new one sharing structure with `d`
+    return __inline_fora(
+        """fun(@unnamed_args:(d, key, value), *args) {
+               PyDict(d.@m.addPair(key, value))
+               }"""
+        )(d, key, value)
+
+
+def _aggregator(aggName):
+    if aggName == 'sum':
+        return _SumAggregator()
+    if aggName == 'count':
+        return _CountAggregator()
+    if aggName == 'mean':
+        return _MeanAggregator()
+    if aggName == 'min':
+        return _MinAggregator()
+    if aggName == 'max':
+        return _MaxAggregator()
+
+    raise ValueError("unsupported aggregation: " + str(aggName))
+
+
+class _SumAggregator(object):
+    def initial(self):
+        return 0
+
+    def add(self, state, value):
+        return state + value
+
+    def merge(self, state1, state2):
+        return state1 + state2
+
+    def finish(self, state):
+        return state
+
+
+class _CountAggregator(object):
+    def initial(self):
+        return 0
+
+    def add(self, state, value):
+        return state + 1
+
+    def merge(self, state1, state2):
+        return state1 + state2
+
+    def finish(self, state):
+        return state
+
+
+class _MeanAggregator(object):
+    def initial(self):
+        return (0.0, 0)
+
+    def add(self, state, value):
+        return (state[0] + value, state[1] + 1)
+
+    def merge(self, state1, state2):
+        return (state1[0] + state2[0], state1[1] + state2[1])
+
+    def finish(self, state):
+        return state[0] / state[1]
+
+
+class _MinAggregator(object):
+    def initial(self):
+        return None
+
+    def add(self, state, value):
+        if state is None or value < state:
+            return value
+        return state
+
+    def merge(self, state1, state2):
+        if state2 is None:
+            return state1
+        return self.add(state1, state2)
+
+    def finish(self, state):
+        return state
+
+
+class _MaxAggregator(object):
+    def initial(self):
+        return None
+
+    def add(self, state, value):
+        if state is None or value > state:
+            return value
+        return state
+
+    def merge(self, state1, state2):
+        if state2 is None:
+            return state1
+        return self.add(state1, state2)
+
+    def finish(self, state):
+        return state
+
+
 class _PurePythonDataFrameILocIndexer(object):
     def __init__(self, obj):
         self.obj = obj
@@ -0,0 +1,100 @@
+#   Copyright 2016 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+import time
+import ufora.FORA.python.FORA as FORA
+import ufora.cumulus.test.InMemoryCumulusSimulation as InMemoryCumulusSimulation
+import ufora.distributed.S3.InMemoryS3Interface as InMemoryS3Interface
+import ufora.native.CallbackScheduler as CallbackScheduler
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
+import ufora.FORA.python.Runtime as Runtime
+
+callbackScheduler = CallbackScheduler.singletonForTesting()
+
+KEY_COUNT = 8
+ROW_COUNTS = [25000000, 50000000, 100000000]
+
+#grouping by hashing is linear in the number of rows, so the time per row shouldn't
+#grow much with the size of the frame. A sort would add a log factor and page shuffling.
+MAX_PER_ROW_SLOWDOWN = 1.5
+
+class DataframeGroupByTest(unittest.TestCase):
+    def groupBySumTest(self, rowCount, recordResults=True):
+        s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
+
+        result, simulation = InMemoryCumulusSimulation.computeUsingSeveralWorkers(
+                        """
+                        dataframe.DataFrame(
+                            k: Vector.range(__ROW_COUNT__, { _ % __KEY_COUNT__ }),
+                            v: Vector.range(__ROW_COUNT__)
+                            )
+                        """.replace("__ROW_COUNT__", str(rowCount))
+                           .replace("__KEY_COUNT__", str(KEY_COUNT)),
+                        s3,
+                        count=1,
+                        timeout=360,
+                        memoryLimitMb=10000,
+                        returnSimulation=True,
+                        useInMemoryCache=False
+                        )
+
+        try:
+            self.assertTrue(result.isResult())
+
+            t0 = time.time()
+            result = simulation.compute(
+                "data.groupBy(`k).sum(`v).numRows",
+                timeout=1080,
+                data=result.asResult.result
+                )
+            computeDuration = time.time() - t0
+
+            self.assertTrue(result.isResult(), result)
+            self.assertEqual(result.asResult.result.pyval, KEY_COUNT)
+
+            if recordResults:
+                PerformanceTestReporter.recordTest(
+                    "python.BigBox.DataFrame.GroupBySum.%smm_rows_%s_keys" % (
+                        rowCount / 1000000,
+                        KEY_COUNT
+                        ),
+                    computeDuration,
+                    None
+                    )
+
+            return computeDuration
+        finally:
+            result = None
+            simulation.teardown()
+
+    def test_groupBySumIsLinear(self):
+        #burn in the compiler
+        self.groupBySumTest(1000000, recordResults=False)
+
+        secondsPerRow = [
+            self.groupBySumTest(rowCount) / rowCount for rowCount in ROW_COUNTS
+            ]
+
+        self.assertTrue(
+            secondsPerRow[-1] <= secondsPerRow[0] * MAX_PER_ROW_SLOWDOWN,
+            "GroupBy.sum took %s seconds per row on %s rows, but %s on %s rows" % (
+                secondsPerRow[-1], ROW_COUNTS[-1], secondsPerRow[0], ROW_COUNTS[0]
+                )
+            )
+
+
+if __name__ == "__main__":
+    import ufora.config.Mainline as Mainline
+    Mainline.UnitTestMainline([FORA, Runtime])
@@ -14,6 +14,7 @@
 
 import sys
 import os
+import shutil
 import ufora
 import ufora.config.Mainline as Mainline
 import ufora.core.SubprocessRunner as SubprocessRunner
@@ -31,7 +32,10 @@ def setUp():
     filesBefore = os.listdir(ccdir)
     for file in filesBefore:
         filePath = os.path.join(ccdir, file)
-        os.remove(filePath)
+        if os.path.isdir(filePath):
+            shutil.rmtree(filePath)
+        else:
+            os.remove(filePath)
     runSomeFora()
     
 def createParser():
@@ -58,34 +62,34 @@ def helperTestDeleteOrCorruptFiles(extension, maxCount, delete=True):
     runSomeFora()
 
 def testMissingMapFile():
-    helperTestDeleteOrCorruptFiles(".map", 1, delete=True)
+    helperTestDeleteOrCorruptFiles(".hmap", 1, delete=True)
     
-def testMissingDatFiles():
-    helperTestDeleteOrCorruptFiles(".dat", 3, delete=True)
+def testMissingLogFile():
+    helperTestDeleteOrCorruptFiles(".log", 1, delete=True)
     
-def testMissingIndexFiles():
-    helperTestDeleteOrCorruptFiles(".idx", 3, delete=True)
+def testMissingIndexFile():
+    helperTestDeleteOrCorruptFiles(".hidx", 1, delete=True)
 
 def testCorruptMapFile():
-    helperTestDeleteOrCorruptFiles(".map", 1, delete=False)
+    helperTestDeleteOrCorruptFiles(".hmap", 1, delete=False)
     
-def testCorruptDatFiles():
-    helperTestDeleteOrCorruptFiles(".dat", 3, delete=False)
+def testCorruptLogFile():
+    helperTestDeleteOrCorruptFiles(".log", 1, delete=False)
     
-def testCorruptIndexFiles():
-    helperTestDeleteOrCorruptFiles(".idx", 3, delete=False)
+def testCorruptIndexFile():
+    helperTestDeleteOrCorruptFiles(".hidx", 1, delete=False)
 
 
 def main(parsedArguments):
     Runtime.initialize()
  
     testMissingMapFile()
-    testMissingDatFiles()
-    testMissingIndexFiles()
+    testMissingLogFile()
+    testMissingIndexFile()
 
     testCorruptMapFile()
-    testCorruptDatFiles()
-    testCorruptIndexFiles()
+    testCorruptLogFile()
+    testCorruptIndexFile()
 
 if __name__ == "__main__":
     Mainline.UserFacingMainline(
@@ -0,0 +1,88 @@
+#   Copyright 2016 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+import time
+import ufora.FORA.python.FORA as FORA
+import ufora.cumulus.test.InMemoryCumulusSimulation as InMemoryCumulusSimulation
+import ufora.distributed.S3.InMemoryS3Interface as InMemoryS3Interface
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
+import ufora.FORA.python.Runtime as Runtime
+
+ROW_COUNT = 50000000
+WORKER_COUNT = 4
+MEMORY_PER_WORKER_MB = 2000
+
+class DistributedDataTasksPerfTest(unittest.TestCase):
+    def runOverSyntheticRows(self, operation):
+        s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
+
+        text = """
+            let rows = Vector.range(__ct__, { ((_ * 503) % 1000003, _) }).paged;
+
+            size(cached`(#ExternalIoTask(#DistributedDataOperation(__operation__))))
+            """.replace("__ct__", str(ROW_COUNT)).replace("__operation__", operation)
+
+        t0 = time.time()
+
+        result, simulation = InMemoryCumulusSimulation.computeUsingSeveralWorkers(
+            text,
+            s3,
+            WORKER_COUNT,
+            timeout=600,
+            memoryLimitMb=MEMORY_PER_WORKER_MB,
+            returnSimulation=True
+            )
+
+        try:
+            elapsed = time.time() - t0
+
+            self.assertTrue(result is not None)
+            self.assertTrue(result.isResult(), result)
+
+            bytesSent = sum(
+                simulation.getWorker(ix).totalBytesSentByDistributedDataTasks()
+                for ix in range(simulation.getWorkerCount())
+                )
+        finally:
+            simulation.teardown()
+
+        return elapsed, bytesSent
+
+    def recordOperation(self, name, operation):
+        elapsed, bytesSent = self.runOverSyntheticRows(operation)
+
+        PerformanceTestReporter.recordTest(
+            "python.datatasks.%s_50m_rows_4_boxes" % name,
+            elapsed,
+            None
+            )
+
+        PerformanceTestReporter.recordTest(
+            "python.datatasks.%s_50m_rows_4_boxes.bytes_sent" % name,
+            float(bytesSent),
+            {},
+            units='bytes'
+            )
+
+    def test_sort(self):
+        self.recordOperation("sort", "#Sort(rows)")
+
+    def test_hashPartition(self):
+        self.recordOperation("hash_partition", "#HashPartition(rows, 64)")
+
+
+if __name__ == "__main__":
+    import ufora.config.Mainline as Mainline
+    Mainline.UnitTestMainline([FORA, Runtime])
@@ -0,0 +1,169 @@
+#   Copyright 2015 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Measures KeyspaceManager throughput (events/sec) as a function of shard count.
+
+Each client thread owns its own keyspace, so with more shards than one the
+clients' events are stored and broadcast in parallel.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import unittest
+
+import ufora.config.Mainline as Mainline
+import ufora.native.Storage as StorageNative
+import ufora.native.SharedState as SharedStateNative
+import ufora.distributed.SharedState.SharedState as SharedState
+import ufora.native.Json as NativeJson
+
+import ufora.native.CallbackScheduler as CallbackScheduler
+callbackScheduler = CallbackScheduler.singletonForTesting()
+
+json = NativeJson.Json
+
+CLIENT_COUNT = 8
+EVENTS_PER_CLIENT = 20000
+KEYS_PER_CLIENT = 1000
+SHARD_COUNTS = [1, 2, 4, 8]
+
+#with enough cores, the best sharded configuration should beat a single shard by this much
+MIN_SPEEDUP = 1.2
+MIN_CORES_FOR_SPEEDUP = 4
+
+
+def unbundler(message):
+    if message.tag != 'Bundle':
+        return [message]
+    return message.getBundleElements()
+
+
+class LoadClient(object):
+    def __init__(self, manager, keyspaceName):
+        self.viewChannel, managerChannel = \
+            SharedStateNative.InMemoryChannelWithoutMemo(callbackScheduler)
+        manager.add(managerChannel)
+
+        self.pendingMessages = []
+        self.eventId = 0
+        self.eventsReceived = 0
+
+        self.getMessage()
+        self.viewChannel.write(SharedStateNative.MessageRequestSession())
+        self.clientId = self.getNextMessageOfType("Initialize").asInitialize.clientId
+
+        self.keyspace = SharedState.Keyspace("TakeHighestIdKeyType", json(keyspaceName), 1)
+        keyrange = SharedState.KeyRange(self.keyspace, 0, None, None, True, True)
+        self.viewChannel.write(SharedState.MessageOut.Subscribe(keyrange))
+        self.getNextMessageOfType("KeyRangeLoaded")
+
+    def getMessage(self):
+        if not self.pendingMessages:
+            self.pendingMessages += unbundler(self.viewChannel.get())
+        return self.pendingMessages.pop(0)
+
+    def getNextMessageOfType(self, expectedType):
+        while True:
+            message = self.getMessage()
+            if message.tag == expectedType:
+                return message
+            if message.tag == "Event":
+                self.eventsReceived += 1
+
+    def makeEvents(self, count):
+        events = []
+        for ix in xrange(count):
+            key = SharedState.Key(self.keyspace, (json('key-%s' % (ix % KEYS_PER_CLIENT)),))
+            events.append(
+                StorageNative.createPartialEvent(key, json(ix), self.eventId, self.clientId)
+                )
+            self.eventId += 1
+        return events
+
+    def pushAndFlush(self, events):
+        for event in events:
+            self.viewChannel.write(SharedState.MessageOut.PushEvent(event))
+
+        self.viewChannel.write(SharedState.MessageOut.FlushRequest(0))
+        self.getNextMessageOfType("FlushResponse")
+
+
+def measureEventsPerSecond(shardCount):
+    manager = SharedStateNative.KeyspaceManager(
+        0,
+        1,
+        0x7fffffff,
+        0x7fffffff,
+        None,
+        shardCount
+        )
+
+    clients = [LoadClient(manager, "load-%s" % ix) for ix in range(CLIENT_COUNT)]
+    events = [client.makeEvents(EVENTS_PER_CLIENT) for client in clients]
+
+    threads = [
+        threading.Thread(target=client.pushAndFlush, args=(clientEvents,))
+        for client, clientEvents in zip(clients, events)
+        ]
+
+    t0 = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - t0
+
+    assert manager.eventsHandled() >= CLIENT_COUNT * EVENTS_PER_CLIENT
+
+    #each client subscribes to its own keyspace, so it should see every event it pushed
+    #broadcast back to it before its FlushResponse
+    for client in clients:
+        assert client.eventsReceived == EVENTS_PER_CLIENT, \
+            (shardCount, client.eventsReceived)
+
+    manager.shutdown()
+
+    return CLIENT_COUNT * EVENTS_PER_CLIENT / elapsed
+
+
+class SharedStateShardingLoadTest(unittest.TestCase):
+    def test_events_per_second_vs_shard_count(self):
+        rates = {}
+        for shardCount in SHARD_COUNTS:
+            rates[shardCount] = measureEventsPerSecond(shardCount)
+            logging.info(
+                "SharedState with %2d shards: %10.0f events/sec",
+                shardCount,
+                rates[shardCount]
+                )
+
+        for shardCount in SHARD_COUNTS:
+            print "shards=%2d events/sec=%10.0f (%.2fx)" % (
+                shardCount,
+                rates[shardCount],
+                rates[shardCount] / rates[SHARD_COUNTS[0]]
+                )
+
+        if multiprocessing.cpu_count() >= MIN_CORES_FOR_SPEEDUP:
+            bestSpeedup = max(rates[s] for s in SHARD_COUNTS[1:]) / rates[SHARD_COUNTS[0]]
+            self.assertGreater(
+                bestSpeedup,
+                MIN_SPEEDUP,
+                "sharding gave a best speedup of only %.2fx" % bestSpeedup
+                )
+
+if __name__ == '__main__':
+    Mainline.UnitTestMainline([])
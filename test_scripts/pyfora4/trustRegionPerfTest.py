@@ -0,0 +1,79 @@
+#   Copyright 2016 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+
+import ufora.config.Setup as Setup
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
+import ufora.test.ClusterSimulation as ClusterSimulation
+
+import pyfora
+import pandas
+
+from pyfora.algorithms.logistic.TrustRegionConjugateGradientSolver \
+    import TrustRegionConjugateGradientSolver
+
+
+class TrustRegionPerfTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = Setup.config()
+        cls.simulation = ClusterSimulation.Simulator.createGlobalSimulator()
+        cls.simulation.startService()
+        cls.simulation.getDesirePublisher().desireNumberOfWorkers(1)
+        cls.ufora = pyfora.connect('http://localhost:30000')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ufora.close()
+        cls.simulation.stopService()
+
+    def test_trust_region_20mm_rows(self):
+        rowCount = 20000000
+
+        with self.ufora.remotely:
+            def feature(ix, prime, modulus):
+                return ((ix * prime) % modulus) / float(modulus) - 0.5
+
+            A = [feature(ix, 7919, 1000) for ix in xrange(rowCount)]
+            B = [feature(ix, 104729, 997) for ix in xrange(rowCount)]
+
+            def label(ix):
+                if ix % 7 == 0:
+                    # flip some labels so the classes aren't separable
+                    if A[ix] + B[ix] > 0:
+                        return -1
+                    return 1
+                if A[ix] + B[ix] > 0:
+                    return 1
+                return -1
+
+            y = [label(ix) for ix in xrange(rowCount)]
+            X = pandas.DataFrame({'A': A, 'B': B})
+
+        with PerformanceTestReporter.RecordAsPerfTest(
+                "pyfora.logistic.trust_region_20mm_rows"):
+            with self.ufora.remotely.downloadAll():
+                res = TrustRegionConjugateGradientSolver(
+                    X, y, 1, 1.0 / rowCount).solve()
+                iterations = res.iterations
+                dataPasses = res.dataPasses
+
+        self.assertTrue(iterations > 0)
+        self.assertTrue(dataPasses > iterations)
+
+
+if __name__ == "__main__":
+    import ufora.config.Mainline as Mainline
+    Mainline.UnitTestMainline([])
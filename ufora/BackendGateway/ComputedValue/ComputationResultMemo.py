@@ -0,0 +1,102 @@
+#   Copyright 2016 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Bounded memo of finished computation results, keyed by ComputationId."""
+
+import collections
+
+
+class ComputationResultMemo(object):
+    """Holds (result, statistics) pairs for finished root computations.
+
+    Root ComputationIds are a hash of the ComputationDefinition, so two
+    submissions of the same definition share an entry. We keep at most
+    'maxEntries' results, dropping the least recently used entries that
+    'isPinned' doesn't protect.
+    """
+    def __init__(self, maxEntries, isPinned=lambda computationId: False):
+        assert maxEntries > 0
+        self.maxEntries = maxEntries
+        self.isPinned = isPinned
+        self.entries_ = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.persistentCacheRestores = 0
+        self.evictions = 0
+
+    def __contains__(self, computationId):
+        return computationId in self.entries_
+
+    def __len__(self):
+        return len(self.entries_)
+
+    def __getitem__(self, computationId):
+        return self.entries_[computationId]
+
+    def __delitem__(self, computationId):
+        del self.entries_[computationId]
+
+    def lookup(self, computationId):
+        """Return the (result, statistics) for 'computationId', or None.
+
+        Counts towards the hit rate and marks the entry as recently used.
+        """
+        if computationId not in self.entries_:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        value = self.entries_.pop(computationId)
+        self.entries_[computationId] = value
+        return value
+
+    def add(self, computationId, result, statistics):
+        if computationId in self.entries_:
+            del self.entries_[computationId]
+        self.entries_[computationId] = (result, statistics)
+        self.evictIfNecessary()
+
+    def recordPersistentCacheRestore(self):
+        """Note a miss that the cluster can restore from a finished checkpoint.
+
+        The computation still gets scheduled, so this isn't a hit.
+        """
+        self.persistentCacheRestores += 1
+
+    def evictIfNecessary(self):
+        if len(self.entries_) <= self.maxEntries:
+            return
+
+        for computationId in list(self.entries_.keys()):
+            if len(self.entries_) <= self.maxEntries:
+                return
+            if not self.isPinned(computationId):
+                del self.entries_[computationId]
+                self.evictions += 1
+
+    def clear(self):
+        self.entries_.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries_),
+            "maxEntries": self.maxEntries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistentCacheRestores": self.persistentCacheRestores,
+            "evictions": self.evictions,
+            "hitRate": float(self.hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,70 @@
+#   Copyright 2016 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import unittest
+import ufora.BackendGateway.ComputedValue.ComputationResultMemo as ComputationResultMemo
+
+class ComputationResultMemoTest(unittest.TestCase):
+    def test_lookup_counts_hits_and_misses(self):
+        memo = ComputationResultMemo.ComputationResultMemo(10)
+
+        self.assertIsNone(memo.lookup("a"))
+        memo.add("a", 1, "stats")
+        self.assertEqual(memo.lookup("a"), (1, "stats"))
+
+        stats = memo.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hitRate"], 0.5)
+
+    def test_persistent_cache_restores_are_not_hits(self):
+        memo = ComputationResultMemo.ComputationResultMemo(10)
+
+        self.assertIsNone(memo.lookup("a"))
+        memo.recordPersistentCacheRestore()
+
+        stats = memo.stats()
+        self.assertEqual(stats["persistentCacheRestores"], 1)
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["hitRate"], 0.0)
+
+    def test_evicts_least_recently_used(self):
+        memo = ComputationResultMemo.ComputationResultMemo(2)
+
+        memo.add("a", 1, None)
+        memo.add("b", 2, None)
+        memo.lookup("a")
+        memo.add("c", 3, None)
+
+        self.assertIn("a", memo)
+        self.assertNotIn("b", memo)
+        self.assertIn("c", memo)
+        self.assertEqual(memo.stats()["evictions"], 1)
+
+    def test_pinned_entries_are_retained(self):
+        pinned = set(["a", "b"])
+        memo = ComputationResultMemo.ComputationResultMemo(1, lambda c: c in pinned)
+
+        memo.add("a", 1, None)
+        memo.add("b", 2, None)
+        self.assertEqual(len(memo), 2)
+
+        pinned.discard("a")
+        memo.add("c", 3, None)
+
+        self.assertNotIn("a", memo)
+        self.assertIn("b", memo)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,6 +38,9 @@ import ufora.BackendGateway.SubscribableWebObjects.ObjectClassesToExpose.WriteTo
 
 ImplValContainer_ = ForaNative.ImplValContainer
 
+#how long we'll wait for every worker to report its piece of a computation's profile
+PROFILE_REQUEST_TIMEOUT = 30.0
+
 #install a function to let us hash implvals
 def hashImplValContainer(ivc, unhashableObjectPolicy):
     return "ImplValContainer:" + str(ivc.hash)
@@ -400,6 +403,13 @@ class ComputedValue(ComputedGraph.Location):
     def increaseRequestCount(self, *args):
         ComputedValueGateway.getGateway().increaseRequestCount(self, self.cumulusComputationDefinition)
 
+    @ComputedGraph.ExposedFunction()
+    def getProfile(self, *args):
+        return ComputedValueGateway.getGateway().requestComputationProfile(
+            self.cumulusComputationDefinition,
+            PROFILE_REQUEST_TIMEOUT
+            )
+
     @ComputedGraph.ExposedFunction()
     def triggerCompilation(self, *args):
         runtime = Runtime.getMainRuntime()
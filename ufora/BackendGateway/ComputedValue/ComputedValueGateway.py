@@ -14,6 +14,7 @@
 
 """Maintains a background loop for submitting ComputedValue work to Cumulus"""
 import threading
+import Queue
 import logging
 
 import ufora.util.DefaultDict as DefaultDict
@@ -23,6 +24,7 @@ import ufora.BackendGateway.ComputedGraph.ComputedGraph as ComputedGraph
 import ufora.BackendGateway.ComputedGraph.BackgroundUpdateQueue as BackgroundUpdateQueue
 import ufora.native.Cumulus as CumulusNative
 import ufora.util.ThreadLocalStack as ThreadLocalStack
+import ufora.BackendGateway.ComputedValue.ComputationResultMemo as ComputationResultMemo
 import ufora.FORA.VectorDataManager.VectorDataManager as VectorDataManager
 import traceback
 
@@ -231,11 +233,20 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
         self.cumulusGateway.onCacheLoad = self.onCacheLoad
         self.cumulusGateway.onComputationResult = self.onComputationResult
         self.cumulusGateway.onMachineCountWentToZero = self.onMachineCountWentToZero
+        self.cumulusGateway.onComputationProfile = self.onComputationProfile
+        self.computationProfileRequests_ = {}
 
         self.refcountsForCompIds_ = DefaultDict.DefaultDict(lambda computedValue: 0)
 
         self.computedValuesForComputations = {}
-        self.finishedResultsForComputations = {}
+
+        #results are retained while any ComputedValue still requests them, plus
+        #a bounded number of recently used results we can hand back without
+        #resubmitting the computation
+        self.finishedResultsForComputations = ComputationResultMemo.ComputationResultMemo(
+            Setup.config().computedValueGatewayMaxFinishedResults,
+            self.isRequested_
+            )
 
         self.curPriorityIndex = 0
 
@@ -288,6 +299,46 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
         with self.lock_:
             self.externalIoTaskCallbacks_[taskIdGuid] = callback
 
+    def startProfiling(self, sampleIntervalSeconds):
+        self.cumulusGateway.startProfiling(sampleIntervalSeconds)
+
+    def stopProfiling(self):
+        self.cumulusGateway.stopProfiling()
+
+    def requestComputationProfile(self, cumulusComputationDefinition, timeout):
+        """Collect the sampling profile of a computation from every worker.
+
+        Blocks until all workers have responded, and returns the merged profile
+        as a dict, or None if there are no workers or they don't respond in time.
+        """
+        computationId = self.cumulusGateway.getComputationIdForDefinition(
+            cumulusComputationDefinition
+            )
+
+        result = Queue.Queue()
+
+        with self.lock_:
+            guid = self.cumulusGateway.requestComputationProfileAndReturnGuid(computationId)
+            self.computationProfileRequests_[guid] = result
+
+        try:
+            profileJson = result.get(timeout=timeout)
+        except Queue.Empty:
+            logging.warn("Timed out waiting for the profile of %s", computationId)
+            return None
+        finally:
+            with self.lock_:
+                self.computationProfileRequests_.pop(guid, None)
+
+        return profileJson.toSimple()
+
+    def onComputationProfile(self, requestGuid, profileJson):
+        #this is delivered directly rather than through the BackgroundUpdateQueue,
+        #since the requester is blocking on it
+        with self.lock_:
+            if requestGuid in self.computationProfileRequests_:
+                self.computationProfileRequests_[requestGuid].put(profileJson)
+
     def onNewGlobalUserFacingLogMessage(self, newMsg):
         def updater():
             global ViewOfEntireCumulusSystem
@@ -302,7 +353,7 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
 
     def onComputationResult(self, computationId, result, statistics):
         with self.lock_:
-            self.finishedResultsForComputations[computationId] = (result, statistics)
+            self.finishedResultsForComputations.add(computationId, result, statistics)
             if computationId in self.computedValuesForComputations:
                 for compVal in self.computedValuesForComputations[computationId]:
                     BackgroundUpdateQueue.push(
@@ -362,6 +413,30 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
     def getPersistentCacheIndex(self):
         return self.cumulusGateway.persistentCacheIndex
 
+    def getResultMemoStats(self):
+        with self.lock_:
+            return self.finishedResultsForComputations.stats()
+
+    def isRequested_(self, computationId):
+        return computationId in self.refcountsForCompIds_ and \
+            self.refcountsForCompIds_[computationId] > 0
+
+    def hasFinishedCheckpoint_(self, computationId):
+        """Determine whether the persistent cache holds a checkpoint of a finished
+        computation with the same definition as 'computationId'.
+
+        The cluster restores such computations from the checkpoint rather than
+        recomputing them, even if they were submitted by a different session.
+        """
+        persistentCacheIndex = self.getPersistentCacheIndex()
+        if persistentCacheIndex is None or not persistentCacheIndex.hasConnectedView():
+            return False
+
+        checkpoint = persistentCacheIndex.computationMostRecentCheckpoint(computationId)
+
+        return checkpoint is not None and \
+            persistentCacheIndex.isCheckpointForFinishedComputation(checkpoint)
+
     def triggerPerstistentCacheGarbageCollection(self, completePurge):
         self.cumulusGateway.triggerPerstistentCacheGarbageCollection(completePurge)
 
@@ -447,14 +522,23 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
             self.computedValuesForComputations[computationId].add(compValue)
 
             self.refcountsForCompIds_[computationId] += 1
-            if self.refcountsForCompIds_[computationId] == 1:
+
+            finished = self.finishedResultsForComputations.lookup(computationId)
+
+            isNewRequest = self.refcountsForCompIds_[computationId] == 1
+
+            if isNewRequest:
+                #even if we hold the result, the cluster dropped the computation's priority
+                #when its last request went away, and the result's bigvecs are only kept
+                #alive while it's prioritized
                 self.cumulusGateway.setComputationPriority(
                     computationId,
                     CumulusNative.ComputationPriority(self.allocNewPriority_())
                     )
 
-            if computationId in self.finishedResultsForComputations:
-                result, statistics = self.finishedResultsForComputations[computationId]
+            if finished is not None:
+                #we already hold the result, so there's no need to wait on the cluster
+                result, statistics = finished
                 BackgroundUpdateQueue.push(
                     self.valueUpdater(
                         compValue,
@@ -463,6 +547,16 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
                         )
                     )
 
+        #the persistent cache index is a SharedState query, so we don't hold the lock for it
+        if isNewRequest and finished is None and self.hasFinishedCheckpoint_(computationId):
+            with self.lock_:
+                self.finishedResultsForComputations.recordPersistentCacheRestore()
+
+            logging.info(
+                "ComputedValueGateway expects %s to be restored from a finished checkpoint",
+                computationId
+                )
+
     def allocNewPriority_(self):
         self.curPriorityIndex += 1
         return self.curPriorityIndex
@@ -481,6 +575,7 @@ class CumulusComputedValueGateway(CacheLoader, ComputedValueGateway, Stoppable.S
                         computationId,
                         CumulusNative.ComputationPriority()
                         )
+                    self.finishedResultsForComputations.evictIfNecessary()
 
 
 
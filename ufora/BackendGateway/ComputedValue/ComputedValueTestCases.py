@@ -361,6 +361,37 @@ class ComputedValueTestCases(object):
         self.assertTrue(False, "Timed out without ever producing a valid checkpoint.")
 
 
+    @Teardown.Teardown
+    def test_rerequestingMemoizedResultReprioritizes(self):
+        x = createComputedValue("fun(x){x+1}", "`Call", "2")
+        waitForResult(self.graph, x)
+
+        cumulusGateway = self.computedValueGateway.cumulusGateway
+        prioritiesSet = []
+
+        def recordingSetComputationPriority(computationId, priority):
+            prioritiesSet.append(computationId)
+            return originalSetComputationPriority(computationId, priority)
+
+        originalSetComputationPriority = cumulusGateway.setComputationPriority
+        cumulusGateway.setComputationPriority = recordingSetComputationPriority
+
+        priorityIndex = self.computedValueGateway.curPriorityIndex
+        hits = self.computedValueGateway.getResultMemoStats()["hits"]
+
+        #waitForResult released the value, so this is a fresh request served from the memo
+        with IncreasedRequestCount(x):
+            self.assertEqual(self.computedValueGateway.getResultMemoStats()["hits"], hits + 1)
+            self.assertEqual(len(prioritiesSet), 1)
+            self.assertEqual(self.computedValueGateway.curPriorityIndex, priorityIndex + 1)
+
+            #a second request while the first is outstanding doesn't touch the cluster
+            with IncreasedRequestCount(x):
+                self.assertEqual(len(prioritiesSet), 1)
+
+        refreshGraph(self.graph)
+        self.assertEqual(x.valueIVC.pyval, 3)
+
     @Teardown.Teardown
     def test_statsAllocateTimeSpentCorrectly(self):
         expensiveComp = createComputedValue("fun() { sum(0,5*10**10) }", "`Call")
@@ -27,6 +27,7 @@ class PersistentCacheIndex(ComputedGraph.Location):
     totalObjectsInCache = ComputedGraph.Mutable(object, lambda: 0)
     totalComputationsInCache = ComputedGraph.Mutable(object, lambda: 0)
     totalReachableComputationsInCache = ComputedGraph.Mutable(object, lambda: 0)
+    resultMemoStats = ComputedGraph.Mutable(object, lambda: {})
 
     @ComputedGraph.ExposedProperty()
     def persistentCacheState(self):
@@ -34,7 +35,8 @@ class PersistentCacheIndex(ComputedGraph.Location):
             "totalBytesInCache": self.totalBytesInCache,
             "totalObjectsInCache": self.totalObjectsInCache,
             "totalComputationsInCache": self.totalComputationsInCache,
-            "totalReachableComputationsInCache": self.totalReachableComputationsInCache
+            "totalReachableComputationsInCache": self.totalReachableComputationsInCache,
+            "resultMemoStats": self.resultMemoStats
             }
 
     @ComputedGraph.ExposedFunction()
@@ -63,4 +65,5 @@ class PersistentCacheIndex(ComputedGraph.Location):
         self.totalObjectsInCache = ComputedValueGateway.getGateway().getPersistentCacheIndex().totalObjectsInCache()
         self.totalComputationsInCache = ComputedValueGateway.getGateway().getPersistentCacheIndex().totalComputationsInCache()
         self.totalReachableComputationsInCache = ComputedValueGateway.getGateway().getPersistentCacheIndex().totalReachableComputationsInCache()
+        self.resultMemoStats = ComputedValueGateway.getGateway().getResultMemoStats()
 
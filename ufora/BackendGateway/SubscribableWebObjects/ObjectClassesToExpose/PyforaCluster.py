@@ -6,3 +6,11 @@ class PyforaCluster(ComputedGraph.Location):
     def getClusterStatus(self, args):
         gateway = ComputedValueGateway.getGateway().cumulusGateway
         return gateway.getClusterStatus()
+
+    @ComputedGraph.ExposedFunction()
+    def startProfiling(self, sampleIntervalSeconds):
+        ComputedValueGateway.getGateway().startProfiling(sampleIntervalSeconds)
+
+    @ComputedGraph.ExposedFunction()
+    def stopProfiling(self, args):
+        ComputedValueGateway.getGateway().stopProfiling()
@@ -1,9 +1,14 @@
 #include "CompilerCache.hpp"
+#include "OnDiskCompilerStore.hpp"
 #include "../ControlFlowGraph/ControlFlowGraph.hppml"
+#include "../ControlFlowGraph/ControlFlowGraphUtil.hppml"
 #include "../Core/ClassMediator.hppml"
 #include "../Language/FunctionToCFG.hppml"
 #include "../Language/Parser.hppml"
+#include "../../core/Clock.hpp"
+#include "../../core/Logging.hpp"
 #include "../../core/UnitTest.hpp"
+#include <boost/lexical_cast.hpp>
 
 
 void testCodeCacheWithCodeConvertedFromString(
@@ -81,3 +86,117 @@ BOOST_AUTO_TEST_CASE( test_InMemoryCompilerStore)
 
 	}
 
+BOOST_AUTO_TEST_CASE( test_OnDiskCompilerStore_startup_with_many_entries )
+	{
+	const long kEntryCount = 100000;
+
+	fs::path basePath = fs::temp_directory_path() / fs::unique_path();
+
+	CompilerMapKey lastKey;
+	ControlFlowGraph lastCFG;
+
+		{
+		OnDiskCompilerStore store(basePath);
+
+		for (long k = 0; k < kEntryCount; k++)
+			{
+			std::string name = "benchmark_" + boost::lexical_cast<std::string>(k);
+
+			lastKey = CompilerMapKey(
+				Hash::SHA1(name + "_resumption"),
+				Hash::SHA1(name + "_code"),
+				Hash::SHA1(name + "_args")
+				);
+			lastCFG = ControlFlowGraph(
+				ControlFlowNode(
+					0,
+					ControlFlowGraphUtil::Jump(ControlFlowGraphUtil::Return(CSTValue(name)))
+					),
+				name
+				);
+
+			store.set(lastKey, lastCFG);
+			}
+
+		BOOST_CHECK(store.flushToDisk());
+		}
+
+	double t0 = curClock();
+
+	OnDiskCompilerStore reopened(basePath);
+
+	double startupTime = curClock() - t0;
+
+	LOG_INFO << "Opened OnDiskCompilerStore with " << reopened.mapEntryCount()
+		<< " entries in " << startupTime << " seconds.";
+
+	BOOST_CHECK_EQUAL(reopened.mapEntryCount(), kEntryCount);
+
+	//opening the store shouldn't deserialize anything
+	BOOST_CHECK(!reopened.lookupInMemory<ControlFlowGraph>(makeObjectIdentifier(lastCFG)));
+
+	Nullable<ControlFlowGraph> result = reopened.get(lastKey);
+
+	BOOST_REQUIRE(result);
+	BOOST_CHECK(*result == lastCFG);
+
+	fs::remove_all(basePath);
+	}
+
+
+BOOST_AUTO_TEST_CASE( test_OnDiskCompilerStore_shared_between_stores )
+	{
+	fs::path basePath = fs::temp_directory_path() / fs::unique_path();
+
+	auto keyAndCFG = [](std::string name) {
+		return make_pair(
+			CompilerMapKey(
+				Hash::SHA1(name + "_resumption"),
+				Hash::SHA1(name + "_code"),
+				Hash::SHA1(name + "_args")
+				),
+			ControlFlowGraph(
+				ControlFlowNode(
+					0,
+					ControlFlowGraphUtil::Jump(ControlFlowGraphUtil::Return(CSTValue(name)))
+					),
+				name
+				)
+			);
+		};
+
+	std::vector<pair<CompilerMapKey, ControlFlowGraph> > entries;
+
+		{
+		//both stores open the files before either has written anything, as two processes
+		//starting at the same time would
+		OnDiskCompilerStore first(basePath);
+		OnDiskCompilerStore second(basePath);
+
+		for (long k = 0; k < 10; k++)
+			{
+			entries.push_back(keyAndCFG("first_" + boost::lexical_cast<std::string>(k)));
+			first.set(entries.back().first, entries.back().second);
+
+			entries.push_back(keyAndCFG("second_" + boost::lexical_cast<std::string>(k)));
+			second.set(entries.back().first, entries.back().second);
+			}
+
+		BOOST_CHECK(first.flushToDisk());
+		BOOST_CHECK(second.flushToDisk());
+		}
+
+	OnDiskCompilerStore reopened(basePath);
+
+	BOOST_CHECK_EQUAL(reopened.mapEntryCount(), entries.size());
+
+	for (auto& entry: entries)
+		{
+		Nullable<ControlFlowGraph> result = reopened.get(entry.first);
+
+		BOOST_REQUIRE(result);
+		BOOST_CHECK(*result == entry.second);
+		}
+
+	fs::remove_all(basePath);
+	}
@@ -0,0 +1,133 @@
+/***************************************************************************
+   Copyright 2015-2016 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#include "MappedFile.hpp"
+#include "../../core/Logging.hpp"
+
+#include <errno.h>
+#include <fcntl.h>
+#include <string.h>
+#include <sys/file.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+MappedFile::MappedFile(const boost::filesystem::path& inFile) :
+		mData(0),
+		mSize(0)
+	{
+	int fd = ::open(inFile.string().c_str(), O_RDONLY);
+
+	if (fd < 0)
+		return;
+
+	struct stat st;
+	if (::fstat(fd, &st) != 0 || st.st_size == 0)
+		{
+		::close(fd);
+		return;
+		}
+
+	void* result = ::mmap(0, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+
+	//the mapping stays valid after we close the descriptor
+	::close(fd);
+
+	if (result == MAP_FAILED)
+		{
+		LOG_WARN << "Failed to mmap " << inFile.string() << ": " << strerror(errno);
+		return;
+		}
+
+	mData = (char*)result;
+	mSize = st.st_size;
+	}
+
+MappedFile::~MappedFile()
+	{
+	if (mData)
+		::munmap(mData, mSize);
+	}
+
+bool MappedFile::appendToFile(const boost::filesystem::path& inFile, const std::string& inData)
+	{
+	if (!inData.size())
+		return true;
+
+	int fd = ::open(inFile.string().c_str(), O_WRONLY | O_APPEND | O_CREAT, 0644);
+
+	if (fd < 0)
+		{
+		LOG_ERROR << "Failed to open " << inFile.string() << " for appending: " << strerror(errno);
+		return false;
+		}
+
+	uword_t written = 0;
+	while (written < inData.size())
+		{
+		ssize_t res = ::write(fd, inData.data() + written, inData.size() - written);
+
+		if (res < 0)
+			{
+			if (errno == EINTR)
+				continue;
+
+			LOG_ERROR << "Failed to append to " << inFile.string() << ": " << strerror(errno);
+			::close(fd);
+			return false;
+			}
+
+		written += res;
+		}
+
+	::close(fd);
+	return true;
+	}
+
+LockedFile::LockedFile(const boost::filesystem::path& inFile) :
+		mFd(::open(inFile.string().c_str(), O_RDWR | O_CREAT, 0644))
+	{
+	if (mFd < 0)
+		{
+		LOG_ERROR << "Failed to open " << inFile.string() << " for locking: " << strerror(errno);
+		return;
+		}
+
+	while (::flock(mFd, LOCK_EX) != 0)
+		{
+		if (errno == EINTR)
+			continue;
+
+		LOG_ERROR << "Failed to lock " << inFile.string() << ": " << strerror(errno);
+		::close(mFd);
+		mFd = -1;
+		return;
+		}
+	}
+
+LockedFile::~LockedFile()
+	{
+	//closing the descriptor releases the lock
+	if (mFd >= 0)
+		::close(mFd);
+	}
+
+uword_t LockedFile::size() const
+	{
+	struct stat st;
+	if (mFd < 0 || ::fstat(mFd, &st) != 0)
+		return 0;
+	return st.st_size;
+	}
@@ -0,0 +1,63 @@
+/***************************************************************************
+   Copyright 2015-2016 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#pragma once
+
+#include "../../core/IntegerTypes.hpp"
+
+#define BOOST_FILESYSTEM_NO_DEPRECATED
+#include <boost/filesystem.hpp>
+#include <boost/utility.hpp>
+#include <string>
+
+/// Read-only memory mapping of a whole file. A missing or empty file
+/// produces an empty mapping rather than an error.
+class MappedFile : boost::noncopyable {
+public:
+	MappedFile(const boost::filesystem::path& inFile);
+
+	~MappedFile();
+
+	const char* data() const { return mData; }
+
+	uword_t size() const { return mSize; }
+
+	bool empty() const { return mSize == 0; }
+
+	/// Append 'inData' to 'inFile', creating it if necessary.
+	static bool appendToFile(const boost::filesystem::path& inFile, const std::string& inData);
+
+private:
+	char* mData;
+
+	uword_t mSize;
+};
+
+/// Holds an exclusive flock on a file, creating it if necessary, until destroyed.
+/// Processes sharing a file take the lock around anything that appends to or truncates it.
+class LockedFile : boost::noncopyable {
+public:
+	LockedFile(const boost::filesystem::path& inFile);
+
+	~LockedFile();
+
+	bool isLocked() const { return mFd >= 0; }
+
+	/// Current size of the file, as seen through the locked descriptor.
+	uword_t size() const;
+
+private:
+	int mFd;
+};
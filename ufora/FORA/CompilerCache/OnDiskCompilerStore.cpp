@@ -20,345 +20,220 @@
 #include "../Core/MemoryPool.hpp"
 #include "../../core/Clock.hpp"
 #include "../../core/Memory.hpp"
-#include "../../core/serialization/IFileDescriptorProtocol.hpp"
-#include "../../core/serialization/INoncontiguousByteBlockProtocol.hpp"
-#include "../../core/serialization/OFileDescriptorProtocol.hpp"
-#include "../../core/serialization/ONoncontiguousByteBlockProtocol.hpp"
-#include <fstream>
-#include <fcntl.h>
+#include "../../core/serialization/IMemProtocol.hpp"
+#include "../../core/serialization/OMemProtocol.hpp"
+#include <boost/functional/hash.hpp>
 
 
-const string OnDiskCompilerStore::INDEX_FILE_EXTENSION = ".idx";
-const string OnDiskCompilerStore::DATA_FILE_EXTENSION = ".dat";
-const string OnDiskCompilerStore::STORE_FILE_PREFIX = "CompilerStore";
-const string OnDiskCompilerStore::MAP_FILE_PREFIX = "ClassMediatorToCFG";
-const string OnDiskCompilerStore::MAP_FILE_EXTENSION = ".map";
+const string OnDiskCompilerStore::LOG_FILE = "CompilerStore.log";
+const string OnDiskCompilerStore::INDEX_FILE = "CompilerStore.hidx";
+const string OnDiskCompilerStore::MAP_FILE = "ClassMediatorToCFG.hmap";
+const string OnDiskCompilerStore::LEGACY_FILE_EXTENSIONS[3] = { ".idx", ".dat", ".map" };
 
-void removeIfExists(const fs::path& file)
+namespace {
+
+// Record layout in the log: [uint64_t payload size][hash_type checksum][payload]
+const uword_t kRecordHeaderSize = sizeof(uint64_t) + sizeof(hash_type);
+
+// Index entry: [hash_type object hash][uint64_t record offset][uint64_t checksum]
+const uword_t kIndexEntrySize = sizeof(hash_type) + 2 * sizeof(uint64_t);
+
+// Map entry: [3 x hash_type CompilerMapKey][hash_type cfg hash][uint64_t checksum]
+const uword_t kMapEntrySize = 4 * sizeof(hash_type) + sizeof(uint64_t);
+
+uint64_t entryChecksum(const char* data, uword_t bytes)
 	{
-	if (fs::exists(file))
-		fs::remove(file);
+	return boost::hash_range(data, data + bytes);
 	}
 
-inline
-Nullable<fs::path> getFileWithNewExtension(
-		const fs::path& file,
-		const string& currentExtension,
-		const string& newExtension)
+template<class T>
+void appendRaw(std::string& ioData, const T& in)
 	{
-	const string& fileStr = file.string();
-	const string suffix = fileStr.substr(
-			fileStr.size()- currentExtension.size(),
-			currentExtension.size());
-	if (suffix.compare(currentExtension))
-		return null();
+	ioData.append((const char*)&in, sizeof(T));
+	}
 
-	string newFileStr =
-				fileStr.substr(
-						0,
-						fileStr.size() - currentExtension.size()
-						)
-				+ newExtension;
-	return null() << fs::path(newFileStr);
+template<class T>
+T readRaw(const char* data)
+	{
+	T result;
+	memcpy((void*)&result, data, sizeof(T));
+	return result;
 	}
 
-Nullable<fs::path> OnDiskCompilerStore::getDataFileFromIndexFile(const fs::path& indexFile)
+void appendChecksummedEntry(std::string& ioData, const std::string& entry)
 	{
-	return getFileWithNewExtension(indexFile, INDEX_FILE_EXTENSION, DATA_FILE_EXTENSION);
+	ioData.append(entry);
+	appendRaw(ioData, uint64_t(entryChecksum(entry.data(), entry.size())));
 	}
 
-Nullable<fs::path> OnDiskCompilerStore::getIndexFileFromDataFile(const fs::path& dataFile)
+bool entryIsValid(const char* entry, uword_t entrySize)
 	{
-	return getFileWithNewExtension(dataFile, DATA_FILE_EXTENSION, INDEX_FILE_EXTENSION);
+	uword_t bodySize = entrySize - sizeof(uint64_t);
+	return readRaw<uint64_t>(entry + bodySize) == entryChecksum(entry, bodySize);
+	}
+
+void removeIfExists(const fs::path& file)
+	{
+	if (fs::exists(file))
+		fs::remove(file);
 	}
 
-template<class T>
-void logDebugMap(T& map) {
-	LOG_DEBUG << "Printing Index:";
-	for(auto term: map)
-		{
-		LOG_DEBUG << prettyPrintString(term.first)
-				<< " -> " << prettyPrintString(term.second);
-		}
 }
 
-shared_ptr<vector<char> > OnDiskCompilerStore::loadAndValidateFile(const fs::path& file)
+void OnDiskCompilerStore::truncateTo(const fs::path& inFile, uword_t inSize)
 	{
-	if (!fs::exists(file) || !fs::is_regular_file(file))
-		return shared_ptr<vector<char> >();
-
-	if (mStoreFilesRead.find(file) != mStoreFilesRead.end())
+	LOG_WARN << "Truncating compiler cache file '" << inFile.string()
+			<< "' to " << inSize << " bytes after finding an invalid entry.";
+	boost::system::error_code ec;
+	fs::resize_file(inFile, inSize, ec);
+	if (ec)
 		{
-		LOG_ERROR << "File already loaded: " << file.string();
-		return shared_ptr<vector<char> >();
+		LOG_ERROR << "Failed to truncate '" << inFile.string() << "'. Removing it.";
+		removeIfExists(inFile);
 		}
+	}
 
-	ifstream fin(file.string(), ios::in | ios::binary);
-	if (!fin.is_open())
-		return shared_ptr<vector<char> >();
+void OnDiskCompilerStore::removeLegacyStoreFiles()
+	{
+	if(!fs::exists(mBasePath) || !fs::is_directory(mBasePath))
+		return;
 
-	hash_type storedChecksum;
-	constexpr auto checksumSize = sizeof(hash_type);
-	vector<char> checksumBuffer(checksumSize);
-	char* checksumPtr = &checksumBuffer[0];
-	fin.read(checksumPtr, checksumSize);
-	if (!fin)
+	for (fs::directory_iterator it(mBasePath); it != fs::directory_iterator(); ++it)
 		{
-		fin.close();
-		return shared_ptr<vector<char> >();
-		}
+		if (!fs::is_regular_file(*it))
+			continue;
 
-	IMemProtocol protocol(checksumPtr, checksumBuffer.size());
-		{
-		IBinaryStream stream(protocol);
-		CompilerCacheDuplicatingDeserializer deserializer(
-				stream,
-				MemoryPool::getFreeStorePool(),
-				PolymorphicSharedPtr<VectorDataMemoryManager>()
-				);
-		deserializer.deserialize(storedChecksum);
+		for (auto& ext: LEGACY_FILE_EXTENSIONS)
+			if (it->path().extension() == ext)
+				{
+				LOG_INFO << "Removing compiler cache file in legacy format: "
+					<< it->path().string();
+				removeIfExists(it->path());
+				break;
+				}
 		}
+	}
 
-	const uword_t bufferSize = fs::file_size(file) - checksumSize;
-	shared_ptr<vector<char> > result(new vector<char>(bufferSize));
-	char* bufPtr = &(*result)[0];
+void OnDiskCompilerStore::initializeStoreIndex()
+	{
+	fs::path indexFile = mBasePath / INDEX_FILE;
 
-	// 2. read rest
-	double t0 = curClock();
-	fin.read(bufPtr, bufferSize);
-	mPerformanceCounters.addDiskLookupTime(curClock()-t0);
-	if (!fin)
-		{
-		fin.close();
-		return shared_ptr<vector<char> >();
-		}
-	// else
-	fin.close();
+	MappedFile mapped(indexFile);
 
-	hash_type computedChecksum = hashValue(*result);
+	uword_t validBytes = 0;
 
-	if (computedChecksum != storedChecksum)
+	while (validBytes + kIndexEntrySize <= mapped.size())
 		{
+		const char* entry = mapped.data() + validBytes;
 
-		return shared_ptr<vector<char> >();
-		}
-
-	mStoreFilesRead.insert(file);
-	return result;
-	}
-
-void getFilesWithExtension(const fs::path& rootDir, const string& ext, vector<fs::path>& outFiles)
-	{
-	if(!fs::exists(rootDir) || !fs::is_directory(rootDir)) return;
+		if (!entryIsValid(entry, kIndexEntrySize))
+			break;
 
-	fs::recursive_directory_iterator it(rootDir);
-	fs::recursive_directory_iterator endit;
+		hash_type objHash = readRaw<hash_type>(entry);
+		uint64_t offset = readRaw<uint64_t>(entry + sizeof(hash_type));
 
-	while(it != endit)
-		{
-		if(fs::is_regular_file(*it)  &&  it->path().extension() == ext)
-			outFiles.push_back(it->path().filename());
-		++it;
+		//entries can't point past the end of the log, since we always append
+		//to the log before appending to the index
+		if (offset + kRecordHeaderSize > mLogSize)
+			break;
 
+		mLocationIndex[objHash] = offset;
+		validBytes += kIndexEntrySize;
 		}
-	}
 
-bool OnDiskCompilerStore::tryRebuildIndexFromData(
-		const fs::path& rootDir,
-		const fs::path& indexFile,
-		const fs::path& dataFile)
-	{
-	// TODO: implement
-	return false;
+	if (validBytes != mapped.size())
+		truncateTo(indexFile, validBytes);
 	}
 
-bool OnDiskCompilerStore::initializeStoreIndex(const fs::path& rootDir, const fs::path& indexFile)
+void OnDiskCompilerStore::initializeMap()
 	{
-	if (!fs::exists(rootDir / indexFile))
-		return false;
+	fs::path mapFile = mBasePath / MAP_FILE;
 
-	auto dataFile = getDataFileFromIndexFile(indexFile);
-	if (!dataFile)
-		{
-		// Do *not* remove indexFile. It could be a useful non-index file.
-		return false;
-		}
+	MappedFile mapped(mapFile);
 
-	if (!fs::exists(rootDir / *dataFile))
-		{
-		LOG_WARN << "Removing index file '" << indexFile.string()
-				<< "' because the corresponding data file could not be found.";
-		removeIfExists(rootDir / indexFile);
-		return false;
-		}
+	uword_t validBytes = 0;
 
-	shared_ptr<vector<char> > dataBuffer = loadAndValidateFile(rootDir/indexFile);
-	if (!dataBuffer)
+	while (validBytes + kMapEntrySize <= mapped.size())
 		{
-		bool res = tryRebuildIndexFromData(rootDir, indexFile, *dataFile);
-		if (!res)
-			{
-			LOG_WARN << "Failed to load compiler cache index file: " << indexFile.string();
+		const char* entry = mapped.data() + validBytes;
 
-			removeIfExists(rootDir / indexFile);
-			removeIfExists(rootDir / *dataFile);
-			mStoreFilesRead.erase(*dataFile);
-			}
-		return res;
-		}
+		if (!entryIsValid(entry, kMapEntrySize))
+			break;
 
-	char* dataPtr = &(*dataBuffer)[0];
-	IMemProtocol protocol(dataPtr, dataBuffer->size());
+		CompilerMapKey key(
+			readRaw<hash_type>(entry),
+			readRaw<hash_type>(entry + sizeof(hash_type)),
+			readRaw<hash_type>(entry + 2 * sizeof(hash_type))
+			);
+		hash_type cfgHash = readRaw<hash_type>(entry + 3 * sizeof(hash_type));
 
-		{
-		IBinaryStream stream(protocol);
-		CompilerCacheDuplicatingDeserializer deserializer(
-				stream,
-				MemoryPool::getFreeStorePool(),
-				PolymorphicSharedPtr<VectorDataMemoryManager>()
-				);
-		uword_t entryCount = 0;
-		deserializer.deserialize(entryCount);
-		for(int i = 0; i < entryCount; ++i)
-			{
-			ObjectIdentifier objId;
-			deserializer.deserialize(objId);
-			mLocationIndex.tryInsert(objId, *dataFile);
-			}
+		if (mLocationIndex.find(cfgHash) != mLocationIndex.end())
+			mMap[key] = ObjectIdentifier(objectTypeName<ControlFlowGraph>(), cfgHash);
+
+		validBytes += kMapEntrySize;
 		}
-	return true;
+
+	if (validBytes != mapped.size())
+		truncateTo(mapFile, validBytes);
 	}
 
-void OnDiskCompilerStore::initializeStoreIndex()
+void OnDiskCompilerStore::dropRecordFromIndex(uint64_t inOffset)
 	{
-	vector<fs::path> indexFiles;
-	getFilesWithExtension(mBasePath, INDEX_FILE_EXTENSION, indexFiles);
+	LOG_WARN << "Dropping compiler cache record at offset " << inOffset
+		<< " of " << (mBasePath / LOG_FILE).string();
 
-	for (auto& indexFile: indexFiles)
+	for (auto it = mLocationIndex.begin(); it != mLocationIndex.end(); )
 		{
-		initializeStoreIndex(mBasePath, indexFile);
+		if (it->second == inOffset)
+			it = mLocationIndex.erase(it);
+		else
+			++it;
 		}
 	}
 
-bool OnDiskCompilerStore::initializeMap(const fs::path& rootDir, const fs::path& mapFile)
+bool OnDiskCompilerStore::loadRecord(uint64_t inOffset)
 	{
-	if (!fs::exists(rootDir / mapFile))
-		return false;
-	shared_ptr<vector<char> > dataBuffer = loadAndValidateFile(rootDir/mapFile);
-	if (!dataBuffer)
+	if (mRecordsLoaded.find(inOffset) != mRecordsLoaded.end())
 		{
-		LOG_WARN << "Failed to load compiler cache map file: " << mapFile.string();
-		removeIfExists(rootDir / mapFile);
+		LOG_ERROR << "Compiler cache record already loaded: " << inOffset;
 		return false;
 		}
 
-	char* dataPtr = &(*dataBuffer)[0];
-	IMemProtocol protocol(dataPtr, dataBuffer->size());
+	if (!mMappedLog || mMappedLog->size() < inOffset + kRecordHeaderSize)
+		mMappedLog.reset(new MappedFile(mBasePath / LOG_FILE));
 
+	if (mMappedLog->size() < inOffset + kRecordHeaderSize)
 		{
-		IBinaryStream stream(protocol);
-		CompilerCacheDuplicatingDeserializer deserializer(
-				stream,
-				MemoryPool::getFreeStorePool(),
-				PolymorphicSharedPtr<VectorDataMemoryManager>()
-				);
-		uword_t entryCount = 0;
-		deserializer.deserialize(entryCount);
-		for(int i = 0; i < entryCount; ++i)
-			{
-			CompilerMapKey key;
-			deserializer.deserialize(key);
-			ObjectIdentifier objId;
-			deserializer.deserialize(objId);
-			mMap[key] = objId;
-			}
+		dropRecordFromIndex(inOffset);
+		return false;
 		}
-	return true;
-	}
 
-bool OnDiskCompilerStore::initializeMap()
-	{
-	vector<fs::path> files;
-	getFilesWithExtension(mBasePath, MAP_FILE_EXTENSION, files);
-	bool atLeastOneSucceded = false;
-	for (auto& file: files)
-		atLeastOneSucceded |= initializeMap(mBasePath, file);
-
-	return atLeastOneSucceded;
-	}
+	const char* header = mMappedLog->data() + inOffset;
+	uint64_t payloadSize = readRaw<uint64_t>(header);
+	hash_type storedChecksum = readRaw<hash_type>(header + sizeof(uint64_t));
 
-fs::path OnDiskCompilerStore::getFreshMapFile()
-	{
-	static uint64_t index = 0;
-	for (; true; ++index)
+	if (mMappedLog->size() < inOffset + kRecordHeaderSize + payloadSize)
 		{
-		stringstream mapSS;
-		mapSS << MAP_FILE_PREFIX << index << MAP_FILE_EXTENSION;
-		string mapFileStr;
-		mapSS >> mapFileStr;
-		fs::path mapFile(mapFileStr);
-		if (fs::exists(mBasePath / mapFile))
-			continue;
-		return mapFile;
+		dropRecordFromIndex(inOffset);
+		return false;
 		}
-	}
-
-pair<fs::path, fs::path> OnDiskCompilerStore::getFreshStoreFilePair()
-	{
-	static uint64_t index = 0;
-	for(; true; ++index)
-		{
-		stringstream dataSS;
-		dataSS << STORE_FILE_PREFIX << index << DATA_FILE_EXTENSION;
-		string dataFileStr;
-		dataSS >> dataFileStr;
-		fs::path dataFile(dataFileStr);
-		if (fs::exists(mBasePath / dataFile))
-			continue;
 
-		stringstream indexSS;
-		indexSS << STORE_FILE_PREFIX << index << INDEX_FILE_EXTENSION;
-		string indexFileStr;
-		indexSS >> indexFileStr;
-		fs::path indexFile(indexFileStr);
-		if (fs::exists(mBasePath / indexFile))
-			continue;
-
-		return make_pair(dataFile, indexFile);
-		}
-	}
+	const char* payload = header + kRecordHeaderSize;
 
-void OnDiskCompilerStore::cleanUpLocationIndex(const fs::path& problematicDataFile)
-	{
-	LOG_DEBUG << "Cleaning up Index from problematic data file: "
-			<< problematicDataFile.string();
-	mLocationIndex.dropValue(problematicDataFile);
-	removeIfExists(mBasePath / problematicDataFile);
-	mStoreFilesRead.erase(mBasePath / problematicDataFile);
-	auto indexFile = getIndexFileFromDataFile(problematicDataFile);
-	if (indexFile)
-		removeIfExists(mBasePath / *indexFile);
-	}
+	double t0 = curClock();
+	bool checksumMatches = (Hash::SHA1(payload, payloadSize) == storedChecksum);
+	mPerformanceCounters.addDiskLookupTime(curClock() - t0);
 
-bool OnDiskCompilerStore::loadDataFromDisk(const fs::path& relativePathToFile)
-	{
-	fs::path absolutePathToFile = mBasePath / relativePathToFile;
-	if (!fs::exists(absolutePathToFile) || !fs::is_regular_file(absolutePathToFile))
+	if (!checksumMatches)
 		{
-		cleanUpLocationIndex(relativePathToFile);
+		dropRecordFromIndex(inOffset);
 		return false;
 		}
 
-	shared_ptr<vector<char> > dataBuffer = loadAndValidateFile(absolutePathToFile);
-	if (!dataBuffer)
-		{
-		cleanUpLocationIndex(relativePathToFile);
-		return false;
-		}
+	mRecordsLoaded.insert(inOffset);
+	mPerformanceCounters.incrDiskLookups();
 
-	lassert(dataBuffer);
-	char* dataPtr = &(*dataBuffer)[0];
-	IMemProtocol protocol(dataPtr, dataBuffer->size());
+	IMemProtocol protocol(payload, payloadSize);
 	try
 		{
 		IBinaryStream stream(protocol);
@@ -369,17 +244,12 @@ bool OnDiskCompilerStore::loadDataFromDisk(const fs::path& relativePathToFile)
 				*this
 				);
 
-		uword_t entryCount;
 		double t0 = curClock();
-		deserializer.deserialize(entryCount);
-		for (int i = 0; i < entryCount; ++i)
-			{
-			ObjectIdentifier objId;
-			MemoizableObject obj;
-			deserializer.deserialize(objId);
-			deserializer.deserialize(obj);
-			mSavedObjectMap.insert(make_pair(objId, obj));
-			}
+		ObjectIdentifier objId;
+		MemoizableObject obj;
+		deserializer.deserialize(objId);
+		deserializer.deserialize(obj);
+		mSavedObjectMap.insert(make_pair(objId, obj));
 		mPerformanceCounters.addDeserializationTime(curClock()-t0);
 
 		auto memoizedRestoredObjects = deserializer.getRestoredObjectMap();
@@ -391,180 +261,177 @@ bool OnDiskCompilerStore::loadDataFromDisk(const fs::path& relativePathToFile)
 	catch (std::logic_error& e)
 		{
 		LOG_ERROR << e.what();
+		dropRecordFromIndex(inOffset);
 		return false;
 		}
 	return true;
 	}
 
-bool OnDiskCompilerStore::checksumAndStore(const NoncontiguousByteBlock& data, fs::path file)
+bool OnDiskCompilerStore::serializeRecord(
+		const ObjectIdentifier& inId,
+		const MemoizableObject& inObj,
+		uint64_t inOffset,
+		std::string& ioLogData,
+		std::string& ioIndexData
+		)
 	{
-	ofstream ofs(file.string(), ios::out | ios::binary | ios::trunc);
-	if (!ofs.is_open())
-		{
-		LOG_ERROR << "Failed to open file for writing: " << file.string();
-		return false;
-		}
-
-	hash_type checksum = data.hash();
+	std::vector<char> payload;
+	shared_ptr<map<ObjectIdentifier, MemoizableObject> > storedObjects;
 
-	ONoncontiguousByteBlockProtocol protocol;
 		{
+		OMemProtocol protocol(payload);
 		OBinaryStream stream(protocol);
-		CompilerCacheDuplicatingSerializer serializer(stream);
-		serializer.serialize(checksum);
+		CompilerCacheMemoizingBufferedSerializer serializer(stream, *this);
+
+		double t0 = curClock();
+		serializer.serialize(inId);
+		serializer.serialize(inObj);
+		mPerformanceCounters.addSerializationTime(curClock() - t0);
+
+		storedObjects = serializer.getStoredObjectMap();
 		}
-	auto serializedChecksum = protocol.getData();
-	if (!serializedChecksum)
+
+	if (!payload.size())
 		{
-		LOG_ERROR << "Failed to serialize checksum";
+		LOG_ERROR << "Failed to serialize Compiler-Cache object " << prettyPrintString(inId);
 		return false;
 		}
 
-	double t0 = curClock();
-	ofs << *serializedChecksum;
-	ofs << data;
-	mPerformanceCounters.addDiskStoreTime(curClock()-t0);
+	appendRaw(ioLogData, uint64_t(payload.size()));
+	appendRaw(ioLogData, Hash::SHA1(&payload[0], payload.size()));
+	ioLogData.append(&payload[0], payload.size());
 
-	ofs.close();
-	return true;
-	}
+	//the root and every memoizable object serialized inline in this record
+	//can be restored by loading the record
+	std::vector<hash_type> containedHashes(1, inId.hash());
+	mSavedObjectMap.insert(make_pair(inId, inObj));
 
-template<class Key, class Value>
-bool OnDiskCompilerStore::serializeAndStoreMap(
-		const map<Key, Value>& map,
-		const fs::path& file,
-		bool justTheIndex)
-	{
-	ONoncontiguousByteBlockProtocol protocol;
+	if (storedObjects)
 		{
-		OBinaryStream stream(protocol);
-		CompilerCacheDuplicatingSerializer serializer(stream);
-		uword_t entryCount = map.size();
+		for (auto& idAndObj: *storedObjects)
+			containedHashes.push_back(idAndObj.first.hash());
 
-		double t0 = curClock();
-		serializer.serialize(entryCount);
-		for(auto& pair: map)
-			{
-			serializer.serialize(pair.first);
-			if (!justTheIndex)
-				serializer.serialize(pair.second);
-			}
-		mPerformanceCounters.addSerializationTime(curClock()-t0);
+		mSavedObjectMap.insert(storedObjects->begin(), storedObjects->end());
 		}
-	auto serializedData = protocol.getData();
-	if (!serializedData)
+
+	for (auto& objHash: containedHashes)
 		{
-		LOG_ERROR << "Failed to serialize Compiler-Cache index";
-		return false;
+		if (mLocationIndex.find(objHash) != mLocationIndex.end())
+			continue;
+
+		std::string entry;
+		appendRaw(entry, objHash);
+		appendRaw(entry, inOffset);
+		appendChecksummedEntry(ioIndexData, entry);
+
+		mLocationIndex[objHash] = inOffset;
 		}
-	return checksumAndStore(*serializedData, file);
+
+	mRecordsLoaded.insert(inOffset);
+
+	return true;
 	}
 
 bool OnDiskCompilerStore::flushToDisk()
 	{
-	bool noErrorSoFar = true;
+	//other processes append to the same files, so hold the lock from the moment we read the
+	//log's size until our index entries pointing into it are written
+	LockedFile lock(mBasePath / LOG_FILE);
 
-	auto pair = getFreshStoreFilePair();
-	const fs::path& dataFile = mBasePath / pair.first;
-	const fs::path& indexFile = mBasePath / pair.second;
+	if (!lock.isLocked())
+		return false;
 
-	// serialize mUnsavedObjectMap
-	shared_ptr<map<ObjectIdentifier, MemoizableObject> > storedObjects;
+	bool noErrorSoFar = true;
 
-		{
-		ONoncontiguousByteBlockProtocol protocol;
+	std::string logData;
+	std::string indexData;
+	std::string mapData;
 
-			{
-			OBinaryStream stream(protocol);
-			CompilerCacheMemoizingBufferedSerializer serializer(stream, *this);
+	uint64_t offset = lock.size();
 
-			double t0 = curClock();
-			serializer.serialize(mUnsavedObjectMap.size());
+	for (auto& pair: mUnsavedObjectMap)
+		{
+		if (mLocationIndex.find(pair.first.hash()) != mLocationIndex.end())
+			continue;
 
-			for (auto& pair: mUnsavedObjectMap)
-				{
-				const ObjectIdentifier& curId = pair.first;
-				const MemoizableObject& curObj = pair.second;
-				serializer.serialize(curId);
-				serializer.serialize(curObj);
-				}
-			double time = curClock() - t0;
-			mPerformanceCounters.addSerializationTime(time);
-			mUnsavedObjectMap.clear();
+		uword_t sizeBefore = logData.size();
 
-			storedObjects = serializer.getStoredObjectMap();
-			if (storedObjects)
-				{
-				mSavedObjectMap.insert(storedObjects->begin(), storedObjects->end());
-				}
-			}
+		if (serializeRecord(pair.first, pair.second, offset, logData, indexData))
+			offset += logData.size() - sizeBefore;
+		else
+			noErrorSoFar = false;
+		}
+	mUnsavedObjectMap.clear();
 
-		// write .dat file
-		auto serializedData = protocol.getData();
-		if (!serializedData)
-			{
-			LOG_ERROR << "Failed to serialize Compiler-Cache data";
-			return false;
-			}
-		noErrorSoFar &= checksumAndStore(*serializedData, dataFile);
+	for (auto& keyAndId: mUnflushedMapEntries)
+		{
+		const CompilerMapKey& key = keyAndId.first;
 
+		std::string entry;
+		appendRaw(entry, key.resumptionHash());
+		appendRaw(entry, key.codeHash());
+		appendRaw(entry, key.argumentsHash());
+		appendRaw(entry, keyAndId.second.hash());
+		appendChecksummedEntry(mapData, entry);
 		}
+	mUnflushedMapEntries.clear();
 
-	if (storedObjects)
-		noErrorSoFar &= serializeAndStoreMap(*storedObjects, indexFile, true);
-
-	// write .map file
-	fs::path newMapFile = getFreshMapFile();
-	bool res = serializeAndStoreMap(mMap, mBasePath / newMapFile);
-	if (res)
-		{ // find and delete all other .map files
-		vector<fs::path> mapFiles;
-		getFilesWithExtension(mBasePath, MAP_FILE_EXTENSION, mapFiles);
-		for (auto& mapFile: mapFiles)
-			if (mapFile != newMapFile)
-				removeIfExists(mBasePath / mapFile);
+	// append to the log before the index, and to the index before the map, so
+	// that an interrupted flush never leaves an entry pointing at missing data
+	double t0 = curClock();
+	bool logWritten = MappedFile::appendToFile(mBasePath / LOG_FILE, logData);
+	if (logWritten)
+		{
+		if (MappedFile::appendToFile(mBasePath / INDEX_FILE, indexData))
+			noErrorSoFar &= MappedFile::appendToFile(mBasePath / MAP_FILE, mapData);
+		else
+			noErrorSoFar = false;
 		}
-	noErrorSoFar &= res;
+	else
+		noErrorSoFar = false;
+	mPerformanceCounters.addDiskStoreTime(curClock() - t0);
+	mPerformanceCounters.incrDiskStores();
+
 	return noErrorSoFar;
 	}
 
 OnDiskCompilerStore::OnDiskCompilerStore(fs::path inBasePath) :
-		mBasePath(inBasePath)
+		mBasePath(inBasePath),
+		mLogSize(0)
 	{
 	if (!fs::exists(mBasePath))
 		fs::create_directories(mBasePath);
 
+	removeLegacyStoreFiles();
+
+	//a tail that looks torn may just be another process's flush in progress, so only read
+	//and truncate the files while holding the lock that flushes take
+	LockedFile lock(mBasePath / LOG_FILE);
+
+	if (!lock.isLocked())
+		return;
+
+	mLogSize = lock.size();
+
 	initializeStoreIndex();
 	initializeMap();
+	}
 
-	validateIndex();
+OnDiskCompilerStore::~OnDiskCompilerStore()
+	{
+	if (mUnsavedObjectMap.size() || mUnflushedMapEntries.size())
+		flushToDisk();
 	}
 
 bool OnDiskCompilerStore::containsOnDisk(const ObjectIdentifier& inKey) const
 	{
 	if (mSavedObjectMap.find(inKey) != mSavedObjectMap.end() ||
-			mLocationIndex.hasKey(inKey))
+			mLocationIndex.find(inKey.hash()) != mLocationIndex.end())
 		return true;
 	else
 		return false;
 	}
 
-void OnDiskCompilerStore::validateIndex()
-	{
-	std::set<fs::path> valuesToDrop;
-	for (auto term : mLocationIndex.getValueToKeys())
-		{
-		if (!fs::exists(mBasePath / term.first))
-			valuesToDrop.insert(term.first);
-		}
-	for (auto value : valuesToDrop)
-		{
-		mLocationIndex.dropValue(value);
-		LOG_WARN << "Dropping Compiler Store object IDs to file '"
-				<< value.string() << "'";
-		}
-	}
-
 template<class T>
 Nullable<T> OnDiskCompilerStore::lookupInMemory(const ObjectIdentifier& inKey) const
 	{
@@ -587,14 +454,16 @@ Nullable<T> OnDiskCompilerStore::lookup(const ObjectIdentifier& inKey)
 	if (res)
 		return res;
 
-	auto file = mLocationIndex.tryGetValue(inKey);
-	if (!file)
+	auto it = mLocationIndex.find(inKey.hash());
+	if (it == mLocationIndex.end())
 		return null();
 
-	if (!loadDataFromDisk(*file))
+	uint64_t offset = it->second;
+
+	if (!loadRecord(offset))
 		{
-		LOG_WARN << "Unable to load Compiler Cache data from file '"
-				<< (mBasePath / *file).string() << "'";
+		LOG_WARN << "Unable to load Compiler Cache record at offset " << offset
+				<< " of '" << (mBasePath / LOG_FILE).string() << "'";
 		return null();
 		}
 
@@ -611,6 +480,14 @@ Nullable<Type> OnDiskCompilerStore::lookup<Type>(const ObjectIdentifier& inKey);
 template
 Nullable<JOV> OnDiskCompilerStore::lookup<JOV>(const ObjectIdentifier& inKey);
 
+template
+Nullable<ControlFlowGraph> OnDiskCompilerStore::lookup<ControlFlowGraph>(const ObjectIdentifier& inKey);
+
+template
+Nullable<ControlFlowGraph> OnDiskCompilerStore::lookupInMemory<ControlFlowGraph>(
+		const ObjectIdentifier& inKey
+		) const;
+
 
 template<class T>
 void OnDiskCompilerStore::store(const ObjectIdentifier& inKey, const T& inValue)
@@ -638,13 +515,13 @@ void OnDiskCompilerStore::store(const ObjectIdentifier& inKey, const T& inValue)
 			}
 		}
 
-	if (mLocationIndex.hasKey(inKey))
+	if (mLocationIndex.find(inKey.hash()) != mLocationIndex.end())
 		{
 		if (!inSavedMap)
 			mSavedObjectMap.insert(
 					make_pair(inKey, MemoizableObject::makeMemoizableObject(inValue))
 					);
-		return; // already exists // TODO: perhaps check that the location is valid
+		return; // already exists
 		}
 	auto value = make_pair(inKey, MemoizableObject::makeMemoizableObject(inValue));
 	auto insRes = mUnsavedObjectMap.insert(value);
@@ -660,8 +537,6 @@ void OnDiskCompilerStore::store<MemoizableObject>(const ObjectIdentifier& inKey,
 
 Nullable<ControlFlowGraph> OnDiskCompilerStore::get(const CompilerMapKey& inKey)
 	{
-	ControlFlowGraph tr;
-
 	auto objIt = mMap.find(inKey);
 	if (objIt == mMap.end())
 		{
@@ -679,7 +554,8 @@ void OnDiskCompilerStore::set(const CompilerMapKey& inKey, const ControlFlowGrap
 	{
 	ObjectIdentifier objId(makeObjectIdentifier(inCFG));
 
-	mMap.insert(make_pair(inKey, objId));
-	store(objId, inCFG);
+	if (mMap.insert(make_pair(inKey, objId)).second)
+		mUnflushedMapEntries.push_back(make_pair(inKey, objId));
 
+	store(objId, inCFG);
 	}
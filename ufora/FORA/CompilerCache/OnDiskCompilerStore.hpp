@@ -16,13 +16,15 @@
 #pragma once
 
 #include "CompilerMapKey.hppml"
+#include "MappedFile.hpp"
 #include "MemoizableObject.hppml"
 #include "ObjectIdentifier.hppml"
 #include "PerformanceCounters.hpp"
-#include "../../core/containers/MapWithIndex.hpp"
 
 #define BOOST_FILESYSTEM_NO_DEPRECATED
 #include <boost/filesystem.hpp>
+#include <boost/shared_ptr.hpp>
+#include <boost/unordered_map.hpp>
 #include <unordered_map>
 
 namespace fs = ::boost::filesystem;
@@ -30,11 +32,29 @@ namespace fs = ::boost::filesystem;
 class NoncontiguousByteBlock;
 class ObjectIdentifier;
 
+/*************
+OnDiskCompilerStore
+
+Persists ControlFlowGraphs (and the Types, JOVs and Expressions they share)
+in three append-only files:
+
+	CompilerStore.log      - checksummed records, each holding one root object
+	                         and any memoizable objects first seen inside it
+	CompilerStore.hidx     - fixed-width (object hash -> record offset) entries
+	ClassMediatorToCFG.hmap - fixed-width (CompilerMapKey -> CFG hash) entries
+
+On startup the two index files are memory-mapped and scanned into hash maps
+without deserializing anything. Records are deserialized on the first
+'lookup' of any object they contain. 'flushToDisk' only appends what was
+added since the previous flush.
+*************/
 
 class OnDiskCompilerStore {
 public:
 	OnDiskCompilerStore(const fs::path inBasePath);
 
+	~OnDiskCompilerStore();
+
 	Nullable<ControlFlowGraph> get(const CompilerMapKey& inKey);
 	void set(const CompilerMapKey& inKey, const ControlFlowGraph& inCFG);
 
@@ -54,34 +74,30 @@ public:
 
 	bool flushToDisk();
 
-private:
-	fs::path getFreshMapFile();
-	pair<fs::path, fs::path> getFreshStoreFilePair();
+	uword_t mapEntryCount() const { return mMap.size(); }
 
-	bool loadDataFromDisk(const fs::path& file);
+	uword_t indexEntryCount() const { return mLocationIndex.size(); }
 
-	shared_ptr<vector<char> > loadAndValidateFile(const fs::path& file);
+private:
+	void removeLegacyStoreFiles();
 
-	template<class Key, class Value>
-	bool serializeAndStoreMap(	const map<Key, Value>& map,
-								const fs::path& file,
-								bool justTheIndex=false);
+	void initializeStoreIndex();
 
-	bool checksumAndStore(const NoncontiguousByteBlock& data, fs::path file);
+	void initializeMap();
 
-	void initializeStoreIndex();
-	bool initializeStoreIndex(const fs::path& rootDir, const fs::path& file);
-	bool initializeMap(const fs::path& rootDir, const fs::path& mapFile);
-	bool initializeMap();
+	bool loadRecord(uint64_t inOffset);
 
-	bool tryRebuildIndexFromData(
-			const fs::path& rootDir,
-			const fs::path& indexFile,
-			const fs::path& dataFile);
+	void dropRecordFromIndex(uint64_t inOffset);
 
-	void validateIndex();
+	bool serializeRecord(
+			const ObjectIdentifier& inId,
+			const MemoizableObject& inObj,
+			uint64_t inOffset,
+			std::string& ioLogData,
+			std::string& ioIndexData
+			);
 
-	void cleanUpLocationIndex(const fs::path& problematicDataFile);
+	static void truncateTo(const fs::path& inFile, uword_t inSize);
 
 private:
 	// We currently rely on the lock held by the CompilerCache Object which holds
@@ -91,31 +107,35 @@ private:
 	// Paths
 	const fs::path mBasePath;
 
-	// Maps. FIXME: switch to using hash-maps
-	// \brief (CompilerMapKey -> ControlFlowGraph_ObjectIdentifier) map
-	map<CompilerMapKey, ObjectIdentifier> mMap; //TODO: make unordered_map (missing serialization)
+	/// \brief (CompilerMapKey -> ControlFlowGraph_ObjectIdentifier) map
+	unordered_map<CompilerMapKey, ObjectIdentifier> mMap;
+
+	/// \brief entries of mMap that haven't been appended to the map file yet
+	std::vector<pair<CompilerMapKey, ObjectIdentifier> > mUnflushedMapEntries;
 
 	unordered_map<ObjectIdentifier, MemoizableObject> mSavedObjectMap;
 
 	unordered_map<ObjectIdentifier, MemoizableObject> mUnsavedObjectMap;
 
-	/// \brief Maps Object Identifiers to relative paths (relative to mBasePath)
-	MapWithIndex<ObjectIdentifier, fs::path> mLocationIndex;
+	/// \brief Maps object hashes to the offset of the record containing them
+	boost::unordered_map<hash_type, uint64_t> mLocationIndex;
+
+	/// \brief Offsets of records we've already deserialized. Detects and
+	/// breaks recursive load cycles, which shouldn't exist.
+	std::set<uint64_t> mRecordsLoaded;
 
-	/// \brief Detects and breaks recursive load cycles, which shouldn't exist. Stores absolute paths.
-	std::set<fs::path> mStoreFilesRead;
+	/// \brief Mapping of the log as of the last time we needed to read it
+	boost::shared_ptr<MappedFile> mMappedLog;
+
+	/// \brief Size of the log when we read the index at startup
+	uint64_t mLogSize;
 
 	mutable PerformanceCounters mPerformanceCounters;
 
 	////////////////////////////////////////////////////////////
 	// CONSTANTS
-	static const string INDEX_FILE_EXTENSION;
-	static const string DATA_FILE_EXTENSION;
-	static const string STORE_FILE_PREFIX;
-	static const string MAP_FILE_PREFIX;
-	static const string MAP_FILE_EXTENSION;
-
-public:
-	static Nullable<fs::path> getDataFileFromIndexFile(const fs::path& indexFile);
-	static Nullable<fs::path> getIndexFileFromDataFile(const fs::path& indexFile);
+	static const string LOG_FILE;
+	static const string INDEX_FILE;
+	static const string MAP_FILE;
+	static const string LEGACY_FILE_EXTENSIONS[3];
 };
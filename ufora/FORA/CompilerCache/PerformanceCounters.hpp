@@ -22,6 +22,9 @@ public:
 			mMemoryStoreOps(0),
 			mDiskLookupOps(0),
 			mDiskStoreOps(0),
+			mCacheHits(0),
+			mCacheMisses(0),
+			mCacheRejections(0),
 			mDiskLookupTime(0),
 			mDiskStoreTime(0),
 			mSerializationTime(0),
@@ -39,6 +42,10 @@ public:
 			<< "-----------------------------------" << endl
 			<< "Disk Transactions:  " << diskTransactionCount() << endl
 			<< "Memory Transactions:" << memoryTransactionCount() << endl
+			<< "-----------------------------------" << endl
+			<< "Cache hits:         " << cacheHitCount() << endl
+			<< "Cache misses:       " << cacheMissCount() << endl
+			<< "Cache rejections:   " << cacheRejectionCount() << endl
 			;
 		return buffer.str();
 		}
@@ -86,11 +93,24 @@ public:
 	uint64_t incrDiskLookups() { return ++mDiskLookupOps; }
 	uint64_t incrDiskStores() { return ++mDiskStoreOps; }
 
+	uint64_t cacheHitCount() { return mCacheHits; }
+	uint64_t cacheMissCount() { return mCacheMisses; }
+	uint64_t cacheRejectionCount() { return mCacheRejections; }
+
+	uint64_t incrCacheHits() { return ++mCacheHits; }
+	uint64_t incrCacheMisses() { return ++mCacheMisses; }
+	//counts objects that could not be cached at all (e.g. because they hold
+	//process-specific state that can't be relocated)
+	uint64_t incrCacheRejections() { return ++mCacheRejections; }
+
 private:
 	uint64_t mMemoryLookupOps;
 	uint64_t mMemoryStoreOps;
 	uint64_t mDiskLookupOps;
 	uint64_t mDiskStoreOps;
+	uint64_t mCacheHits;
+	uint64_t mCacheMisses;
+	uint64_t mCacheRejections;
 	double mDiskLookupTime;
 	double mDiskStoreTime;
 	double mSerializationTime;
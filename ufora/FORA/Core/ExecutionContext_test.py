@@ -25,6 +25,8 @@ import ufora.FORA.python.ForaValue as ForaValue
 import ufora.native.FORA as FORANative
 import ufora.config.Setup as Setup
 import ufora.native.CallbackScheduler as CallbackScheduler
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
+import logging
 
 callbackScheduler = CallbackScheduler.singletonForTesting()
 
@@ -249,6 +251,51 @@ class TestExecutionContext(unittest.TestCase):
 
         self.assertTrue(stacktraceText.count("Vector") < 10)
 
+    def test_interpreted_call_throughput(self):
+        #with tracing disabled every call goes through the interpreter's axiom dispatch
+        vdm = FORANative.VectorDataManager(callbackScheduler, Setup.config().maxPageSizeInBytes)
+
+        context = ExecutionContext.ExecutionContext(
+            dataManager = vdm,
+            allowInterpreterTracing = False,
+            allowInternalSplitting = False
+            )
+
+        iterations = 200000
+
+        text = """fun(n) {
+            let g = fun(x) { x + 1 };
+            let f = fun(x, y) { g(x) + g(y) };
+            let res = 0;
+            let ix = 0;
+            while (ix < n) {
+                res = f(res, ix) % 1000000;
+                ix = ix + 1
+                }
+            res
+            }"""
+
+        with PerformanceTestReporter.RecordAsPerfTest("fora_interpreter.call_throughput"):
+            t0 = time.time()
+
+            evaluate(context,
+                FORA.extractImplValContainer(FORA.eval(text)),
+                FORANative.symbol_Call,
+                FORANative.ImplValContainer(iterations)
+                )
+
+            elapsed = time.time() - t0
+
+        self.assertTrue(context.isFinished())
+
+        #three calls to f and g per iteration
+        logging.info(
+            "interpreted %s calls in %s seconds: %s calls/sec",
+            iterations * 3,
+            elapsed,
+            iterations * 3 / elapsed
+            )
+
     def pageLargeVectorHandlesTest(self, text, cycleCount, expectsToHavePages):
         vdm = FORANative.VectorDataManager(callbackScheduler, Setup.config().maxPageSizeInBytes)
 
@@ -14,6 +14,10 @@
    limitations under the License.
 ****************************************************************************/
 #include "JudgmentOnValueTree.hppml"
+#include "JudgmentOnValueTreeMatcher.hppml"
+#include "../Core/ApplyArgFrame.hppml"
+#include "../Core/ImplValContainer.hppml"
+#include "../../core/Clock.hpp"
 
 #include <stdint.h>
 #include <boost/python.hpp>
@@ -75,6 +79,74 @@ public:
 		return boost::python::object();
 		}
 
+	//treat 'args' as the arguments to an apply. Tuples are expanded, so their
+	//names become argument names.
+	static Fora::ApplyArgFrame argFrameFor(const ImplValContainer& args)
+		{
+		Fora::ApplyArgFrame frame;
+
+		frame.push_back(Fora::ApplyArg(args.getReference(), null(), args.tupleGetSize().isValue()));
+
+		return frame;
+		}
+
+	static uword_t searchForValues(JudgmentOnValueTree& tree, ImplValContainer& args)
+		{
+		return searchJOVTree(tree, argFrameFor(args));
+		}
+
+	static PolymorphicSharedPtr<Fora::JudgmentOnValueTreeMatcher> compileMatcher(JudgmentOnValueTree& tree)
+		{
+		return PolymorphicSharedPtr<Fora::JudgmentOnValueTreeMatcher>(
+			new Fora::JudgmentOnValueTreeMatcher(tree)
+			);
+		}
+
+	static uword_t matcherSearchForValues(
+						PolymorphicSharedPtr<Fora::JudgmentOnValueTreeMatcher>& matcher,
+						ImplValContainer& args
+						)
+		{
+		return matcher->match(argFrameFor(args));
+		}
+
+	//search for every element of 'argsList' 'passes' times, first by walking the tree
+	//and then with a compiled matcher. Returns the elapsed seconds for each.
+	static boost::python::object timeSearches(
+						JudgmentOnValueTree& tree,
+						boost::python::list argsList,
+						long passes
+						)
+		{
+		std::vector<Fora::ApplyArgFrame> frames;
+
+		for (long k = 0; k < boost::python::len(argsList); k++)
+			frames.push_back(argFrameFor(boost::python::extract<ImplValContainer>(argsList[k])()));
+
+		Fora::JudgmentOnValueTreeMatcher matcher(tree);
+
+		uword_t treeTotal = 0;
+		uword_t matcherTotal = 0;
+
+		double t0 = curClock();
+
+		for (long pass = 0; pass < passes; pass++)
+			for (long k = 0; k < frames.size(); k++)
+				treeTotal += searchJOVTree(tree, frames[k]);
+
+		double t1 = curClock();
+
+		for (long pass = 0; pass < passes; pass++)
+			for (long k = 0; k < frames.size(); k++)
+				matcherTotal += matcher.match(frames[k]);
+
+		double t2 = curClock();
+
+		lassert(treeTotal == matcherTotal);
+
+		return boost::python::make_tuple(t1 - t0, t2 - t1);
+		}
+
 	void exportPythonWrapper()
 		{
 		using namespace boost::python;
@@ -83,6 +155,16 @@ public:
 			.def("__init__", make_constructor(treeFromList))
 			.def("__str__", prettyPrintString<JudgmentOnValueTree>)
 			.def("searchForJOVT", searchForJOVT)
+			.def("searchForValues", searchForValues)
+			.def("compileMatcher", compileMatcher)
+			.def("timeSearches", timeSearches)
+			;
+
+		class_<PolymorphicSharedPtr<Fora::JudgmentOnValueTreeMatcher> >(
+					"JudgmentOnValueTreeMatcher",
+					no_init
+					)
+			.def("searchForValues", matcherSearchForValues)
 			;
 		}
 
@@ -13,8 +13,34 @@
 #   limitations under the License.
 
 import unittest
+import logging
 
+import ufora.config.Setup as Setup
+import ufora.FORA.python.ExecutionContext as ExecutionContext
 import ufora.native.FORA as ForaNative
+import ufora.native.CallbackScheduler as CallbackScheduler
+
+callbackScheduler = CallbackScheduler.singletonForTesting()
+
+#signatures shaped like the ones in axioms.fora
+matcherJOVTStrings = [
+    "{Int64}, `Operator, `+, {Int64}",
+    "{Float64}, `Operator, `+, {Float64}",
+    "{Int64}, `Operator, `*, {Float64}",
+    "{String}, `Operator, `+, {String}",
+    "{Vector([])}, `size",
+    "(... *), `size",
+    "{Symbol}, `Operator, `==, {Symbol}",
+    "{Int64}, `Member, `abs",
+    "{Float64}, `Member, `abs",
+    "*, `Call, ... *",
+    "{Int64}",
+    "{Float64}",
+    "{String}",
+    "*, *",
+    "*, *, *",
+    "... *"
+    ]
 
 class JudgmentOnValueTreeTest(unittest.TestCase):
     def testSimpleValues(self):
@@ -87,6 +113,53 @@ class JudgmentOnValueTreeTest(unittest.TestCase):
             }
             )
 
+    def randomArgumentsFor(self, jovtStrings, valuesPerJOVT, seed = 0):
+        vdm = ForaNative.VectorDataManager(callbackScheduler, Setup.config().maxPageSizeInBytes)
+        context = ExecutionContext.ExecutionContext(dataManager = vdm)
+
+        randomJOVGenerator = ForaNative.RandomJOVGenerator(seed, context)
+
+        args = []
+        for jovtString in jovtStrings:
+            jovt = ForaNative.parseStringToJOVT(jovtString)
+            for _ in range(valuesPerJOVT):
+                value = randomJOVGenerator.randomValue(jovt)
+                if value is not None:
+                    args.append(value)
+        return args
+
+    def test_compiled_matcher_agrees_with_tree(self):
+        tree = ForaNative.JudgmentOnValueTree(
+            [ForaNative.parseStringToJOVT(x) for x in matcherJOVTStrings]
+            )
+        matcher = tree.compileMatcher()
+
+        args = self.randomArgumentsFor(matcherJOVTStrings + ["*", "*, *, *, *"], 20)
+        self.assertTrue(len(args) > 100)
+
+        for arg in args:
+            self.assertEqual(
+                tree.searchForValues(arg),
+                matcher.searchForValues(arg),
+                "JOV Tree:\n%s\nmatcher disagrees on %s" % (tree, arg)
+                )
+
+    def test_compiled_matcher_throughput(self):
+        tree = ForaNative.JudgmentOnValueTree(
+            [ForaNative.parseStringToJOVT(x) for x in matcherJOVTStrings]
+            )
+
+        args = self.randomArgumentsFor(matcherJOVTStrings, 10)
+        passes = 1000
+
+        treeSeconds, matcherSeconds = tree.timeSearches(args, passes)
+
+        logging.info(
+            "JOV tree dispatch: %s lookups/sec walking the tree, %s lookups/sec compiled",
+            len(args) * passes / treeSeconds,
+            len(args) * passes / matcherSeconds
+            )
+
     def _testJOVTextSet(self, jovStrings, jovMappings):
         jovts = [ForaNative.parseStringToJOVT(x) for x in jovStrings]
         tree = ForaNative.JudgmentOnValueTree(jovts)
@@ -49,6 +49,13 @@ public:
 			return c->anyCompilingOrPending();
 			}
 
+		static std::string getNativeCodeCachePerformanceStats(
+							PolymorphicSharedPtr<TypedFora::Compiler>& c
+							)
+			{
+			return c->getNativeCodeCachePerformanceStats();
+			}
+
 		static TypedFora::TypedJumpTarget compileUnnamed(
 							PolymorphicSharedPtr<TypedFora::Compiler>& r,
 							const TypedFora::Callable& inGraph
@@ -69,6 +76,7 @@ public:
 				.def("compile", &compile)
 				.def("compile", &compileUnnamed)
 				.def("anyCompilingOrPending", anyCompilingOrPending)
+				.def("getNativeCodeCachePerformanceStats", getNativeCodeCachePerformanceStats)
 				;
 			}
 };
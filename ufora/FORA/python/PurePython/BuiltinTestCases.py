@@ -248,6 +248,16 @@ class BuiltinTestCases(object):
 
         self.equivalentEvaluationTest(f)
 
+    def test_sorted_merge_path(self):
+        rng = mtrand.RandomState(seed=250015)
+        x = [int(val) for val in rng.randint(0, 1000, size=100000)]
+
+        def f(mergeCutoff):
+            return sorted(x, _merge_cutoff=mergeCutoff)
+
+        for mergeCutoff in [0, 1000, 1000000]:
+            self.assertEqual(self.evaluateWithExecutor(f, mergeCutoff), sorted(x))
+
     def test_python_if_int(self):
         def f():
             if 1:
@@ -17,6 +17,8 @@ from pyfora.algorithms import GradientBoostedRegressorBuilder
 from pyfora.algorithms import GradientBoostedClassifierBuilder
 import pyfora.pure_modules.pure_pandas as PurePandas
 import pyfora.algorithms.regressionTrees.RegressionTree as RegressionTree
+import pyfora.algorithms.regressionTrees.RegressionModel as RegressionModel
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
 
 
 import numpy
@@ -37,6 +39,36 @@ def generateRegressionData(mbOfData, nColumns):
     return predictors, responses
 
 
+def boostWithoutBinning(model, predictions):
+    # one boosting round as it was done before features were binned up front:
+    # every tree node re-buckets the raw feature columns
+    pseudoResiduals, predictions = model.pseudoResidualsAndPredictions(predictions)
+
+    localX = model.X
+    targetDim = localX.shape[1]
+    localX = localX.pyfora_addColumn("__pseudoResiduals", pseudoResiduals)
+
+    tree = model.regressionTreeBuilder.fit_(
+        localX,
+        targetDim,
+        None,
+        model.XDimensions,
+        model.loss.leafValueFun(model.learningRate),
+        None
+        )
+
+    return RegressionModel.RegressionModel(
+        model.additiveRegressionTree + tree,
+        model.X,
+        model.XDimensions,
+        model.yAsSeries,
+        model.loss,
+        model.regressionTreeBuilder,
+        model.learningRate,
+        model.binnedFeatures
+        ), predictions
+
+
 def generateClassificationData(mbOfData, nColumns):
     nRows = mbOfData * 1024 * 1024 / 8 / (nColumns + 1)
     nRows = int(nRows)
@@ -230,3 +262,48 @@ class GradientBoostingTests(object):
             [elt for elt in self.evaluateWithExecutor(f)],
             [elt for elt in y.iloc[:,0]]
             )
+
+    def test_gradient_boosting_regression_binned_matches_unbinned(self):
+        def f():
+            x, y = generateRegressionData(0.5, 10)
+
+            fitter = GradientBoostedRegressorBuilder(3, 5, 1.0).iterativeFitter(x, y)
+
+            unbinnedModel = fitter.model
+            unbinnedPredictions = None
+            for _ in xrange(5):
+                fitter = fitter.next()
+                unbinnedModel, unbinnedPredictions = \
+                    boostWithoutBinning(unbinnedModel, unbinnedPredictions)
+
+            return fitter.model.score(x, y), unbinnedModel.score(x, y)
+
+        binnedScore, unbinnedScore = self.evaluateWithExecutor(f)
+
+        self.assertTrue(
+            abs(binnedScore - unbinnedScore) < 0.01,
+            (binnedScore, unbinnedScore)
+            )
+
+    def test_gradient_boosting_regression_binned_round_timing(self):
+        def f(useBinning, nBoosts):
+            x, y = generateRegressionData(20, 20)
+
+            fitter = GradientBoostedRegressorBuilder(3, nBoosts, 1.0).iterativeFitter(x, y)
+
+            model = fitter.model
+            predictions = None
+            for _ in xrange(nBoosts):
+                if useBinning:
+                    fitter = fitter.next()
+                else:
+                    model, predictions = boostWithoutBinning(model, predictions)
+
+            return True
+
+        self.evaluateWithExecutor(f, True, 1)
+
+        for useBinning, name in [(True, "binned"), (False, "unbinned")]:
+            with PerformanceTestReporter.RecordAsPerfTest(
+                    "pyfora.gradient_boosting.regression_20mb_5_rounds." + name):
+                self.evaluateWithExecutor(f, useBinning, 5)
@@ -584,3 +584,27 @@ class InMemoryExecutorTestCases(ExecutorTestCases.ExecutorTestCases):
             worker_count = executor.getWorkerCount()
             self.assertEqual(worker_count, 1)
 
+
+
+    def test_profiling_attributes_samples_to_source_lines(self):
+        def f(ct):
+            res = 0
+            for x in xrange(ct):
+                res = res + x * x
+            return res
+
+        with self.create_executor() as executor:
+            executor.startProfiling(0.001)
+
+            future = executor.submit(f, 100000000)
+            future.result()
+
+            profile = future.profile().result()
+
+            executor.stopProfiling()
+
+        self.assertGreater(profile['totalSamples'], 0)
+        self.assertEqual(sum(profile['stacks'].values()), profile['totalSamples'])
+
+        #at least one sample should have landed inside 'f' rather than in builtins
+        self.assertTrue(any(';' in stack for stack in profile['stacks']))
@@ -455,6 +455,100 @@ A,B,C
 
         self.equivalentEvaluationTest(f)
 
+    def test_pandas_dataframe_groupby_agg_matches_pandas(self):
+        random.seed(42)
+
+        for keyCount in [1, 7, 100]:
+            rowCount = 1000
+            df = pandas.DataFrame({
+                'k': [random.randint(0, keyCount - 1) for _ in range(rowCount)],
+                'a': [random.randint(-100, 100) for _ in range(rowCount)],
+                'b': [random.random() for _ in range(rowCount)],
+                'c': [random.uniform(-1.0, 1.0) for _ in range(rowCount)]
+                })
+            aggs = {'a': 'sum', 'b': 'mean', 'c': 'max'}
+
+            def f():
+                return df.groupby('k').agg(aggs)
+
+            expected = df.groupby('k').agg(aggs).reset_index()
+            result = self.evaluateWithExecutor(f)
+
+            self.assertEqual(len(result), len(expected))
+            for name in expected.columns:
+                self.assertTrue(numpy.allclose(result[name], expected[name]), name)
+
+    def test_pandas_dataframe_groupby_agg_lists(self):
+        df = pandas.DataFrame({
+            'k': ['b', 'a', 'b', 'c', 'a', 'b'],
+            'v': [1, 2, 3, 4, 5, 6]
+            })
+
+        def f():
+            result = df.groupby('k').agg({'v': ['sum', 'count', 'mean', 'min', 'max']})
+            return (
+                list(result['k']),
+                list(result[('v', 'sum')]),
+                list(result[('v', 'count')]),
+                list(result[('v', 'mean')]),
+                list(result[('v', 'min')]),
+                list(result[('v', 'max')])
+                )
+
+        self.assertEqual(
+            self.evaluateWithExecutor(f),
+            (['a', 'b', 'c'], [7, 10, 4], [2, 3, 1], [3.5, 10.0 / 3, 4.0], [2, 1, 4], [5, 6, 4])
+            )
+
+    def checkMergeMatchesPandas(self, left, right, how, broadcastLimit):
+        def f():
+            return left.merge(right, on='k', how=how, _broadcastLimit=broadcastLimit)
+
+        expected = pandas.merge(left, right, on='k', how=how)
+        result = self.evaluateWithExecutor(f)[list(expected.columns)]
+
+        sortColumns = list(expected.columns)
+        pandas.util.testing.assert_frame_equal(
+            result.sort_values(sortColumns).reset_index(drop=True),
+            expected.sort_values(sortColumns).reset_index(drop=True),
+            check_dtype=False
+            )
+
+    def test_pandas_dataframe_merge_matches_pandas(self):
+        random.seed(42)
+
+        #a single key puts every row in one hot bucket
+        for keyCount in [1, 3, 50, 1000]:
+            left = pandas.DataFrame({
+                'k': [random.randint(0, keyCount - 1) for _ in range(400)],
+                'a': [random.random() for _ in range(400)],
+                'b': [random.randint(0, 10) for _ in range(400)]
+                })
+            right = pandas.DataFrame({
+                'k': [random.randint(0, keyCount) for _ in range(100)],
+                'b': [random.random() for _ in range(100)],
+                'c': [random.random() for _ in range(100)]
+                })
+
+            for how in ['inner', 'left']:
+                #a large limit forces the broadcast join, and zero forces the partitioned one
+                for broadcastLimit in [1000000, 0]:
+                    self.checkMergeMatchesPandas(left, right, how, broadcastLimit)
+                    self.checkMergeMatchesPandas(right, left, how, broadcastLimit)
+
+        #string keys are partitioned by the hash of their contents
+        left = pandas.DataFrame({
+            'k': ['key_%s' % random.randint(0, 49) for _ in range(400)],
+            'a': [random.random() for _ in range(400)]
+            })
+        right = pandas.DataFrame({
+            'k': ['key_%s' % random.randint(0, 50) for _ in range(100)],
+            'c': [random.random() for _ in range(100)]
+            })
+
+        for how in ['inner', 'left']:
+            self.checkMergeMatchesPandas(left, right, how, 0)
+
     def test_pandas_dataframe_dot_2(self):
         ncol = 4
         nrow = 32
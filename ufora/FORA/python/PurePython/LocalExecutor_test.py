@@ -40,8 +40,10 @@ import ufora.FORA.python.PurePython.StringTestCases as StringTestCases
 import ufora.FORA.python.PurePython.ClassTestCases as ClassTestCases
 import ufora.FORA.python.PurePython.TupleTestCases as TupleTestCases
 import ufora.FORA.python.PurePython.RandomTestCases as RandomTestCases
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
 
 
+import pandas
 import unittest
 
 
@@ -92,4 +94,70 @@ class TestLocalExecutor(
 
         return cls.executor
 
+    def test_pandas_groupby_agg_scales_with_cores(self):
+        rowCount = 2000000
+        df = pandas.DataFrame({
+            'k': [ix % 10 for ix in range(rowCount)],
+            'v': range(rowCount)
+            })
+
+        def f():
+            return df.groupby('k').agg({'v': 'sum'})
+
+        for threadCount in [1, 2, 4]:
+            executor = InMemorySimulationExecutorFactory.create_executor(
+                threadsPerWorker=threadCount
+                )
+            try:
+                #push the data into the executor before timing anything
+                self.evaluateWithExecutor(lambda: len(df), executor=executor)
+
+                with PerformanceTestReporter.RecordAsPerfTest(
+                        "pyfora.pandas.groupby_agg_sum_2mm.%s_threads" % threadCount):
+                    result = self.evaluateWithExecutor(f, executor=executor)
+            finally:
+                executor.close()
+
+            self.assertEqual(list(result['v']), [sum(range(k, rowCount, 10)) for k in range(10)])
+
+    def test_pandas_merge_strategies_timing(self):
+        rowCount = 1000000
+        left = pandas.DataFrame({
+            'k': [(ix * 7919) % rowCount for ix in range(rowCount)],
+            'a': range(rowCount)
+            })
+        right = pandas.DataFrame({
+            'k': range(0, rowCount, 2),
+            'b': range(rowCount / 2)
+            })
+
+        def merge(broadcastLimit):
+            return len(left.merge(right, on='k', _broadcastLimit=broadcastLimit))
+
+        for strategy, broadcastLimit in [('broadcast', rowCount), ('partitioned', 100000)]:
+            with PerformanceTestReporter.RecordAsPerfTest(
+                    "pyfora.pandas.merge_1mm.%s" % strategy):
+                self.assertEqual(self.evaluateWithExecutor(merge, broadcastLimit), rowCount / 2)
+
+    def test_sorted_strategies_by_size(self):
+        # each strategy can be forced by moving the cutoffs around it
+        strategies = [
+            ('single', 10 ** 8, 10 ** 8),
+            ('merge', 0, 10 ** 8),
+            ('distributed', 0, 0)
+            ]
+
+        def f(size, mergeCutoff, uforaCutoff):
+            xs = [((ix * 7919) % size) * 0.5 for ix in xrange(size)]
+            res = sorted(xs, _ufora_cutoff=uforaCutoff, _merge_cutoff=mergeCutoff)
+            return len(res)
+
+        for size in [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]:
+            for name, mergeCutoff, uforaCutoff in strategies:
+                with PerformanceTestReporter.RecordAsPerfTest(
+                        "pyfora.sorted.%s.%s" % (size, name)):
+                    self.assertEqual(
+                        self.evaluateWithExecutor(f, size, mergeCutoff, uforaCutoff),
+                        size
+                        )
 
@@ -14,7 +14,9 @@
 
 import pyfora.algorithms.regressionTrees.Base as regressionTreeBase
 import pyfora.algorithms.regressionTrees.RegressionTree as RegressionTree
+import pyfora.algorithms.regressionTrees.AdditiveRegressionTree as AdditiveRegressionTree
 import pyfora.pure_modules.pure_pandas as PurePandas
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
 
 
 import numpy
@@ -34,6 +36,26 @@ def generateData(mbOfData, nColumns):
     return predictors, responses
 
 
+def syntheticTree(seed, nColumns, depth):
+    # a complete tree of the given depth, with splits and values derived from `seed`
+    if depth == 0:
+        return [RegressionTree.RegressionLeafRule(float(seed % 7) - 3.0)]
+
+    left = syntheticTree(seed * 3 + 1, nColumns, depth - 1)
+    right = syntheticTree(seed * 5 + 2, nColumns, depth - 1)
+
+    rule = regressionTreeBase.Rule(seed % nColumns, float(seed % 11) / 2.0, 0.0, 0)
+
+    return [regressionTreeBase.SplitRule(rule, 1, 1 + len(left), 0.0)] + left + right
+
+
+def syntheticAdditiveTree(nTrees, nColumns, depth):
+    return AdditiveRegressionTree.AdditiveRegressionTree(
+        [RegressionTree.RegressionTree(syntheticTree(ix, nColumns, depth))
+         for ix in xrange(nTrees)]
+        )
+
+
 class RegressionTreeTests(object):
     def test_SampleSummary_1(self):
         def f():
@@ -144,3 +166,38 @@ class RegressionTreeTests(object):
         self.assertEqual(rule_0.jumpIfHigher, 16)
         self.assertTrue(numpy.isclose(rule_0.leafValue, 4.9992446496))
 
+    def test_AdditiveRegressionTree_predict_matches_rowwise(self):
+        def f():
+            x, _ = generateData(0.1, 10)
+            model = syntheticAdditiveTree(20, x.shape[1], 3)
+
+            predictions = model.predict(x, _splitLimit=1000)
+            rowwise = [model._predictionFunction(x.iloc[ix]) for ix in xrange(len(x))]
+
+            assert len(predictions) == len(rowwise)
+            for ix in xrange(len(rowwise)):
+                assert predictions[ix] == rowwise[ix]
+
+            partial = model.predict(x, 5)
+            for ix in xrange(len(rowwise)):
+                assert partial[ix] == model._predictionFunction(x.iloc[ix], 5)
+
+            return True
+
+        self.assertTrue(self.evaluateWithExecutor(f))
+
+    def test_AdditiveRegressionTree_predict_timing(self):
+        def f(rowwise):
+            x, _ = generateData(88, 10)
+            model = syntheticAdditiveTree(500, x.shape[1], 3)
+
+            if rowwise:
+                return len(x.apply(lambda row: model._predictionFunction(row), 1))
+
+            return len(model.predict(x))
+
+        #2**20 rows, 500 trees
+        for rowwise, name in [(True, "rowwise"), (False, "flat")]:
+            with PerformanceTestReporter.RecordAsPerfTest(
+                    "pyfora.regression_trees.predict_1mm_rows_500_trees." + name):
+                self.assertEqual(self.evaluateWithExecutor(f, rowwise), 1024 * 1024)
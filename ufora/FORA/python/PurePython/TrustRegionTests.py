@@ -119,3 +119,40 @@ class TrustRegionTests(object):
             res.weights,
             [-2.42814882,  2.69715838]
             )
+
+    def test_trust_region_split_matches_unsplit(self):
+        X = pandas.DataFrame(
+            [[-0.25091976,  0.90142861],
+             [ 0.46398788,  0.19731697],
+             [-0.68796272, -0.68801096],
+             [-0.88383278,  0.73235229],
+             [ 0.20223002,  0.41614516],
+             [-0.95883101,  0.9398197 ],
+             [ 0.66488528, -0.57532178],
+             [-0.63635007, -0.63319098],
+             [-0.39151551,  0.04951286],
+             [-0.13610996, -0.41754172]]
+            )
+        y = pandas.Series([1, -1, -1, 1, 1, 1, -1, 1, 1, -1])
+
+        C = 1.0 / len(X) / 0.01
+
+        def f(splitLimit):
+            return TrustRegionConjugateGradientSolver(
+                X, y, 1, C, splitLimit=splitLimit).solve()
+
+        unsplit = self.evaluateWithExecutor(f, 1000000)
+        split = self.evaluateWithExecutor(f, 3)
+
+        numpy.testing.assert_allclose(split.weights, unsplit.weights)
+        numpy.testing.assert_allclose(
+            unsplit.weights,
+            [-2.42814882,  2.69715838]
+            )
+
+        # three passes to start (the gradient norm at zero, X.w, and the
+        # gradient), then one per Hessian-vector product and one or two per
+        # step
+        self.assertEqual(unsplit.iterations, 4)
+        self.assertEqual(unsplit.dataPasses, 21)
+        self.assertEqual(split.dataPasses, 21)
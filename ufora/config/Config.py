@@ -168,6 +168,10 @@ class Config(object):
             self.getConfigValue("COMPUTED_VALUE_GATEWAY_RAM_MB", 400)
             )
 
+        self.computedValueGatewayMaxFinishedResults = int(
+            self.getConfigValue("COMPUTED_VALUE_GATEWAY_MAX_FINISHED_RESULTS", 10000)
+            )
+
         self.cumulusDiskCacheStorageMB = int(self.getConfigValue("CUMULUS_DISK_STORAGE_MB", 50000))
         self.cumulusDiskCacheStorageFileCount = int(
             self.getConfigValue("CUMULUS_DISK_STORAGE_FILE_COUNT", 10000)
@@ -179,6 +183,21 @@ class Config(object):
             self.getConfigValue("CUMULUS_CHECKPOINT_COMMIT_INTERVAL_SEC", 0)
             )
 
+        #if nonzero, commit checkpoints adaptively: whenever the compute we'd expect to lose to
+        #a machine failure with this probability exceeds the expected cost of checkpointing.
+        #CUMULUS_CHECKPOINT_COMMIT_INTERVAL_SEC then bounds the time between checkpoints.
+        self.cumulusCheckpointMachineFailureProbability = float(
+            self.getConfigValue("CUMULUS_CHECKPOINT_MACHINE_FAILURE_PROBABILITY", 0.0)
+            )
+
+        self.cumulusCheckpointInitialBytesPerSecond = float(
+            self.getConfigValue("CUMULUS_CHECKPOINT_INITIAL_BYTES_PER_SECOND", 50 * 1024 * 1024)
+            )
+
+        self.cumulusIncrementalCheckpointsBetweenFullCheckpoints = int(
+            self.getConfigValue("CUMULUS_INCREMENTAL_CHECKPOINTS_BETWEEN_FULL_CHECKPOINTS", 8)
+            )
+
         self.cumulusDiskCacheStorageSubdirectory = self.getConfigValue("CUMULUS_DISK_STORAGE_SUBDIR", None, checkEnviron=True)
 
         self.maxPageSizeInBytes = long(
@@ -314,6 +333,10 @@ class Config(object):
             self.getConfigValue("SHARED_STATE_LOG_PRUNE_INTERVAL_SEC", 60 * 60)
             )
 
+        self.sharedStateShardCount = int(
+            self.getConfigValue("SHARED_STATE_SHARD_COUNT", 4)
+            )
+
         self.sharedStateCache = expandConfigPath(
             self.getConfigValue("SHARED_STATE_CACHE_DIR",
                                 os.path.join(self.rootDataDir, "ss_cache")))
@@ -166,6 +166,27 @@ public:
 			return message.priority();
 			}
 
+		static uint32_t getWorkerToWorkerMessageLane(CumulusWorkerToWorkerMessage message)
+			{
+			return message.lane();
+			}
+
+		//control traffic goes on the channel the receiver never holds back. Computation state
+		//and bulk page data share the second channel, but bulk data only gets one turn for every
+		//four computation-state messages and sixteen control messages. MultiChannel stamps ordinals
+		//as messages leave their lane, so the receiver delivers the shared channel in send order
+		//rather than holding computation state behind bulk pages queued before it.
+		static std::vector<MultiChannelLane> workerToWorkerLanes()
+			{
+			std::vector<MultiChannelLane> lanes;
+
+			lanes.push_back(MultiChannelLane("control", 0, 16));
+			lanes.push_back(MultiChannelLane("computation_state", 1, 4));
+			lanes.push_back(MultiChannelLane("bulk_data", 1, 1));
+
+			return lanes;
+			}
+
 
 		static void addMachine(
 				PolymorphicSharedPtr<CumulusWorker> worker,
@@ -182,6 +203,11 @@ public:
 			PolymorphicSharedPtr<CallbackScheduler> subScheduler =
 				inCallbackScheduler->getFactory()->createScheduler("SocketConnectionTo_" + prettyPrintString(machine));
 
+			//outgoing messages are serialized on their own thread so that writers never block
+			//behind a large page being flattened
+			PolymorphicSharedPtr<CallbackScheduler> writeScheduler =
+				inCallbackScheduler->getFactory()->createScheduler("SocketWritesTo_" + prettyPrintString(machine));
+
 			for (int i = 0, len = boost::python::len(channels); i < len; i++)
 				{
 				string_channel_ptr stringChannel =
@@ -214,8 +240,10 @@ public:
 			worker_to_worker_multi_channel_type::pointer_type multiChannel(
 					new worker_to_worker_multi_channel_type(
 						serializedChannels2,
-						&CumulusWorkerWrapper::getMessagePriority<CumulusWorkerToWorkerMessage>,
-						subScheduler
+						workerToWorkerLanes(),
+						&CumulusWorkerWrapper::getWorkerToWorkerMessageLane,
+						subScheduler,
+						writeScheduler
 						)
 					);
 
@@ -388,6 +416,11 @@ public:
 							CumulusWorker::currentlyActiveWorkerThreads
 							)
 						)
+				.def("totalBytesSentByDistributedDataTasks",
+						macro_polymorphicSharedPtrFuncFromMemberFunc(
+							CumulusWorker::totalBytesSentByDistributedDataTasks
+							)
+						)
 				.def("getLocalScheduler",
 						macro_polymorphicSharedPtrFuncFromMemberFunc(
 							CumulusWorker::getLocalScheduler
@@ -22,7 +22,7 @@
 #include "../core/containers/ImmutableTreeVector.py.hpp"
 #include "SystemwideComputationScheduler/LocalSchedulerSimulator.hppml"
 #include "CumulusWorkerEventSimulator.hppml"
-#include "../core/serialization/IFileProtocol.hpp"
+#include "CumulusWorkerEventHandler/CompressedEventLog.hppml"
 
 using namespace Cumulus;
 
@@ -53,41 +53,23 @@ public:
 
 		static void replayCumulusWorkerEventStreamFromFile(std::string filename, bool validateResponses)
 			{
+			//the simulator feeds every event into the scheduler kernels, so a missing event
+			//would just show up as a bogus validation failure partway through
+			if (CumulusWorkerEventHandler::cumulusWorkerEventLogMayBeMissingEvents(filename))
+				throw std::logic_error(
+					"Can't replay " + filename + ": it was written with dropLowValueEvents "
+					"enabled, so it may be missing events. Rerun with a lossless event log."
+					);
+
 			PolymorphicSharedPtr<CumulusWorkerEventSimulator> sim(
 				new CumulusWorkerEventSimulator(validateResponses)
 				);
 
-			FILE* f = fopen(filename.c_str(),"rb");
-
-			lassert_dump(f, "couldn't open " << filename);
-
-			IFileProtocol protocol(f);
-
-			IBinaryStream stream(protocol);
-
-			SerializedObjectInflater inflater;
-
-			SerializedObjectInflaterDeserializer deserializer(
-				inflater,
-				stream,
-				PolymorphicSharedPtr<VectorDataMemoryManager>()
+			CumulusWorkerEventHandler::readCumulusWorkerEventLog(
+				filename,
+				boost::bind(&CumulusWorkerEventSimulator::handleEvent, sim.get(), _1)
 				);
 
-			while (true)
-				{
-				Cumulus::CumulusWorkerEvent event;
-
-				try {
-					deserializer.deserialize(event);
-					}
-				catch(...)
-					{
-					break;
-					}
-
-				sim->handleEvent(event);
-				}
-
 			lassert(sim->finishedSuccessfully());
 			}
 
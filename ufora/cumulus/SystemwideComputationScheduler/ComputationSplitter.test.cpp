@@ -0,0 +1,364 @@
+/***************************************************************************
+   Copyright 2015 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#include "ComputationSplitter.hppml"
+#include "LocalSchedulerImplKernel.hppml"
+#include "../ComputationToSchedulerMessage.hppml"
+#include "../CumulusComponentMessageCreated.hppml"
+#include "../InitiateComputationMove.hppml"
+#include "../LocalComputationPriorityAndStatusChanged.hppml"
+#include "../../core/Logging.hpp"
+#include "../../core/math/Random.hpp"
+#include "../../core/UnitTest.hpp"
+
+using namespace Cumulus;
+
+namespace {
+
+ComputationId idForInt(int i)
+	{
+	return ComputationId::CreateIdForTesting(hash_type(i));
+	}
+
+/************
+SplitSimulation
+
+Drives a LocalSchedulerImplKernel with a synthetic machine's worth of computations
+and measures how well its choice of what to split keeps the cores busy.
+
+The lowest-numbered 'kCores' computations are the ones running. A third of the
+initial computations are long and come from a location where splits usually
+succeed. The rest are short and come from a location where splits usually fail.
+Each computation's prediction signature is its location and its size, so the
+kernel's RuntimePredictionModel learns runtimes as computations finish.
+
+Split requests the kernel sends take 'kSplitLatencyTicks' to come back. A
+successful split hands half the computation's remaining work to a new computation.
+
+With 'rankSplitCandidates' false, the kernel splits the first untried computation
+in priority order, which is what it did before ComputationSplitter existed.
+************/
+
+const long kCores = 8;
+const long kSplitLatencyTicks = 10;
+const double kTick = .01;
+
+MachineId ownMachine()
+	{
+	return MachineId(hash_type(1));
+	}
+
+class SplitSimulation {
+public:
+	SplitSimulation(uint32_t seed, bool rankSplitCandidates) :
+			mRandom(seed),
+			mKernel(
+				1024 * 1024,
+				1024 * 1024 * 1024,
+				ownMachine(),
+				kCores,
+				boost::function1<void, InitiateComputationMove>(
+					[](InitiateComputationMove move) {}
+					),
+				boost::function1<void, CumulusComponentMessageCreated>(
+					[this](CumulusComponentMessageCreated msg) { messageCreated(msg); }
+					)
+				),
+			mCurTime(0),
+			mNextId(0),
+			mIdleCoreSeconds(0),
+			mWastedSplits(0)
+		{
+		mKernel.mRankSplitCandidates = rankSplitCandidates;
+
+		for (long k = 0; k < 12; k++)
+			if (k % 3 == 0)
+				addComputation(kGoodLocation, 4 + 6 * mRandom());
+			else
+				addComputation(kBadLocation, .5 + 2.5 * mRandom());
+		}
+
+	void run()
+		{
+		while (mComputations.size())
+			{
+			step();
+			mKernel.splitOrMoveIfNeeded(mCurTime);
+			}
+		}
+
+	double idleCoreSeconds() const
+		{
+		return mIdleCoreSeconds;
+		}
+
+	long wastedSplits() const
+		{
+		return mWastedSplits;
+		}
+
+private:
+	enum { kGoodLocation = 1, kBadLocation = 2 };
+
+	class Computation {
+	public:
+		long location;
+		double remaining;
+		double elapsed;
+		uint64_t splits;
+		RuntimePredictionSignature signature;
+	};
+
+	long addComputation(long location, double work)
+		{
+		Computation c;
+		c.location = location;
+		c.remaining = work;
+		c.elapsed = 0;
+		c.splits = 0;
+		c.signature = RuntimePredictionSignature::Root(
+			RuntimePredictionValue::Tuple(
+				emptyTreeVec() +
+					RuntimePredictionValue::Leaf(hash_type(location)) +
+					RuntimePredictionValue::Integer((uint64_t)(work * 1000))
+				)
+			);
+
+		long id = mNextId++;
+
+		mComputations[id] = c;
+		mIds[idForInt(id)] = id;
+
+		sendStatus(id, ComputationStatus::ComputableWithSubcomputations(emptyTreeSet()));
+
+		return id;
+		}
+
+	void sendStatus(long id, ComputationStatus status)
+		{
+		const Computation& c = mComputations[id];
+
+		ComputationStatistics stats;
+		stats.initialPredictionSignature() = null() << c.signature;
+		stats.timeElapsed().timeSpentInCompiledCode() = c.elapsed;
+		stats.totalSplitCount() = c.splits;
+
+		mKernel.computationStatusChanged(
+			LocalComputationPriorityAndStatusChanged::Active(
+				idForInt(id),
+				ComputationPriority((uint64_t)1),
+				status,
+				stats
+				),
+			mCurTime
+			);
+		}
+
+	void finish(long id)
+		{
+		sendStatus(id, ComputationStatus::Finished());
+
+		mKernel.computationStatusChanged(
+			LocalComputationPriorityAndStatusChanged::Inactive(idForInt(id)),
+			mCurTime
+			);
+
+		mComputations.erase(id);
+		mPending.erase(id);
+		}
+
+	void messageCreated(CumulusComponentMessageCreated msg)
+		{
+		if (!msg.message().isSchedulerToComputation())
+			return;
+
+		SchedulerToComputationMessage toComputation =
+			msg.message().getSchedulerToComputation().message();
+
+		if (toComputation.isSplit() && toComputation.guid() == hash_type())
+			mPending[mIds[toComputation.computation()]] = kSplitLatencyTicks;
+		}
+
+	void step()
+		{
+		mCurTime += kTick;
+
+		//the lowest ids run, the rest wait for a core
+		std::vector<long> running;
+		for (auto& idAndComp: mComputations)
+			if (running.size() < kCores)
+				running.push_back(idAndComp.first);
+
+		mIdleCoreSeconds += (kCores - running.size()) * kTick;
+
+		for (long id: running)
+			{
+			Computation& c = mComputations[id];
+			c.remaining -= kTick;
+			c.elapsed += kTick;
+
+			if (c.remaining <= 0)
+				finish(id);
+			}
+
+		std::vector<long> resolved;
+		for (auto& idAndTicks: mPending)
+			if (--idAndTicks.second <= 0)
+				resolved.push_back(idAndTicks.first);
+
+		for (long id: resolved)
+			{
+			mPending.erase(id);
+
+			Computation& c = mComputations[id];
+
+			double successRate = c.location == kGoodLocation ? .9 : .1;
+
+			if (c.remaining > 2 * kTick && mRandom() < successRate)
+				{
+				double half = c.remaining / 2;
+				c.remaining -= half;
+				c.splits++;
+				addComputation(c.location, half);
+				}
+			else
+				mWastedSplits++;
+
+			mKernel.handleComputationToSchedulerMessage(
+				ComputationToSchedulerMessage::OK(idForInt(id), hash_type(), ownMachine()),
+				mCurTime
+				);
+			}
+
+		for (auto& idAndComp: mComputations)
+			sendStatus(
+				idAndComp.first,
+				ComputationStatus::ComputableWithSubcomputations(emptyTreeSet())
+				);
+		}
+
+	Ufora::math::Random::Uniform<double> mRandom;
+
+	SystemwideComputationScheduler::LocalSchedulerImplKernel mKernel;
+
+	double mCurTime;
+
+	std::map<long, Computation> mComputations;
+
+	std::map<ComputationId, long> mIds;
+
+	std::map<long, long> mPending;
+
+	long mNextId;
+
+	double mIdleCoreSeconds;
+
+	long mWastedSplits;
+};
+
+}
+
+BOOST_AUTO_TEST_CASE( test_ComputationSplitter_learns_split_success_rates )
+	{
+	ComputationSplitter splitter;
+
+	ComputationId good = idForInt(1);
+	ComputationId bad = idForInt(2);
+
+	for (long pass = 0; pass < 10; pass++)
+		{
+		splitter.observe(good, null() << hash_type(1), 1.0, pass, null());
+		splitter.observe(bad, null() << hash_type(2), 1.0, 0, null());
+
+		splitter.splitAttempted(good);
+		splitter.splitAttempted(bad);
+
+		splitter.splitResponseReceived(good);
+		splitter.splitResponseReceived(bad);
+
+		splitter.observe(good, null() << hash_type(1), 1.0, pass + 1, null());
+		splitter.observe(bad, null() << hash_type(2), 1.0, 0, null());
+		}
+
+	BOOST_CHECK_EQUAL(splitter.successfulSplits(), 10);
+	BOOST_CHECK_EQUAL(splitter.failedSplits(), 10);
+
+	BOOST_CHECK(splitter.splitSuccessRate(hash_type(1)) > .9);
+	BOOST_CHECK(splitter.splitSuccessRate(hash_type(2)) < .1);
+
+	std::vector<ComputationId> candidates;
+	candidates.push_back(bad);
+	candidates.push_back(good);
+
+	BOOST_CHECK(*splitter.pickComputationToSplit(candidates) == good);
+
+	BOOST_CHECK(
+		splitter.minTimeToComputeBeforeSplitting(bad) >
+			splitter.minTimeToComputeBeforeSplitting(good)
+		);
+	}
+
+BOOST_AUTO_TEST_CASE( test_ComputationSplitter_prefers_more_remaining_work )
+	{
+	ComputationSplitter splitter;
+
+	//predicted to finish almost immediately
+	splitter.observe(idForInt(1), null() << hash_type(1), 5.0, 0, null() << 5.1);
+
+	//predicted to have lots left
+	splitter.observe(idForInt(2), null() << hash_type(1), 1.0, 0, null() << 10.0);
+
+	//no prediction, so we assume it has as much left as it's done
+	splitter.observe(idForInt(3), null() << hash_type(1), 3.0, 0, null());
+
+	BOOST_CHECK_CLOSE(splitter.expectedRemainingRuntime(idForInt(1)), .1, 1e-6);
+	BOOST_CHECK_CLOSE(splitter.expectedRemainingRuntime(idForInt(3)), 3.0, 1e-6);
+
+	std::vector<ComputationId> candidates;
+	candidates.push_back(idForInt(1));
+	candidates.push_back(idForInt(3));
+	candidates.push_back(idForInt(2));
+
+	BOOST_CHECK(*splitter.pickComputationToSplit(candidates) == idForInt(2));
+	}
+
+BOOST_AUTO_TEST_CASE( test_ComputationSplitter_simulation )
+	{
+	double baselineIdle = 0, splitterIdle = 0;
+	long baselineWasted = 0, splitterWasted = 0;
+
+	for (uint32_t seed = 1; seed <= 50; seed++)
+		{
+		SplitSimulation baseline(seed, false);
+		baseline.run();
+
+		SplitSimulation withSplitter(seed, true);
+		withSplitter.run();
+
+		baselineIdle += baseline.idleCoreSeconds();
+		baselineWasted += baseline.wastedSplits();
+		splitterIdle += withSplitter.idleCoreSeconds();
+		splitterWasted += withSplitter.wastedSplits();
+		}
+
+	LOG_INFO << "Split simulation over 50 runs. Priority order: "
+		<< baselineIdle << " idle core-seconds, " << baselineWasted << " wasted split attempts. "
+		<< "ComputationSplitter: "
+		<< splitterIdle << " idle core-seconds, " << splitterWasted << " wasted split attempts.";
+
+	BOOST_CHECK(splitterWasted < baselineWasted);
+	BOOST_CHECK(splitterIdle < baselineIdle);
+	}
+
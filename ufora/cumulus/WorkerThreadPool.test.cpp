@@ -728,6 +728,64 @@ BOOST_AUTO_TEST_CASE( test_execute_lots_of_computations )
     pool->teardown();
     }
 
+BOOST_AUTO_TEST_CASE( test_idle_thread_steals_split_children )
+    {
+    MockActiveComputations::ptr_type activeComputations(new MockActiveComputations());
+
+    WorkerThreadPoolImpl<MockComputationState::ptr_type> pool(
+            0,
+            boost::bind(&MockActiveComputations::checkoutComputation, activeComputations, _1),
+            null_checkin,
+            MachineId()
+            );
+
+    pool.startComputations();
+
+    LocalComputationPriorityAndStatusChanged scheduled = create_computation(1UL);
+
+    std::vector<ComputationId> children;
+    for (long k = 0; k < 3; k++)
+        children.push_back(create_computation(2UL).computation());
+
+    //one of the children is already known to the scheduler and another is already computing
+    pool.onComputationStatusChanged(scheduled);
+    children.push_back(scheduled.computation());
+
+    pool.addStealableSplitChildren(children, ComputationPriority(2UL));
+
+    //computations the scheduler told us about still come first
+    thread_pool_type::InProgressComputationPtr first = pool.waitForInProgressComputation();
+
+    BOOST_REQUIRE(first);
+    BOOST_CHECK(first->getComputable().computationId() == scheduled.computation());
+
+    //with nothing computable, idle threads take children in the order they were split off
+    for (long k = 0; k < 3; k++)
+        {
+        thread_pool_type::InProgressComputationPtr stolen = pool.waitForInProgressComputation();
+
+        BOOST_REQUIRE(stolen);
+        BOOST_CHECK(stolen->getComputable().computationId() == children[k]);
+        BOOST_CHECK_EQUAL_CPPML(stolen->getComputable().priority(), ComputationPriority(2UL));
+        }
+
+    //the child that's already computing is skipped
+    BOOST_CHECK(!pool.stealSplitChild_());
+
+    BOOST_CHECK_EQUAL(pool.splitChildrenStolen(), 3);
+    BOOST_CHECK_EQUAL(pool.mStealableSplitChildren.size(), 0);
+
+    //children of computations with no priority are never stolen
+    pool.addStealableSplitChildren(
+        std::vector<ComputationId>(1, create_computation(2UL).computation()),
+        ComputationPriority()
+        );
+
+    BOOST_CHECK(!pool.stealSplitChild_());
+
+    pool.teardown();
+    }
+
 BOOST_AUTO_TEST_CASE( test_verify_status_changes_during_checkin_work )
     {
     //verify that if we fire a state change off during the checkin function that
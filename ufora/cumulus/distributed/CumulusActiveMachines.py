@@ -300,6 +300,11 @@ class CumulusActiveMachines(Stoppable.Stoppable):
                 logging.debug("Created SharedState view with client id %s",
                               str(self.clientID))
 
+            #we build a new view, and hence get a new client id, rather than resuming the old
+            #one with ViewFactory.reconnectView. Other workers key our registration by client
+            #id, and treat its 'disconnected' client info entry as this worker dropping.
+            #Resuming under the same id would hide that drop, and the reconnect handling in
+            #our listeners depends on seeing it.
             if self.asyncView is not None:
                 self.asyncView.stopService()
 
@@ -182,6 +182,9 @@ class CumulusGateway(Stoppable.Stoppable):
         if isinstance(msg, CumulusNative.ComputationResult):
             self.onComputationResult(msg.computation, msg.deserializedResult(self.vdm), msg.statistics)
 
+        elif isinstance(msg, tuple) and len(msg) == 3 and msg[0] == "ComputationProfile":
+            self.onComputationProfile(msg[1], msg[2])
+
         elif isinstance(msg, tuple):
             self.onCheckpointStatus(msg[0], msg[1])
 
@@ -203,6 +206,15 @@ class CumulusGateway(Stoppable.Stoppable):
     def requestCheckpointStatusAndReturnGuid(self):
         return self.cumulusClient.requestCheckpointStatus()
 
+    def startProfiling(self, sampleIntervalSeconds):
+        self.cumulusClient.startProfiling(sampleIntervalSeconds)
+
+    def stopProfiling(self):
+        self.cumulusClient.stopProfiling()
+
+    def requestComputationProfileAndReturnGuid(self, computationId):
+        return self.cumulusClient.requestComputationProfile(computationId)
+
     def onNewGlobalUserFacingLogMessage(self, msg):
         pass
 
@@ -215,6 +227,9 @@ class CumulusGateway(Stoppable.Stoppable):
     def onCheckpointStatus(self, requestGuid, checkpointStatusJson):
         pass
 
+    def onComputationProfile(self, requestGuid, profileJson):
+        pass
+
     def onCPUCountChanged(self, computationSystemwideCpuAssignment):
         pass
 
@@ -143,10 +143,19 @@ class CumulusService(Stoppable.Stoppable):
         checkpointInterval = config.cumulusCheckpointIntervalSeconds
         if checkpointInterval == 0:
             checkpointPolicy = CumulusNative.CumulusCheckpointPolicy.None()
+        elif config.cumulusCheckpointMachineFailureProbability > 0:
+            checkpointPolicy = CumulusNative.CumulusCheckpointPolicy.Adaptive(
+                config.cumulusCheckpointMachineFailureProbability,
+                config.cumulusCheckpointInitialBytesPerSecond,
+                min(60.0, checkpointInterval),
+                checkpointInterval,
+                config.cumulusIncrementalCheckpointsBetweenFullCheckpoints
+                )
         else:
             checkpointPolicy = CumulusNative.CumulusCheckpointPolicy.Periodic(
                 checkpointInterval,
-                1024 * 1024
+                1024 * 1024,
+                config.cumulusIncrementalCheckpointsBetweenFullCheckpoints
                 )
 
         self.cumulusWorker = self.constructCumlusWorker(
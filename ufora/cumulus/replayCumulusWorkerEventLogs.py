@@ -37,6 +37,14 @@ def main(parsedArguments):
 
             CumulusNative.replayCumulusWorkerEventStream(events, parsedArguments.validation)
     else:
+        if CumulusNative.cumulusWorkerEventLogMayBeMissingEvents(parsedArguments.file):
+            logging.error(
+                "%s was written with dropLowValueEvents enabled, so it may be missing events "
+                "and can't be replayed. Rerun with a lossless event log.",
+                parsedArguments.file
+                )
+            return 1
+
         CumulusNative.replayCumulusWorkerEventStreamFromFile(
             parsedArguments.file,
             parsedArguments.validation
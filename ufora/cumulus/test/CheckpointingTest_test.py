@@ -13,11 +13,16 @@
 #   limitations under the License.
 
 import logging
+import os
 import random
+import shutil
+import tempfile
 import time
 import unittest
 import ufora.cumulus.test.InMemoryCumulusSimulation as InMemoryCumulusSimulation
 import ufora.distributed.S3.InMemoryS3Interface as InMemoryS3Interface
+import ufora.distributed.Storage.LocalDiskObjectStore as LocalDiskObjectStore
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
 import ufora.native.CallbackScheduler as CallbackScheduler
 import ufora.native.Cumulus as CumulusNative
 import ufora.native.Hash as HashNative
@@ -253,7 +258,8 @@ class CheckpointingTest(unittest.TestCase):
             sharedStateViewFactory=None,
             workerCount=4,
             machineIdHashSeed=None,
-            s3Service=None
+            s3Service=None,
+            checkpointPolicy=None
             ):
         s3 = s3Service or InMemoryS3Interface.InMemoryS3InterfaceFactory()
         return InMemoryCumulusSimulation.InMemoryCumulusSimulation(
@@ -264,7 +270,8 @@ class CheckpointingTest(unittest.TestCase):
             s3Service=s3,
             objectStore=objectStore,
             sharedStateViewFactory=sharedStateViewFactory,
-            machineIdHashSeed=machineIdHashSeed
+            machineIdHashSeed=machineIdHashSeed,
+            checkpointPolicy=checkpointPolicy
             )
 
     def test_checkpointingCumulusClientRequestPathway(self):
@@ -808,6 +815,57 @@ class CheckpointingTest(unittest.TestCase):
         finally:
             simulation.teardown()
 
+    def test_incrementalCheckpointsWriteLessThanFullCheckpoints(self):
+        #never checkpoint on our own, and compact after three incremental checkpoints
+        simulation = self.createSimulation(
+            checkpointPolicy=CumulusNative.CumulusCheckpointPolicy.Periodic(10.0 ** 6, 1024 * 1024, 3)
+            )
+
+        try:
+            #give the simulation a couple of seconds to pick a scheduler
+            self.assertTrue(simulation.waitForGlobalScheduler(timeout=2.0))
+
+            simulation.submitComputation(bigSumText)
+
+            time.sleep(2.0)
+
+            for _ in range(6):
+                simulation.getGlobalScheduler().triggerFullCheckpointsOnOutstandingComputations()
+                self.waitForAllCheckpointsToClear(simulation)
+
+            cache = simulation.getWorkerVdm(0).getPersistentCacheIndex()
+
+            computations = cache.allCheckpointedComputations()
+            self.assertEqual(len(computations), 1)
+
+            checkpoints = sorted(
+                cache.checkpointsForComputation(computations[0]),
+                key=lambda c: c.timestamp
+                )
+            self.assertEqual(len(checkpoints), 6)
+
+            isIncremental = [cache.isCheckpointIncremental(c) for c in checkpoints]
+            bytesWritten = [cache.checkpointBytesWritten(c) for c in checkpoints]
+
+            logging.info(
+                "Bytes written per checkpoint: %s",
+                ["%s%s" % (b, " (incremental)" if i else "") for b, i in zip(bytesWritten, isIncremental)]
+                )
+
+            self.assertFalse(isIncremental[0])
+            self.assertTrue(any(isIncremental))
+
+            #a full checkpoint happens again once the chain is long enough
+            self.assertFalse(all(isIncremental[1:]))
+
+            incrementalBytes = [b for b, i in zip(bytesWritten, isIncremental) if i]
+            self.assertLess(
+                sum(incrementalBytes) / len(incrementalBytes),
+                bytesWritten[0]
+                )
+        finally:
+            simulation.teardown()
+
     def test_checkpointingTimestampOnlyIncreases(self):
         simulation = self.createSimulation()
         
@@ -1243,6 +1301,141 @@ class CheckpointingTest(unittest.TestCase):
             simulation.teardown()
 
 
+    def test_checkpointRestoreTimeFromLocalDisk(self):
+        #a benchmark rather than a correctness check. We write a checkpoint of computations holding
+        #'totalMB' of unpaged data to an on-disk object store, restore it into a fresh simulation,
+        #and time how long it takes before restored computations are running again and before the
+        #whole checkpoint is back. Set CHECKPOINT_RESTORE_BENCHMARK_MB to try multi-GB checkpoints.
+        totalMB = int(os.getenv("CHECKPOINT_RESTORE_BENCHMARK_MB", "256"))
+        workerCount = 4
+        leafCount = 32
+        elementsPerLeaf = totalMB * 1024 * 1024 / 8 / leafCount
+
+        calculationText = """
+            let leaf = fun(ix) {
+                let v = Vector.range(%s, fun(x) { x + ix });
+                let res = 0;
+                let pass = 0;
+                while (pass < 10**12) {
+                    res = res + v[pass %% size(v)]
+                    pass = pass + 1
+                    }
+                res
+                };
+            let fanOut = fun(lo, hi) {
+                if (lo + 1 >= hi)
+                    return leaf(lo)
+                let mid = (lo + hi) / 2;
+                let (l, r) = cached(fanOut(lo, mid), fanOut(mid, hi));
+                l + r
+                };
+            fanOut(0, %s)
+            """ % (elementsPerLeaf, leafCount)
+
+        storageDir = tempfile.mkdtemp()
+        objectStore = LocalDiskObjectStore.LocalDiskObjectStore(storageDir)
+        s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
+
+        def createSimulation(sharedStateViewFactory):
+            return InMemoryCumulusSimulation.InMemoryCumulusSimulation(
+                workerCount,
+                1,
+                memoryPerWorkerMB=max(100, 3 * totalMB / workerCount),
+                threadsPerWorker=2,
+                s3Service=s3,
+                objectStore=objectStore,
+                sharedStateViewFactory=sharedStateViewFactory
+                )
+
+        try:
+            simulation = createSimulation(None)
+            viewFactory = simulation.sharedStateViewFactory
+
+            try:
+                self.assertTrue(simulation.waitForGlobalScheduler(timeout=2.0))
+
+                simulation.submitComputation(calculationText)
+
+                #give every leaf time to build its vector
+                time.sleep(5.0)
+
+                simulation.getGlobalScheduler().triggerFullCheckpointsOnOutstandingComputations()
+
+                self.assertTrue(self.waitForFullCheckpoint(simulation, onlySuccessful=True) is not None)
+            finally:
+                simulation.teardown()
+
+            checkpointMB = sum(size for _, size, _ in objectStore.listValues()) / 1024.0 / 1024.0
+
+            simulation = createSimulation(viewFactory)
+
+            try:
+                self.assertTrue(simulation.waitForGlobalScheduler(timeout=2.0))
+
+                graph = CumulusNative.CpuAssignmentDependencyGraph(
+                    callbackScheduler.getFactory().createScheduler("checkpointRestoreBenchmark", 1),
+                    simulation.getClientVdm(0)
+                    )
+                graph.subscribeToCumulusClient(simulation.getClient(0))
+                listener = graph.createListener()
+
+                t0 = time.time()
+
+                computationId = simulation.submitComputation(calculationText)
+                graph.markRootComputation(computationId)
+
+                timeToFirstProgress = None
+                timeToFullRestore = None
+                sawLoading = False
+
+                while timeToFullRestore is None and time.time() - t0 < 120.0:
+                    graph.updateDependencyGraph()
+
+                    assignment = listener.getTimeout(0.05)
+                    if assignment is None or assignment.computation != computationId:
+                        continue
+
+                    if assignment.isLoadingFromCheckpoint:
+                        sawLoading = True
+
+                    cpus = assignment.cpusAssignedDirectly + assignment.cpusAssignedToChildren
+
+                    if timeToFirstProgress is None and cpus > 0:
+                        timeToFirstProgress = time.time() - t0
+
+                    if sawLoading and timeToFirstProgress is not None and not assignment.isLoadingFromCheckpoint:
+                        timeToFullRestore = time.time() - t0
+            finally:
+                simulation.teardown()
+        finally:
+            shutil.rmtree(storageDir, True)
+
+        self.assertTrue(sawLoading, "never saw the computation load from the checkpoint")
+        self.assertTrue(timeToFirstProgress is not None, "restored computations never started running")
+        self.assertTrue(timeToFullRestore is not None, "checkpoint never finished loading")
+
+        logging.info(
+            "Restoring a %.1f MB checkpoint from local disk: first computations running after %s "
+            "seconds, fully restored after %s",
+            checkpointMB,
+            timeToFirstProgress,
+            timeToFullRestore
+            )
+
+        if PerformanceTestReporter.isCurrentlyTesting():
+            PerformanceTestReporter.recordTest(
+                "cumulus.checkpoint.local_disk_restore.time_to_first_progress",
+                timeToFirstProgress,
+                None,
+                checkpointMB=checkpointMB
+                )
+            PerformanceTestReporter.recordTest(
+                "cumulus.checkpoint.local_disk_restore.time_to_full_restore",
+                timeToFullRestore,
+                None,
+                checkpointMB=checkpointMB
+                )
+
     def test_cumulusCanTriggerNewRegimes(self):
         s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
 
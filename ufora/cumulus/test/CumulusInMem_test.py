@@ -17,12 +17,16 @@ import uuid
 import unittest
 import threading
 import os
+import time
 import cPickle as pickle
 import logging
 
 import ufora.config.Setup as Setup
 import ufora.test.InMemoryCluster as InMemoryCluster
+import ufora.test.PerformanceTestReporter as PerformanceTestReporter
 import ufora.cumulus.test.TestBase as TestBase
+import ufora.FORA.python.FORA as FORA
+import ufora.native.FORA as ForaNative
 import ufora.native.Hash as HashNative
 
 
@@ -97,3 +101,72 @@ class InMemoryCumulusTest(unittest.TestCase, TestBase.CumulusTestCases):
         self.simulator.teardown()
         self.gateway.teardown()
 
+    def test_fan_out_ramp_up_time(self):
+        #a benchmark rather than a correctness check: how long it takes a single root computation
+        #that fans out into many cached subcomputations to occupy every core in the cluster
+        workerCount = 4
+        self.desirePublisher.desireNumberOfWorkers(workerCount, blocking=True)
+
+        totalThreads = workerCount * self.simulator.cumulusThreadCountOverride
+
+        expr = FORA.extractImplValContainer(
+            FORA.eval(
+                """fun() {
+                    let fanOut = fun(depth) {
+                        if (depth == 0)
+                            return sum(0, 2 * 10**8)
+                        else
+                            {
+                            let (l, r) = cached(fanOut(depth - 1), fanOut(depth - 1));
+                            return l + r
+                            }
+                        };
+                    fanOut(6)
+                    }"""
+                    )
+            )
+
+        t0 = time.time()
+
+        computationId = self.gateway.requestComputation(
+            TestBase.makeComputationDefinitionFromIVCs(
+                expr,
+                ForaNative.makeSymbol("Call")
+                )
+            )
+
+        try:
+            rampUpTime = None
+
+            while rampUpTime is None and time.time() - t0 < 120.0:
+                if self.computingThreads.computingThreads >= totalThreads:
+                    rampUpTime = time.time() - t0
+                else:
+                    self.computingThreads.computingThreadsEvent.wait(0.01)
+                    self.computingThreads.computingThreadsEvent.clear()
+
+            response = self.gateway.finalResponses.get(timeout=240.0)
+        finally:
+            self.gateway.deprioritizeComputation(computationId)
+
+        self.assertTrue(response[1].isResult())
+        self.assertTrue(rampUpTime is not None, "never occupied all %s threads" % totalThreads)
+
+        logging.info(
+            "Fan-out computation occupied all %s threads on %s workers after %s seconds, "
+            "and finished after %s",
+            totalThreads,
+            workerCount,
+            rampUpTime,
+            time.time() - t0
+            )
+
+        if PerformanceTestReporter.isCurrentlyTesting():
+            PerformanceTestReporter.recordTest(
+                "cumulus.in_memory.fan_out_ramp_up_time",
+                rampUpTime,
+                None,
+                workers=workerCount,
+                threads=totalThreads
+                )
+
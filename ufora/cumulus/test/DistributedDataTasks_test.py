@@ -267,6 +267,123 @@ class DistributedDataTasksTests(unittest.TestCase):
         print intTime, " to sort ints"
         print classTime, " to sort class instances"
 
+    def hashPartitionTest(self, sz, bucketCount, keyCount, machines=1, memory=1000):
+        s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
+
+        text = """
+            let N = __size__;
+            let bucketCount = __buckets__;
+            let keyCount = __keys__;
+
+            let values = Vector.range(N, { (_ % keyCount, _) }).paged;
+
+            let buckets = cached`(#ExternalIoTask(#DistributedDataOperation(#HashPartition(values, bucketCount))))
+
+            if (size(buckets) != bucketCount)
+                return 'wrong bucket count: %s != %s'.format(size(buckets), bucketCount)
+
+            let valuesSeen = 0;
+            let keysSeen = 0;
+            for ix in sequence(size(buckets)) {
+                valuesSeen = valuesSeen + size(buckets[ix])
+
+                //if a key were split across buckets, we'd count it more than once
+                keysSeen = keysSeen + size(sorting.unique(buckets[ix] ~~ { _[0] }))
+                }
+
+            if (valuesSeen != N)
+                return 'wrong value count: %s != %s'.format(valuesSeen, N)
+            if (keysSeen != keyCount)
+                return 'keys were split across buckets: saw %s, not %s'.format(keysSeen, keyCount)
+            return true
+            """.replace("__size__", str(sz)).replace("__buckets__", str(bucketCount)).replace("__keys__", str(keyCount))
+
+        result = InMemoryCumulusSimulation.computeUsingSeveralWorkers(
+            text,
+            s3,
+            machines,
+            timeout=TIMEOUT,
+            memoryLimitMb=memory
+            )
+
+        self.assertTrue(result is not None)
+        self.assertTrue(result.isResult(), result)
+        self.assertTrue(result.asResult.result.pyval == True, result)
+
+    def test_hashPartitionSmall(self):
+        self.hashPartitionTest(100, 4, 7)
+
+    def test_hashPartitionSingleBucket(self):
+        self.hashPartitionTest(1000, 1, 10, machines=2)
+
+    def test_hashPartitionMultibox(self):
+        self.hashPartitionTest(1000000, 16, 1013, machines=4, memory=250)
+
+    def dataTaskOverSyntheticRows(self, operation, ct, workers, memoryLimit):
+        """Run 'operation' over 'ct' synthetic rows.
+
+        Returns the elapsed time and the bytes the workers shipped to each other.
+        """
+        s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
+
+        text = """
+            let N = __ct__;
+
+            let rows = Vector.range(N, { ((_ * 503) % 1000003, _) }).paged;
+
+            size(cached`(#ExternalIoTask(#DistributedDataOperation(__operation__))))
+            """.replace("__ct__", str(ct)).replace("__operation__", operation)
+
+        t0 = time.time()
+
+        result, simulation = InMemoryCumulusSimulation.computeUsingSeveralWorkers(
+            text,
+            s3,
+            workers,
+            timeout=TIMEOUT,
+            memoryLimitMb=memoryLimit,
+            returnSimulation=True
+            )
+
+        try:
+            elapsed = time.time() - t0
+
+            self.assertTrue(result is not None)
+            self.assertTrue(result.isResult(), result)
+
+            bytesSent = sum(
+                simulation.getWorker(ix).totalBytesSentByDistributedDataTasks()
+                for ix in range(simulation.getWorkerCount())
+                )
+        finally:
+            simulation.teardown()
+
+        return elapsed, bytesSent
+
+    def test_sortAndHashPartition_report_bytes_sent(self):
+        ct = 1000000
+        workers = 4
+
+        for name, operation in [("sort", "#Sort(rows)"),
+                                ("hash_partition", "#HashPartition(rows, 64)")]:
+            elapsed, bytesSent = self.dataTaskOverSyntheticRows(operation, ct, workers, 250)
+
+            #rows start out spread over all the workers, so most of them have to move
+            self.assertTrue(bytesSent > 0, "%s didn't report moving any data" % name)
+
+            if PerformanceTestReporter.isCurrentlyTesting():
+                PerformanceTestReporter.recordTest(
+                    "python.datatasks.%s_1m_rows_4_boxes" % name,
+                    elapsed,
+                    None
+                    )
+                PerformanceTestReporter.recordTest(
+                    "python.datatasks.%s_1m_rows_4_boxes.bytes_sent" % name,
+                    float(bytesSent),
+                    {},
+                    units='bytes'
+                    )
+
 class DISABLED:
     def test_takeLookupSemantics(self):
         s3 = InMemoryS3Interface.InMemoryS3InterfaceFactory()
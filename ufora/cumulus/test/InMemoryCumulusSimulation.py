@@ -82,11 +82,15 @@ def createWorker_(machineId,
                   cacheFunction,
                   pageSizeOverride,
                   disableEventHandler,
-                  maxBytesPerOutOfProcessPythonTask
+                  maxBytesPerOutOfProcessPythonTask,
+                  checkpointPolicy=None
                   ):
     if callbackSchedulerToUse is None:
         callbackSchedulerToUse = CallbackScheduler.singletonForTesting()
 
+    if checkpointPolicy is None:
+        checkpointPolicy = CumulusNative.CumulusCheckpointPolicy.None()
+
     vdm = ForaNative.VectorDataManager(
         callbackSchedulerToUse,
         pageSizeOverride if pageSizeOverride is not None else
@@ -126,7 +130,7 @@ def createWorker_(machineId,
             CumulusNative.CumulusWorkerConfiguration(
                 machineId,
                 threadCount,
-                CumulusNative.CumulusCheckpointPolicy.None(),
+                checkpointPolicy,
                 ExecutionContext.createContextConfiguration(),
                 ""
                 ),
@@ -227,7 +231,8 @@ class InMemoryCumulusSimulation(object):
                 pageSizeOverride=None,
                 disableEventHandler=False,
                 machineIdHashSeed=None,
-                maxBytesPerOutOfProcessPythonTask=None
+                maxBytesPerOutOfProcessPythonTask=None,
+                checkpointPolicy=None
                 ):
         self.useInMemoryCache = useInMemoryCache
         self.machineIdHashSeed = machineIdHashSeed
@@ -280,6 +285,7 @@ class InMemoryCumulusSimulation(object):
         self.clientTeardownGates = []
         self.workerTeardownGates = []
         self.maxBytesPerOutOfProcessPythonTask = maxBytesPerOutOfProcessPythonTask
+        self.checkpointPolicy = checkpointPolicy
 
         for ix in range(workerCount):
             self.addWorker()
@@ -313,7 +319,8 @@ class InMemoryCumulusSimulation(object):
                 cacheFunction = self.cacheFunction,
                 pageSizeOverride = self.pageSizeOverride,
                 disableEventHandler = self.disableEventHandler,
-                maxBytesPerOutOfProcessPythonTask = self.maxBytesPerOutOfProcessPythonTask
+                maxBytesPerOutOfProcessPythonTask = self.maxBytesPerOutOfProcessPythonTask,
+                checkpointPolicy = self.checkpointPolicy
                 )
             )
 
@@ -35,6 +35,14 @@ class CallbackException(object):
 
 
 class AsyncView(object):
+    """Runs a SharedState View on its own reactor thread.
+
+    An AsyncView doesn't reconnect. When its view disconnects it reports
+    Disconnected to 'onErrorCallback', and the owner builds a new AsyncView,
+    whose 'onConnectCallback' subscribes afresh. We deliberately don't use
+    ViewFactory.reconnectView here: it keeps the view's client id, and our
+    owners rely on a disconnect retiring that id.
+    """
     def __init__(self,
             viewFactory,
             onConnectCallback=lambda result: None,
@@ -48,6 +48,21 @@ class ViewFactory(ThreadLocalStack.ThreadLocalStackPushable):
 
         return view
 
+    def reconnectView(self, view, retrySeconds=None, numRetries=4.0):
+        '''Reattach a disconnected view to the manager on a new channel.
+
+        The view keeps its client id and its data, and the manager replays only
+        the events it missed rather than the full contents of each subscription.
+        '''
+        t0 = time.time()
+        while True:
+            try:
+                view.add(self.channelFactory.createChannel())
+                return view
+            except (SharedStateConnectionError, common.SocketException):
+                if not ViewFactory.waitForRetry_(t0, retrySeconds, numRetries):
+                    raise
+
     @staticmethod
     def TcpViewFactory(callbackScheduler, address=None, port=None):
         if address is None:
@@ -680,6 +680,25 @@ public:
 				boost::python::object storageOrNone
 				)
 			{
+			return createShardedKeyspaceManager(
+				inSeedVal,
+				numManagers,
+				backupInterval,
+				pingInterval,
+				storageOrNone,
+				1
+				);
+			}
+
+		static KeyspaceManager::pointer_type* createShardedKeyspaceManager(
+				uint32_t inSeedVal,
+				uint32_t numManagers,
+				uint32_t backupInterval,
+				double pingInterval,
+				boost::python::object storageOrNone,
+				uint32_t shardCount
+				)
+			{
 			PolymorphicSharedPtr<FileStorage> inStorage;
 
 			if (storageOrNone != boost::python::object())
@@ -691,7 +710,8 @@ public:
 					numManagers,
 					backupInterval,
 					pingInterval,
-					inStorage
+					inStorage,
+					shardCount
 					)
 				);
 			}
@@ -739,12 +759,16 @@ public:
 										const PartialEvent& event
 										)
 			{
+			ScopedPyThreads releasePythonGIL;
+
 			inHolder->addEvent(event);
 			}
 
 
 		static void keyspace_manager_check(KeyspaceManager::pointer_type& inHolder)
 			{
+			ScopedPyThreads releasePythonGIL;
+
 			inHolder->check();
 			}
 
@@ -756,9 +780,21 @@ public:
 
 		static void keyspace_manager_shutdown(KeyspaceManager::pointer_type& inHolder)
 			{
+			ScopedPyThreads releasePythonGIL;
+
 			inHolder->shutdown();
 			}
 
+		static uint32_t keyspace_manager_shard_count(KeyspaceManager::pointer_type& inHolder)
+			{
+			return inHolder->shardCount();
+			}
+
+		static uint64_t keyspace_manager_events_handled(KeyspaceManager::pointer_type& inHolder)
+			{
+			return inHolder->eventsHandled();
+			}
+
 		static PolymorphicSharedPtr<FileStorage> keyspace_manager_storage(KeyspaceManager::pointer_type& inHolder)
 			{
 			return inHolder->storage();
@@ -880,12 +916,15 @@ public:
 			class_<KeyspaceManager::pointer_type >("KeyspaceManager", no_init)
 				.def("__init__", make_constructor(&createKeyspaceManager))
 				.def("__init__", make_constructor(&createKeyspaceManager2))
+				.def("__init__", make_constructor(&createShardedKeyspaceManager))
 				.def("add", &keyspace_manager_add)
 				.def("addEvent", &keyspace_manager_add_event)
 				.def("check", &keyspace_manager_check)
 				.def("shutdown", &keyspace_manager_shutdown)
 				.def("getAllKeyspaces", &keyspace_manager_get_all_keyspaces)
 				.add_property("storage", &keyspace_manager_storage)
+				.add_property("shardCount", &keyspace_manager_shard_count)
+				.def("eventsHandled", &keyspace_manager_events_handled)
 				;
 
 
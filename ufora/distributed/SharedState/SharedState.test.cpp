@@ -115,9 +115,77 @@ void clientThread(	PolymorphicSharedPtr<View> inView,
 	*ioSuccess = 1;
 	}
 
+pair<channel_ptr_type, manager_channel_ptr_type> createChannelPair(
+										PolymorphicSharedPtr<CallbackScheduler> inScheduler
+										)
+	{
+	auto pRaw = InMemoryChannel<std::string, std::string>::createChannelPair(inScheduler);
+
+	return make_pair(
+		makeQueuelikeChannel(
+			inScheduler,
+			new serialized_channel_type(inScheduler, pRaw.first)
+			),
+		makeQueuelikeChannel(
+			inScheduler,
+			new serialized_manager_channel_type(inScheduler, pRaw.second)
+			)
+		);
+	}
+
+void writeValue(PolymorphicSharedPtr<View> inView, uword_t inIndex, std::string inValue)
+	{
+	inView->begin();
+	inView->write(KeyUpdate(getKey(inIndex), UpdateType(Ufora::Json::String(inValue))));
+	inView->end();
+	}
+
+bool waitForValues(PolymorphicSharedPtr<View> inView, uword_t inKeyCount, std::string inValue)
+	{
+	double t0 = curClock();
+
+	while (!allThreadsHaveValue(inView, inKeyCount, Ufora::Json::String(inValue)))
+		{
+		if (curClock() - t0 > 5.0)
+			return false;
+		sleepSeconds(.01);
+		}
+
+	return true;
+	}
+
+class DisconnectListener : public Listener {
+public:
+	DisconnectListener() : mDisconnected(false)
+		{
+		}
+
+	virtual void disconnected(void)
+		{
+		mDisconnected = true;
+		}
+
+	bool waitForDisconnect()
+		{
+		double t0 = curClock();
+
+		while (!mDisconnected)
+			{
+			if (curClock() - t0 > 5.0)
+				return false;
+			sleepSeconds(.01);
+			}
+
+		return true;
+		}
+
+private:
+	volatile bool mDisconnected;
+};
+
 }
 
-BOOST_AUTO_TEST_CASE( test_InMemorySharedState )
+void testInMemorySharedState(uint32_t shardCount)
 	{
 	PolymorphicSharedPtr<CallbackScheduler> scheduler(CallbackScheduler::singletonForTesting());
 
@@ -128,7 +196,8 @@ BOOST_AUTO_TEST_CASE( test_InMemorySharedState )
 			1,
 			60,
 			2,
-			PolymorphicSharedPtr<FileStorage>()
+			PolymorphicSharedPtr<FileStorage>(),
+			shardCount
 			)
 		);
 
@@ -146,18 +215,7 @@ BOOST_AUTO_TEST_CASE( test_InMemorySharedState )
 			PolymorphicSharedPtr<View> newView(new View(false));
 
 
-			auto pRaw = InMemoryChannel<std::string, std::string>::createChannelPair(scheduler);
-
-			pair<channel_ptr_type, channel_type::reverse_channel_type::pointer_type> channelPair(
-				makeQueuelikeChannel(
-					scheduler,
-					new serialized_channel_type(scheduler, pRaw.first)
-					),
-				makeQueuelikeChannel(
-					scheduler,
-					new serialized_manager_channel_type(scheduler, pRaw.second)
-					)
-				);
+			auto channelPair = createChannelPair(scheduler);
 
 			newView->add(channelPair.first);
 			manager->add(channelPair.second);
@@ -189,3 +247,70 @@ BOOST_AUTO_TEST_CASE( test_InMemorySharedState )
 		}
 	}
 
+BOOST_AUTO_TEST_CASE( test_InMemorySharedState )
+	{
+	testInMemorySharedState(1);
+	}
+
+BOOST_AUTO_TEST_CASE( test_InMemorySharedState_sharded )
+	{
+	testInMemorySharedState(4);
+	}
+
+
+BOOST_AUTO_TEST_CASE( test_SharedState_resumes_subscriptions_after_reconnect )
+	{
+	PolymorphicSharedPtr<CallbackScheduler> scheduler(CallbackScheduler::singletonForTesting());
+
+	PolymorphicSharedPtr<KeyspaceManager> manager(
+		new KeyspaceManager(0, 1, 60, 2, PolymorphicSharedPtr<FileStorage>(), 2)
+		);
+
+	KeyRange range(getKeyspace(), 0, null(), null());
+
+	uword_t keyCount = 100;
+
+	PolymorphicSharedPtr<View> writer(new View(false));
+	PolymorphicSharedPtr<View> reader(new View(false));
+
+	auto writerChannels = createChannelPair(scheduler);
+	writer->add(writerChannels.first);
+	manager->add(writerChannels.second);
+
+	auto readerChannels = createChannelPair(scheduler);
+	reader->add(readerChannels.first);
+	manager->add(readerChannels.second);
+
+	writer->subscribe(range, true);
+	reader->subscribe(range, true);
+
+	for (long k = 0; k < keyCount; k++)
+		writeValue(writer, k, "first");
+
+	BOOST_REQUIRE(waitForValues(reader, keyCount, "first"));
+
+	uint32_t readerClientId = reader->getClientId();
+
+	PolymorphicSharedPtr<DisconnectListener> listener(new DisconnectListener());
+	reader->addListener(listener);
+
+	reader->disconnect();
+
+	BOOST_REQUIRE(listener->waitForDisconnect());
+
+	//these are only visible to the reader if the resumed subscription replays them
+	for (long k = 0; k < keyCount; k++)
+		writeValue(writer, k, "second");
+
+	auto newReaderChannels = createChannelPair(scheduler);
+	reader->add(newReaderChannels.first);
+	manager->add(newReaderChannels.second);
+
+	BOOST_CHECK(waitForValues(reader, keyCount, "second"));
+	BOOST_CHECK_EQUAL(reader->getClientId(), readerClientId);
+
+	//and the reader can write again once it has reconnected
+	writeValue(reader, 0, "third");
+
+	BOOST_CHECK(waitForValues(writer, 1, "third"));
+	}
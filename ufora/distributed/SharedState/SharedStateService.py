@@ -49,10 +49,14 @@ def KeyspaceManager(randomSeed,
                     pingInterval=20,
                     cachePathOverride=None,
                     maxOpenFiles=None,
-                    maxLogFileSizeMb=10):
+                    maxLogFileSizeMb=10,
+                    shardCount=None):
     if cachePathOverride is None:
         cachePathOverride = Setup.config().sharedStateCache
 
+    if shardCount is None:
+        shardCount = Setup.config().sharedStateShardCount
+
     if maxOpenFiles is None:
         import resource
         maxOpenFiles = min(resource.getrlimit(resource.RLIMIT_NOFILE)[0] / 2, 1000)
@@ -74,7 +78,8 @@ def KeyspaceManager(randomSeed,
         numManagers,
         backupInterval,
         pingInterval,
-        storage
+        storage,
+        shardCount
         )
 
 
@@ -0,0 +1,81 @@
+#   Copyright 2015 Ufora Inc.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import tempfile
+
+class LocalDiskObjectStore(object):
+    """An ObjectStore that keeps each value in a file under 'rootDirectory'.
+
+    Keys may contain '/', which map onto subdirectories.
+    """
+    def __init__(self, rootDirectory, prefix=""):
+        self.rootDirectory = rootDirectory
+        self.prefix = prefix
+
+    def readValue(self, key):
+        path = self.pathForKey(key)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except IOError as e:
+            raise Exception("Error reading from disk: %s:\n%s" % (path, e))
+
+    def writeValue(self, key, value):
+        path = self.pathForKey(key)
+        try:
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    if not os.path.isdir(directory):
+                        raise
+
+            #write to a temporary file first so readers never see a partial value
+            handle, tempPath = tempfile.mkstemp(prefix=".", dir=directory)
+            with os.fdopen(handle, "wb") as f:
+                f.write(value)
+            os.rename(tempPath, path)
+        except (IOError, OSError) as e:
+            raise Exception("Error writing to disk: %s:\n%s" % (path, e))
+
+    def deleteValue(self, key):
+        path = self.pathForKey(key)
+        try:
+            os.remove(path)
+        except OSError as e:
+            raise Exception("Error deleting file: %s:\n%s" % (path, e))
+
+    def listValues(self, prefix=''):
+        fullPrefix = self.prefix + prefix
+        prefixLen = len(self.prefix)
+        result = []
+
+        for directory, _, filenames in os.walk(self.rootDirectory):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(directory, filename)
+                key = os.path.relpath(path, self.rootDirectory).replace(os.sep, '/')
+                if key.startswith(fullPrefix):
+                    stat = os.stat(path)
+                    result.append((key[prefixLen:], stat.st_size, stat.st_mtime))
+
+        return result
+
+    def pathForKey(self, key):
+        return os.path.join(self.rootDirectory, *(self.prefix + key).split('/'))
+
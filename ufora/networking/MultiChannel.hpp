@@ -13,16 +13,83 @@
    See the License for the specific language governing permissions and
    limitations under the License.
 ****************************************************************************/
+#include <deque>
 #include <initializer_list>
 #include <queue>
 #include <boost/function.hpp>
 
+#include "Channel.hpp"
 #include "OrderedMessage.hppml"
+#include "statsd.hpp"
 
+#include "../core/Clock.hpp"
 #include "../core/ScopedProfiler.hppml"
 #include "../core/PolymorphicSharedPtr.hpp"
 #include "../core/PolymorphicSharedPtrBinder.hpp"
 
+/***********
+MultiChannelLane
+
+A named outgoing queue in a MultiChannel. Every message written to the lane is sent over
+the underlying channel 'channelIndex'. When several lanes have messages waiting, each lane
+gets to send up to 'weight' messages before the next lane gets a turn.
+***********/
+
+class MultiChannelLane {
+public:
+	MultiChannelLane(std::string inName, size_t inChannelIndex, uint32_t inWeight) :
+			mName(inName),
+			mChannelIndex(inChannelIndex),
+			mWeight(inWeight)
+		{
+		lassert(inWeight > 0);
+		}
+
+	const std::string& name() const
+		{
+		return mName;
+		}
+
+	size_t channelIndex() const
+		{
+		return mChannelIndex;
+		}
+
+	uint32_t weight() const
+		{
+		return mWeight;
+		}
+
+private:
+	std::string mName;
+
+	size_t mChannelIndex;
+
+	uint32_t mWeight;
+};
+
+/***********
+MultiChannel
+
+Multiplexes one logical channel over several ordered channels. Every outgoing message is
+stamped with an ordinal and the receiver redelivers messages in ordinal order, except that
+messages arriving on channel 0 are never held back.
+
+By default, 'write' sends directly on the channel picked by the selector. If a set of lanes
+is given, the selector picks a lane instead, and 'write' just enqueues the message. A
+drain task on 'inWriteScheduler' serializes and sends queued messages using weighted
+round-robin across the lanes, so a burst of large messages on a low-weight lane can't
+hold up a high-weight lane by more than one message. Time spent waiting in each lane is
+reported as a statsd histogram.
+
+With lanes, ordinals are stamped as messages leave their lane rather than when they're
+written. Several lanes may share a channel, and the receiver holds back messages whose
+ordinal is ahead of what it has seen, so ordinals have to follow the order messages
+actually go out on the wire. Messages within a lane are always delivered in the order they
+were written. Messages in different lanes are delivered in the order the round-robin sent
+them.
+***********/
+
 template <class TOut, class TIn>
 class MultiChannel : public Channel<TOut, TIn> {
 public:
@@ -43,6 +110,12 @@ public:
 
 	typedef boost::function<size_t(TOut)> outgoing_channel_selector;
 
+	//messages are sent in batches of at most this size before the drain task yields
+	const static long kMaxWritesPerDrain = 256;
+
+	//report the queueing latency of one out of every this many messages in a lane
+	const static uint64_t kLatencySampleInterval = 16;
+
 	MultiChannel(
 			std::initializer_list<ordered_channel_pointer_type> channels,
 			outgoing_channel_selector channelSelector,
@@ -53,7 +126,9 @@ public:
 		mIsDisconnected(false),
 		mLastOutboundMessageOrdinal(0),
 		mMaxDispatchedMessageOrdinal(0),
-		mCallbackScheduler(inCallbackScheduler)
+		mCallbackScheduler(inCallbackScheduler),
+		mNextLane(0),
+		mDrainScheduled(false)
 		{
 		}
 
@@ -67,8 +142,41 @@ public:
 		mIsDisconnected(false),
 		mLastOutboundMessageOrdinal(0),
 		mMaxDispatchedMessageOrdinal(0),
-		mCallbackScheduler(inCallbackScheduler)
+		mCallbackScheduler(inCallbackScheduler),
+		mNextLane(0),
+		mDrainScheduled(false)
+		{
+		}
+
+	MultiChannel(
+			std::vector<ordered_channel_pointer_type> channels,
+			std::vector<MultiChannelLane> lanes,
+			outgoing_channel_selector laneSelector,
+			PolymorphicSharedPtr<CallbackScheduler> inCallbackScheduler,
+			PolymorphicSharedPtr<CallbackScheduler> inWriteScheduler
+			) :
+		mChannels(channels.begin(), channels.end()),
+		mOutgoingChannelSelector(laneSelector),
+		mIsDisconnected(false),
+		mLastOutboundMessageOrdinal(0),
+		mMaxDispatchedMessageOrdinal(0),
+		mCallbackScheduler(inCallbackScheduler),
+		mWriteScheduler(inWriteScheduler),
+		mLanes(lanes),
+		mLaneQueues(lanes.size()),
+		mLaneCredits(lanes.size()),
+		mLaneMessagesWritten(lanes.size()),
+		mNextLane(0),
+		mDrainScheduled(false),
+		mStatsd("ufora.networking.MultiChannel")
 		{
+		lassert(mWriteScheduler);
+
+		for (long k = 0; k < mLanes.size(); k++)
+			{
+			lassert(mLanes[k].channelIndex() < mChannels.size());
+			mLaneCredits[k] = mLanes[k].weight();
+			}
 		}
 
 	~MultiChannel() {}
@@ -80,6 +188,12 @@ public:
 
 	void write(const TOut& msg)
 		{
+		if (mLanes.size())
+			{
+			enqueueOnLane(msg);
+			return;
+			}
+
 		size_t channelIndex = mOutgoingChannelSelector(msg);
 		lassert(channelIndex < mChannels.size());
 
@@ -96,6 +210,9 @@ public:
 				return;
 
 			mIsDisconnected = true;
+
+			for (auto& queue: mLaneQueues)
+				queue.clear();
 			}
 
 		for (auto it = mChannels.begin(); it != mChannels.end(); ++it)
@@ -136,6 +253,132 @@ public:
 		}
 
 private:
+	typedef std::pair<TOut, double> pending_write_type;
+
+	void enqueueOnLane(const TOut& msg)
+		{
+		size_t laneIndex = mOutgoingChannelSelector(msg);
+		lassert(laneIndex < mLanes.size());
+
+			{
+			boost::mutex::scoped_lock lock(mMutex);
+
+			if (mIsDisconnected)
+				throw ChannelDisconnected();
+
+			mLaneQueues[laneIndex].push_back(pending_write_type(msg, curClock()));
+
+			if (mDrainScheduled)
+				return;
+
+			mDrainScheduled = true;
+			}
+
+		scheduleDrain();
+		}
+
+	void scheduleDrain()
+		{
+		mWriteScheduler->scheduleImmediately(
+			boost::bind(
+				PolymorphicSharedPtrBinder::memberFunctionToWeakPtrFunction(
+					&MultiChannel::drainLanes
+					),
+				weak_ptr_type(
+					this->polymorphicSharedPtrFromThis().template dynamic_pointer_cast<pointer_type>()
+					)
+				),
+			"MultiChannel::drainLanes"
+			);
+		}
+
+	void drainLanes()
+		{
+		for (long writes = 0; writes < kMaxWritesPerDrain; writes++)
+			{
+			size_t laneIndex;
+			pending_write_type pending;
+			uint32_t ordinal;
+			bool shouldReportLatency;
+
+				{
+				boost::mutex::scoped_lock lock(mMutex);
+
+				if (mIsDisconnected || !pickNextLane_(laneIndex))
+					{
+					mDrainScheduled = false;
+					return;
+					}
+
+				pending = mLaneQueues[laneIndex].front();
+				mLaneQueues[laneIndex].pop_front();
+
+				//only one drain task runs at a time, so ordinals go out in increasing order
+				//on every channel
+				ordinal = ++mLastOutboundMessageOrdinal;
+
+				shouldReportLatency = mLaneMessagesWritten[laneIndex]++ % kLatencySampleInterval == 0;
+				}
+
+			try {
+				mChannels[mLanes[laneIndex].channelIndex()]->write(
+					OrderedMessage<TOut>(ordinal, pending.first)
+					);
+				}
+			catch(ChannelDisconnected& e)
+				{
+				disconnect();
+				return;
+				}
+
+			if (shouldReportLatency)
+				mStatsd.histogram(
+					"lane." + mLanes[laneIndex].name() + ".queue_latency_us",
+					(curClock() - pending.second) * 1000000
+					);
+			}
+
+		//let other work on the write scheduler run before we send the rest
+		scheduleDrain();
+		}
+
+	//pick the lane that sends next, using weighted round-robin. Returns false if every lane
+	//is empty.
+	bool pickNextLane_(size_t& outLaneIndex)
+		{
+		bool anyPending = false;
+
+		for (auto& queue: mLaneQueues)
+			if (queue.size())
+				anyPending = true;
+
+		if (!anyPending)
+			return false;
+
+		while (true)
+			{
+			for (long pass = 0; pass < mLanes.size(); pass++)
+				{
+				size_t laneIndex = (mNextLane + pass) % mLanes.size();
+
+				if (mLaneQueues[laneIndex].size() && mLaneCredits[laneIndex])
+					{
+					mLaneCredits[laneIndex]--;
+
+					//stay on this lane until it has used its share of the round
+					mNextLane = mLaneCredits[laneIndex] ? laneIndex : (laneIndex + 1) % mLanes.size();
+
+					outLaneIndex = laneIndex;
+					return true;
+					}
+				}
+
+			//every lane with pending messages has used up its share. Start a new round.
+			for (long k = 0; k < mLanes.size(); k++)
+				mLaneCredits[k] = mLanes[k].weight();
+			}
+		}
+
 	class ChannelCallbackHandler {
 	public:
 		ChannelCallbackHandler(
@@ -306,6 +549,14 @@ private:
 	uint32_t 													mLastOutboundMessageOrdinal;
 	uint32_t 													mMaxDispatchedMessageOrdinal;
 	boost::mutex 												mMutex;
+	PolymorphicSharedPtr<CallbackScheduler>						mWriteScheduler;
+	std::vector<MultiChannelLane>								mLanes;
+	std::vector<std::deque<pending_write_type> >				mLaneQueues;
+	std::vector<uint32_t>										mLaneCredits;
+	std::vector<uint64_t>										mLaneMessagesWritten;
+	size_t														mNextLane;
+	bool														mDrainScheduled;
+	ufora::Statsd												mStatsd;
 
 };
 
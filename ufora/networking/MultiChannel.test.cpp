@@ -16,6 +16,7 @@
 #include "../core/UnitTest.hpp"
 #include "../core/math/Random.hpp"
 #include "../core/threading/CallbackScheduler.hppml"
+#include "../core/threading/TestingCallbackSchedulerFactory.hppml"
 #include "../networking/InMemoryChannel.hpp"
 #include "../networking/SerializedChannel.hpp"
 #include "../FORA/Serialization/SerializedObjectFlattener.hpp"
@@ -265,6 +266,160 @@ BOOST_AUTO_TEST_CASE( test_random )
         }
     }
 
-BOOST_AUTO_TEST_SUITE_END()
+namespace {
+
+size_t laneFromMessage(const std::string& message)
+    {
+    if (message[0] == 'c')
+        return 0;
+    if (message[0] == 's')
+        return 2;
+    return 1;
+    }
+
+class LaneTestHarness {
+public:
+    LaneTestHarness(std::vector<MultiChannelLane> lanes) :
+            factory(new TestingCallbackSchedulerFactory()),
+            scheduler(factory->createScheduler("LaneTestHarness", 1)),
+            channelPair1(in_mem_string_channel::createChannelPair(scheduler)),
+            channelPair2(in_mem_string_channel::createChannelPair(scheduler))
+        {
+        std::vector<string_multi_channel::ordered_channel_pointer_type> senderChannels;
+        senderChannels.push_back(channelPair1.first);
+        senderChannels.push_back(channelPair2.first);
+
+        sender.reset(
+            new string_multi_channel(senderChannels, lanes, &laneFromMessage, scheduler, scheduler)
+            );
+
+        receiver.reset(
+            new string_multi_channel(
+                { channelPair1.second, channelPair2.second },
+                &laneFromMessage,
+                scheduler
+                )
+            );
+
+        sender->setHandlers(
+            boost::bind(&LaneTestHarness::onMessage, this, _1),
+            boost::bind(&LaneTestHarness::onDisconnected)
+            );
+        receiver->setHandlers(
+            boost::bind(&LaneTestHarness::onMessage, this, _1),
+            boost::bind(&LaneTestHarness::onDisconnected)
+            );
+        }
+
+    ~LaneTestHarness()
+        {
+        sender->disconnect();
+        receiver->disconnect();
+        factory->executeAll();
+        }
 
+    void onMessage(const std::string& message)
+        {
+        received.push_back(message);
+        }
 
+    static void onDisconnected()
+        {
+        }
+
+    std::string receivedOrder() const
+        {
+        std::string tr;
+        for (auto& message: received)
+            tr += message[0];
+        return tr;
+        }
+
+    PolymorphicSharedPtr<TestingCallbackSchedulerFactory, PolymorphicSharedPtr<CallbackSchedulerFactory> > factory;
+    PolymorphicSharedPtr<CallbackScheduler> scheduler;
+    in_mem_channel_pair channelPair1;
+    in_mem_channel_pair channelPair2;
+    string_multi_channel_ptr sender;
+    string_multi_channel_ptr receiver;
+    std::vector<std::string> received;
+};
+
+}
+
+BOOST_AUTO_TEST_CASE( test_MultiChannel_lanes_are_weighted )
+    {
+    std::vector<MultiChannelLane> lanes;
+    lanes.push_back(MultiChannelLane("control", 0, 2));
+    lanes.push_back(MultiChannelLane("bulk", 1, 1));
+
+    LaneTestHarness harness(lanes);
+
+    for (long k = 0; k < 6; k++)
+        harness.sender->write("b" + boost::lexical_cast<std::string>(k));
+    for (long k = 0; k < 6; k++)
+        harness.sender->write("c" + boost::lexical_cast<std::string>(k));
+
+    harness.factory->executeAll();
+
+    //control messages overtake the bulk messages queued before them, two for every bulk message
+    BOOST_CHECK_EQUAL(harness.receivedOrder(), "ccbccbccbbbb");
+
+    //and messages within a lane stay in order
+    std::vector<std::string> bulk;
+    for (auto& message: harness.received)
+        if (message[0] == 'b')
+            bulk.push_back(message);
+
+    BOOST_REQUIRE_EQUAL(bulk.size(), 6);
+    for (long k = 0; k < 6; k++)
+        BOOST_CHECK_EQUAL(bulk[k], "b" + boost::lexical_cast<std::string>(k));
+    }
+
+BOOST_AUTO_TEST_CASE( test_MultiChannel_lane_writes_after_disconnect_throw )
+    {
+    std::vector<MultiChannelLane> lanes;
+    lanes.push_back(MultiChannelLane("control", 0, 1));
+    lanes.push_back(MultiChannelLane("bulk", 1, 1));
+
+    LaneTestHarness harness(lanes);
+
+    harness.sender->disconnect();
+
+    BOOST_CHECK_THROW(harness.sender->write("c0"), ChannelDisconnected);
+    }
+
+BOOST_AUTO_TEST_CASE( test_MultiChannel_lanes_sharing_a_channel_deliver_in_send_order )
+    {
+    std::vector<MultiChannelLane> lanes;
+    lanes.push_back(MultiChannelLane("control", 0, 1));
+    lanes.push_back(MultiChannelLane("bulk", 1, 1));
+    lanes.push_back(MultiChannelLane("state", 1, 4));
+
+    LaneTestHarness harness(lanes);
+
+    for (long k = 0; k < 6; k++)
+        harness.sender->write("b" + boost::lexical_cast<std::string>(k));
+    for (long k = 0; k < 6; k++)
+        harness.sender->write("s" + boost::lexical_cast<std::string>(k));
+
+    harness.factory->executeAll();
+
+    //state messages overtake the bulk messages queued before them on the same channel, and the
+    //receiver doesn't hold them back behind those bulk messages
+    BOOST_CHECK_EQUAL(harness.receivedOrder(), "bssssbssbbbb");
+
+    std::vector<std::string> bulk;
+    std::vector<std::string> state;
+    for (auto& message: harness.received)
+        (message[0] == 'b' ? bulk : state).push_back(message);
+
+    BOOST_REQUIRE_EQUAL(bulk.size(), 6);
+    BOOST_REQUIRE_EQUAL(state.size(), 6);
+    for (long k = 0; k < 6; k++)
+        {
+        BOOST_CHECK_EQUAL(bulk[k], "b" + boost::lexical_cast<std::string>(k));
+        BOOST_CHECK_EQUAL(state[k], "s" + boost::lexical_cast<std::string>(k));
+        }
+    }
+
+BOOST_AUTO_TEST_SUITE_END()
@@ -0,0 +1,433 @@
+/***************************************************************************
+   Copyright 2016 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#include "SocketEventLoop.hpp"
+
+#include "../core/lassert.hpp"
+#include "../core/Logging.hpp"
+#include "../core/Platform.hpp"
+
+#include <errno.h>
+#include <fcntl.h>
+#include <string.h>
+#include <unistd.h>
+
+#if defined(BSA_PLATFORM_LINUX)
+#include <sys/epoll.h>
+#else
+#include <poll.h>
+#endif
+
+namespace {
+
+//we never need more than a handful of loops - each one can service thousands of sockets
+const uint32_t kMaxLoopCount = 4;
+
+const uint32_t kCoresPerLoop = 8;
+
+const int kMaxEventsPerWait = 256;
+
+}
+
+std::vector<SocketEventLoop*>& SocketEventLoop::loops()
+	{
+	//the loops are never destroyed, since channels may be torn down during static destruction
+	static std::vector<SocketEventLoop*>* sLoops = 0;
+	static boost::mutex sMutex;
+
+	boost::mutex::scoped_lock lock(sMutex);
+
+	if (!sLoops)
+		{
+		uint32_t loopCount = boost::thread::hardware_concurrency() / kCoresPerLoop;
+
+		loopCount = std::max<uint32_t>(1, std::min<uint32_t>(kMaxLoopCount, loopCount));
+
+		std::vector<SocketEventLoop*>* newLoops = new std::vector<SocketEventLoop*>();
+
+		for (uint32_t k = 0; k < loopCount; k++)
+			newLoops->push_back(new SocketEventLoop(k));
+
+		sLoops = newLoops;
+		}
+
+	return *sLoops;
+	}
+
+SocketEventLoop& SocketEventLoop::loopFor(int32_t inFileDescriptor)
+	{
+	std::vector<SocketEventLoop*>& allLoops = loops();
+
+	return *allLoops[inFileDescriptor % allLoops.size()];
+	}
+
+bool SocketEventLoop::setNonblocking(int32_t inFileDescriptor)
+	{
+	int flags = fcntl(inFileDescriptor, F_GETFL, 0);
+
+	if (flags == -1)
+		return false;
+
+	return fcntl(inFileDescriptor, F_SETFL, flags | O_NONBLOCK) != -1;
+	}
+
+SocketEventLoop::SocketEventLoop(uint32_t inIndex) :
+		mIndex(inIndex),
+		mWakePending(false)
+	{
+	lassert_dump(pipe(mWakePipe) == 0, "couldn't create a pipe: " << strerror(errno));
+
+	lassert(setNonblocking(mWakePipe[0]));
+	lassert(setNonblocking(mWakePipe[1]));
+
+#if defined(BSA_PLATFORM_LINUX)
+	mPollFd = epoll_create1(EPOLL_CLOEXEC);
+
+	lassert_dump(mPollFd != -1, "couldn't create an epoll instance: " << strerror(errno));
+
+	epoll_event event;
+	memset(&event, 0, sizeof(event));
+	event.events = EPOLLIN;
+	event.data.fd = mWakePipe[0];
+
+	lassert(epoll_ctl(mPollFd, EPOLL_CTL_ADD, mWakePipe[0], &event) == 0);
+#else
+	mPollFd = -1;
+#endif
+
+	mThread = boost::thread(boost::bind(&SocketEventLoop::loop, this));
+	}
+
+bool SocketEventLoop::isLoopThread() const
+	{
+	return boost::this_thread::get_id() == mThread.get_id();
+	}
+
+size_t SocketEventLoop::socketCount() const
+	{
+	boost::mutex::scoped_lock lock(mMutex);
+
+	return mRegistrations.size();
+	}
+
+void SocketEventLoop::add(
+					int32_t inFileDescriptor,
+					callback_type inOnReadable,
+					callback_type inOnWritable
+					)
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		lassert_dump(
+			mRegistrations.find(inFileDescriptor) == mRegistrations.end(),
+			"file descriptor " << inFileDescriptor << " is already registered"
+			);
+
+		mRegistrations[inFileDescriptor] = Registration(inOnReadable, inOnWritable);
+		}
+
+#if defined(BSA_PLATFORM_LINUX)
+	epoll_event event;
+	memset(&event, 0, sizeof(event));
+	event.events = EPOLLIN | EPOLLRDHUP;
+	event.data.fd = inFileDescriptor;
+
+	if (epoll_ctl(mPollFd, EPOLL_CTL_ADD, inFileDescriptor, &event) != 0)
+		LOG_WARN << "SocketEventLoop couldn't watch fd " << inFileDescriptor << ": " << strerror(errno);
+#else
+	wake();
+#endif
+	}
+
+void SocketEventLoop::armWrite(int32_t inFileDescriptor)
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		auto it = mRegistrations.find(inFileDescriptor);
+
+		if (it == mRegistrations.end() || it->second.mWantsWrite)
+			return;
+
+		it->second.mWantsWrite = true;
+		}
+
+	updateInterest(inFileDescriptor, true);
+	}
+
+void SocketEventLoop::updateInterest(int32_t inFileDescriptor, bool inWantsWrite)
+	{
+#if defined(BSA_PLATFORM_LINUX)
+	epoll_event event;
+	memset(&event, 0, sizeof(event));
+	event.events = EPOLLIN | EPOLLRDHUP | (inWantsWrite ? EPOLLOUT : 0);
+	event.data.fd = inFileDescriptor;
+
+	epoll_ctl(mPollFd, EPOLL_CTL_MOD, inFileDescriptor, &event);
+#else
+	if (!isLoopThread())
+		wake();
+#endif
+	}
+
+void SocketEventLoop::scheduleWrite(int32_t inFileDescriptor)
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		mPendingWrites.insert(inFileDescriptor);
+		}
+
+	wake();
+	}
+
+void SocketEventLoop::removeAndClose(int32_t inFileDescriptor, boost::shared_ptr<void> inKeepAlive)
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		mPendingCloses.push_back(std::make_pair(inFileDescriptor, inKeepAlive));
+		}
+
+	wake();
+	}
+
+void SocketEventLoop::wake()
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		if (mWakePending)
+			return;
+
+		mWakePending = true;
+		}
+
+	char c = 0;
+
+	while (::write(mWakePipe[1], &c, 1) == -1 && errno == EINTR)
+		;
+	}
+
+void SocketEventLoop::drainWakePipe()
+	{
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		mWakePending = false;
+		}
+
+	char buf[256];
+
+	while (read(mWakePipe[0], buf, sizeof(buf)) > 0)
+		;
+	}
+
+bool SocketEventLoop::callbacksFor(int32_t inFileDescriptor, Registration& outRegistration)
+	{
+	boost::mutex::scoped_lock lock(mMutex);
+
+	auto it = mRegistrations.find(inFileDescriptor);
+
+	if (it == mRegistrations.end())
+		return false;
+
+	outRegistration = it->second;
+
+	return true;
+	}
+
+void SocketEventLoop::waitForEvents(std::vector<std::pair<int32_t, uint32_t> >& outEvents)
+	{
+	outEvents.clear();
+
+#if defined(BSA_PLATFORM_LINUX)
+	epoll_event events[kMaxEventsPerWait];
+
+	int count = epoll_wait(mPollFd, events, kMaxEventsPerWait, -1);
+
+	if (count == -1)
+		{
+		if (errno != EINTR)
+			LOG_ERROR << "epoll_wait failed: " << strerror(errno);
+		return;
+		}
+
+	for (long k = 0; k < count; k++)
+		{
+		uint32_t flags = 0;
+
+		if (events[k].events & (EPOLLIN | EPOLLRDHUP | EPOLLHUP | EPOLLERR))
+			flags |= kReadable;
+
+		if (events[k].events & EPOLLOUT)
+			flags |= kWritable;
+
+		outEvents.push_back(std::make_pair(events[k].data.fd, flags));
+		}
+#else
+	std::vector<pollfd> fds;
+
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		pollfd wakeFd;
+		wakeFd.fd = mWakePipe[0];
+		wakeFd.events = POLLIN;
+		wakeFd.revents = 0;
+		fds.push_back(wakeFd);
+
+		for (auto it = mRegistrations.begin(); it != mRegistrations.end(); ++it)
+			{
+			pollfd fd;
+			fd.fd = it->first;
+			fd.events = POLLIN | (it->second.mWantsWrite ? POLLOUT : 0);
+			fd.revents = 0;
+			fds.push_back(fd);
+			}
+		}
+
+	int count = poll(&fds[0], fds.size(), -1);
+
+	if (count == -1)
+		{
+		if (errno != EINTR)
+			LOG_ERROR << "poll failed: " << strerror(errno);
+		return;
+		}
+
+	for (long k = 0; k < fds.size(); k++)
+		{
+		uint32_t flags = 0;
+
+		if (fds[k].revents & (POLLIN | POLLHUP | POLLERR | POLLNVAL))
+			flags |= kReadable;
+
+		if (fds[k].revents & POLLOUT)
+			flags |= kWritable;
+
+		if (flags)
+			outEvents.push_back(std::make_pair(fds[k].fd, flags));
+		}
+#endif
+	}
+
+void SocketEventLoop::loop()
+	{
+	std::vector<std::pair<int32_t, uint32_t> > events;
+
+	while (true)
+		{
+		waitForEvents(events);
+
+		for (auto& fdAndFlags: events)
+			{
+			if (fdAndFlags.first == mWakePipe[0])
+				{
+				drainWakePipe();
+				continue;
+				}
+
+			Registration registration;
+
+			if (!callbacksFor(fdAndFlags.first, registration))
+				continue;
+
+			try {
+				if (fdAndFlags.second & kReadable)
+					registration.mOnReadable();
+
+				if (fdAndFlags.second & kWritable)
+					{
+						{
+						boost::mutex::scoped_lock lock(mMutex);
+
+						auto it = mRegistrations.find(fdAndFlags.first);
+						if (it != mRegistrations.end())
+							it->second.mWantsWrite = false;
+						}
+
+					updateInterest(fdAndFlags.first, false);
+
+					registration.mOnWritable();
+					}
+				}
+			catch(std::exception& e)
+				{
+				LOG_CRITICAL << "SocketEventLoop " << mIndex << " callback threw: " << e.what();
+				}
+			catch(...)
+				{
+				LOG_CRITICAL << "SocketEventLoop " << mIndex << " callback threw an unknown exception";
+				}
+			}
+
+		processPendingWork();
+		}
+	}
+
+void SocketEventLoop::processPendingWork()
+	{
+	std::set<int32_t> writes;
+	std::vector<std::pair<int32_t, boost::shared_ptr<void> > > closes;
+
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		std::swap(writes, mPendingWrites);
+		std::swap(closes, mPendingCloses);
+		}
+
+	for (auto fd: writes)
+		{
+		Registration registration;
+
+		if (callbacksFor(fd, registration))
+			try {
+				registration.mOnWritable();
+				}
+			catch(std::exception& e)
+				{
+				LOG_CRITICAL << "SocketEventLoop " << mIndex << " write callback threw: " << e.what();
+				}
+			catch(...)
+				{
+				LOG_CRITICAL << "SocketEventLoop " << mIndex << " write callback threw an unknown exception";
+				}
+		}
+
+	for (auto& fdAndKeepAlive: closes)
+		{
+		int32_t fd = fdAndKeepAlive.first;
+
+			{
+			boost::mutex::scoped_lock lock(mMutex);
+
+			mRegistrations.erase(fd);
+			mPendingWrites.erase(fd);
+			}
+
+#if defined(BSA_PLATFORM_LINUX)
+		epoll_ctl(mPollFd, EPOLL_CTL_DEL, fd, 0);
+#endif
+
+		if (close(fd) != 0)
+			LOG_WARN << "Error closing socket\n" << strerror(errno);
+
+		fdAndKeepAlive.second.reset();
+		}
+	}
+
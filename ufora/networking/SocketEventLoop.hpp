@@ -0,0 +1,134 @@
+/***************************************************************************
+   Copyright 2016 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#pragma once
+
+#include <map>
+#include <set>
+#include <vector>
+#include <boost/function.hpp>
+#include <boost/shared_ptr.hpp>
+#include <boost/thread.hpp>
+
+#include "../core/IntegerTypes.hpp"
+
+/*****************
+SocketEventLoop
+
+A small pool of threads, shared by every socket in the process, that wait for sockets to
+become readable or writable (using epoll on linux and poll elsewhere) and invoke callbacks
+registered for them. Sockets are assigned to a loop by file descriptor.
+
+Callbacks always run on the loop's thread, so a socket's reads and writes never race with
+each other. Sockets registered with the loop should be nonblocking, and callbacks must not
+block.
+******************/
+
+class SocketEventLoop {
+public:
+	typedef boost::function0<void> callback_type;
+
+	//the loop responsible for 'inFileDescriptor'
+	static SocketEventLoop& loopFor(int32_t inFileDescriptor);
+
+	//make 'inFileDescriptor' nonblocking. Returns false if we can't.
+	static bool setNonblocking(int32_t inFileDescriptor);
+
+	//start watching 'inFileDescriptor'. 'inOnReadable' is called whenever data is available
+	//or the socket has been closed by the peer.
+	void add(int32_t inFileDescriptor, callback_type inOnReadable, callback_type inOnWritable);
+
+	//call the socket's 'onWritable' callback once the socket has room in its send buffer
+	void armWrite(int32_t inFileDescriptor);
+
+	//call the socket's 'onWritable' callback on the loop thread as soon as possible
+	void scheduleWrite(int32_t inFileDescriptor);
+
+	//stop watching 'inFileDescriptor' and close it on the loop thread. No callbacks for the
+	//descriptor run after it's closed. 'inKeepAlive' is released after the descriptor is closed.
+	void removeAndClose(int32_t inFileDescriptor, boost::shared_ptr<void> inKeepAlive);
+
+	bool isLoopThread() const;
+
+	size_t socketCount() const;
+
+private:
+	class Registration {
+	public:
+		Registration() : mWantsWrite(false)
+			{
+			}
+
+		Registration(callback_type inOnReadable, callback_type inOnWritable) :
+				mOnReadable(inOnReadable),
+				mOnWritable(inOnWritable),
+				mWantsWrite(false)
+			{
+			}
+
+		callback_type mOnReadable;
+
+		callback_type mOnWritable;
+
+		bool mWantsWrite;
+	};
+
+	SocketEventLoop(uint32_t inIndex);
+
+	//this object should never be copied...
+	SocketEventLoop(const SocketEventLoop& other);
+	const SocketEventLoop& operator=(const SocketEventLoop& other);
+
+	static std::vector<SocketEventLoop*>& loops();
+
+	void loop();
+
+	void wake();
+
+	void drainWakePipe();
+
+	//block until some sockets are ready, returning pairs of (fd, isReadable/isWritable bits)
+	void waitForEvents(std::vector<std::pair<int32_t, uint32_t> >& outEvents);
+
+	void updateInterest(int32_t inFileDescriptor, bool inWantsWrite);
+
+	bool callbacksFor(int32_t inFileDescriptor, Registration& outRegistration);
+
+	void processPendingWork();
+
+	enum {
+		kReadable = 1,
+		kWritable = 2
+	};
+
+	uint32_t mIndex;
+
+	mutable boost::mutex mMutex;
+
+	std::map<int32_t, Registration> mRegistrations;
+
+	std::set<int32_t> mPendingWrites;
+
+	std::vector<std::pair<int32_t, boost::shared_ptr<void> > > mPendingCloses;
+
+	int32_t mPollFd;
+
+	int32_t mWakePipe[2];
+
+	bool mWakePending;
+
+	boost::thread mThread;
+};
+
@@ -16,7 +16,7 @@
 #ifndef SocketChannel_hpp
 #define SocketChannel_hpp
 
-#include <sstream>
+#include <deque>
 #include <errno.h>
 #include <boost/bind.hpp>
 
@@ -29,6 +29,7 @@
 #include "../core/cppml/CPPMLPrettyPrinter.hppml"
 
 #include "FileDescriptorRegistry.hpp"
+#include "SocketEventLoop.hpp"
 #include "Channel.hpp"
 #include "QueuelikeChannel.hppml"
 #include "InMemoryChannel.hpp"
@@ -37,10 +38,12 @@
 #if defined(BSA_PLATFORM_LINUX)
 
 #include <sys/socket.h>
+#include <sys/uio.h>
 
 #elif defined(BSA_PLATFORM_APPLE)
 
 #include <sys/socket.h>
+#include <sys/uio.h>
 
 #ifndef MSG_NOSIGNAL
 // MSG_NOSIGNAL isn't defined for Mac; use SO_NOSIGPIPE.
@@ -54,20 +57,43 @@
 #endif
 
 
+
+
 using namespace std;
 
+/*****************
+SocketStringChannel
+
+A Channel of strings over a socket. Each message is framed by its length, as a 64-bit integer
+in host byte order.
+
+All socket IO happens on the process-wide SocketEventLoop rather than on threads of our own.
+Outgoing messages are queued, and each flush hands as many of them to the kernel as it will
+take in a single 'sendmsg'. Incoming data is read into a buffer in large chunks and split into
+messages, except that a message too large for the buffer is read directly into a single
+allocation of its full size.
+******************/
+
 class SocketStringChannel : public Channel<string, string> {
 public:
 	typedef PolymorphicSharedPtr<SocketStringChannel, Channel<string, string>::pointer_type> pointer_type;
 
 	typedef PolymorphicSharedWeakPtr<SocketStringChannel, Channel<string, string>::weak_ptr_type> weak_ptr_type;
 
+	typedef uint64_t frame_size_type;
+
 	SocketStringChannel(PolymorphicSharedPtr<CallbackScheduler> inScheduler, int32_t inFileDescriptor) :
 			mCallbackScheduler(inScheduler),
 			mFileDescriptor(inFileDescriptor),
 			mIsDisconnected(false),
-			mThreadsStarted(false),
-			mQueuedItemsToWritePtr(new Queue<Nullable<std::string> >()),
+			mIsRegistered(false),
+			mWriteScheduled(false),
+			mBytesOfFrontMessageWritten(0),
+			mReadBuffer(kReadBufferSize),
+			mReadBufferStart(0),
+			mReadBufferEnd(0),
+			mIsReadingLargeMessage(false),
+			mLargeMessageBytesRead(0),
 			mOnDisconnected(&SocketStringChannel::defaultDisconnectHandler),
 			mHandlersSet(false)
 		{
@@ -95,8 +121,6 @@ public:
 				<< "\n"
 				;
 
-			mQueuedItemsToWritePtr->write(null());
-
 			int err;
 
 			err = shutdown(mFileDescriptor, SHUT_RDWR);
@@ -104,28 +128,28 @@ public:
 			if (err != 0)
 				LOG_WARN << "Error shutting down socket\n" << strerror(errno);
 
-			if (mThreadsStarted)
+			if (mIsRegistered)
+				//the event loop closes the descriptor once it can't be running any of our
+				//callbacks, and releases our registration after that.
+				SocketEventLoop::loopFor(mFileDescriptor).removeAndClose(
+					mFileDescriptor,
+					mFdRegisterer
+					);
+			else
 				{
-				scopedLock.unlock();
-
-				if (!Ufora::thread::currentlyOnThread(mWriteThread))
-					Ufora::thread::joinThread(mWriteThread);
-
-				if (!Ufora::thread::currentlyOnThread(mReadThread))
-					Ufora::thread::joinThread(mReadThread);
-
-   				scopedLock.lock();
+				err = close(mFileDescriptor);
+				if (err != 0)
+					LOG_WARN << "Error closing socket\n" << strerror(errno);
 				}
 
-			err = close(mFileDescriptor);
-			if (err != 0)
-				LOG_WARN << "Error closing socket\n" << strerror(errno);
+			mFdRegisterer.reset();
 
+			boost::function0<void> onDisconnected = mOnDisconnected;
 
 			scopedLock.unlock();
 
 			try {
-				mOnDisconnected();
+				onDisconnected();
 				}
 			catch(std::exception& e)
 				{
@@ -150,7 +174,25 @@ public:
 
 		updateBytesWritten(in);
 
-		mQueuedItemsToWritePtr->write(null() << in);
+		bool needsFlush = false;
+
+			{
+			boost::mutex::scoped_lock writeLock(mWriteMutex);
+
+			mPendingWrites.push_back(OutgoingMessage());
+			mPendingWrites.back().size = in.size();
+			mPendingWrites.back().body = in;
+
+			//if a flush is already scheduled, it will pick this message up
+			if (mIsRegistered && !mWriteScheduled)
+				{
+				mWriteScheduled = true;
+				needsFlush = true;
+				}
+			}
+
+		if (needsFlush)
+			SocketEventLoop::loopFor(mFileDescriptor).scheduleWrite(mFileDescriptor);
 		}
 
 
@@ -169,7 +211,7 @@ public:
 		if (mIsDisconnected)
 			inOnDisconnected();
 
-		ensureThreadsStarted();
+		ensureRegistered();
 		}
 
 	void setDescription(string desc)
@@ -178,36 +220,62 @@ public:
 		}
 
 private:
-	void ensureThreadsStarted(void)
+	class OutgoingMessage {
+	public:
+		frame_size_type size;
+
+		std::string body;
+	};
+
+	//we read small messages in chunks of this size
+	const static size_t kReadBufferSize = 64 * 1024;
+
+	//we hand at most this many buffers (two per message) to the kernel at once
+	const static size_t kMaxBuffersPerWrite = 256;
+
+	//how many times we'll read from the socket before letting the event loop service others
+	const static long kMaxReadsPerWakeup = 64;
+
+	//frames claiming to be larger than this mean the other side isn't speaking our protocol
+	const static frame_size_type kMaxFrameSize = frame_size_type(1) << 40;
+
+	void ensureRegistered(void)
 		{
 		boost::recursive_mutex::scoped_lock lock(mMutex);
 
-		if (mThreadsStarted || mIsDisconnected)
+		if (mIsRegistered || mIsDisconnected)
 			return;
 
-		mThreadsStarted = true;
+		mFdRegisterer = getFdRegistrar(mFileDescriptor);
 
-		const size_t kStackSize = 128 * 1024;
+		if (!mFdRegisterer || !SocketEventLoop::setNonblocking(mFileDescriptor))
+			{
+			lock.unlock();
+			disconnect();
+			return;
+			}
 
 		pointer_type ptr = polymorphicSharedPtrFromThis().dynamic_pointer_cast<pointer_type>();
 
-		weak_ptr_type weakToThis(ptr);
+		SocketEventLoop& loop = SocketEventLoop::loopFor(mFileDescriptor);
 
-		mReadThread = Ufora::thread::spawnThread(
-			boost::bind(
-				readloopStatic,
-				weakToThis
-				),
-			kStackSize
-			);
+		mIsRegistered = true;
 
-		mWriteThread = Ufora::thread::spawnThread(
-			boost::bind(writeloopStatic,
-				weakToThis
-				),
-			kStackSize
+		//the event loop holds us until we're disconnected, just as our threads used to
+		loop.add(
+			mFileDescriptor,
+			boost::bind(onReadableStatic, ptr),
+			boost::bind(onWritableStatic, ptr)
 			);
 
+		boost::mutex::scoped_lock writeLock(mWriteMutex);
+
+		if (mPendingWrites.size() && !mWriteScheduled)
+			{
+			mWriteScheduled = true;
+			loop.scheduleWrite(mFileDescriptor);
+			}
+
 		LOG_DEBUG << "Created SocketStringChannel " << (uword_t)this;
 		}
 
@@ -241,7 +309,7 @@ private:
 
 	void updateBytesWritten(const string& stringToWrite)
 		{
-		int64_t bytesToWrite = stringToWrite.size() + sizeof(int32_t);
+		int64_t bytesToWrite = stringToWrite.size() + sizeof(frame_size_type);
 
 		if (shouldLogBytesWritten(bytesToWrite))
 			LOG_DEBUG << mDescription << ": bytes written: " << mBytesWritten + bytesToWrite;
@@ -254,120 +322,11 @@ private:
 		return ((mBytesWritten + bytesToWrite) / 100000 != (mBytesWritten / 100000));
 		}
 
-	template<class T>
-	void read(T& out, int32_t fd)
-		{
-		readBytes(fd, &out, sizeof(T));
-		}
-
-	template<class T>
-	void write(const T& out, int32_t fd)
+	bool isDisconnected()
 		{
-		writeBytes(fd, (void*) &out, sizeof(T));
-		}
-
-	void readBytes(int32_t fd, void *data, uint32_t bytes)
-		{
-		int32_t bytesRead = 0;
-		double totalWaitTime = 0.0;
-		double nextSleepPeriod = 0.001;
-
-
-		while (bytesRead < bytes)
-			{
-			int32_t res = recv(fd, ((char*)data) + bytesRead, bytes - bytesRead, MSG_WAITALL);
-			if (res <= 0)
-				{
-				int err = errno;
-
-				if (res == 0)
-					throw ChannelDisconnected();
-
-				if (err == EAGAIN || err == EINTR || err == EWOULDBLOCK)
-					{
-					if (mIsDisconnected)
-						throw ChannelDisconnected();
-
-					lassert_dump(
-						totalWaitTime <= 10.0,
-						"Somehow we got into an infinite receive loop. res = " << res
-						<< ". errno = " << strerror(err)
-						)
-					if (nextSleepPeriod >= 1.0)
-						LOG_WARN << "Sleep period after failure to recv from socket reached " << nextSleepPeriod
-							<< " seconds";
-
-					sleepSeconds(nextSleepPeriod);
-					totalWaitTime += nextSleepPeriod;
-					nextSleepPeriod = std::min(1.0, 2*nextSleepPeriod);
-					}
-				else
-					{
-					if (res != 0)
-						LOG_WARN << "Disconnecting a SocketStringChannel during read because of error "
-							<< strerror(err) << ". " << bytesRead << " read out of "
-							<< bytes << " expected."
-							;
-					LOG_DEBUG << "Disconnecting a SocketStringChannel because res is " << res;
-
-					throw ChannelDisconnected();
-					}
-				}
-			else
-				{
-				totalWaitTime = 0.0;
-				nextSleepPeriod = 0.001;
-				bytesRead += res;
-				}
-			}
-		lassert(bytesRead == bytes);
-		}
-
-	void writeBytes(int32_t fd, void *data, uint32_t bytes)
-		{
-		int32_t bytesWritten = 0;
-		while (bytesWritten < bytes)
-			{
-			//use MSG_NOSIGNAL, which will prevent a SIGPIPE signal from being sent to our process,
-			//which we don't currently handle anywhere.  We will still get EPIPE if the other end is
-			//closed.
-			int32_t res = send(fd, ((char*)data) + bytesWritten, bytes - bytesWritten, MSG_NOSIGNAL);
-			if (res <= 0)
-				{
-				if (errno == EAGAIN || errno == EINTR || errno == EWOULDBLOCK)
-					{
-					if (mIsDisconnected)
-						throw ChannelDisconnected();
-
-					boost::thread::yield();
-					}
-				else
-					{
-					if (res != 0)
-						LOG_DEBUG << "Disconnecting a SocketStringChannel during write because of error "
-							<< strerror(errno) << ". " << bytesWritten << " written out of "
-							<< bytes << " expected."
-							;
-
-					throw ChannelDisconnected();
-					}
-				}
-			else
-				bytesWritten += res;
-			}
-		lassert(bytesWritten == bytes);
-		}
-
-	static void writeloopStatic(
-					weak_ptr_type weakSocketPtr
-					)
-		{
-		pointer_type socket = weakSocketPtr.lock();
-
-		if (!socket)
-			return;
+		boost::recursive_mutex::scoped_lock lock(mMutex);
 
-		socket->writeLoop();
+		return mIsDisconnected;
 		}
 
 	//lock the file descriptor, but wait in case the OS has the FD but we're still unregistering
@@ -375,7 +334,7 @@ private:
 	static boost::shared_ptr<ScopedFileDescriptorRegisterer> getFdRegistrar(int fd)
 		{
 		boost::shared_ptr<ScopedFileDescriptorRegisterer> fdRegisterer(
-			new ScopedFileDescriptorRegisterer(fd, 2)
+			new ScopedFileDescriptorRegisterer(fd, 1)
 			);
 
 		long tries = 0;
@@ -389,130 +348,253 @@ private:
 				{
 				sleepSeconds(.1);
 				tries++;
-				fdRegisterer.reset(new ScopedFileDescriptorRegisterer(fd, 2));
+				fdRegisterer.reset(new ScopedFileDescriptorRegisterer(fd, 1));
 				}
 			}
 
 		return fdRegisterer;
 		}
 
-	void writeLoop()
+	static void onWritableStatic(pointer_type socket)
 		{
-		boost::shared_ptr<ScopedFileDescriptorRegisterer> fdRegisterer = getFdRegistrar(mFileDescriptor);
+		socket->flushPendingWrites();
+		}
 
-		if (!fdRegisterer)
+	static void onReadableStatic(pointer_type socket)
+		{
+		try {
+			socket->readAvailable();
+			}
+		catch (ChannelDisconnected& e)
 			{
-			disconnect();
-			return;
+			socket->disconnect();
 			}
+		}
 
+	//called on the event loop. Write as much of the queue as the socket will take, and ask
+	//the loop to call us again when it can take more.
+	void flushPendingWrites()
+		{
+		bool failed = false;
 
-		try
 			{
-			while (true)
+			boost::mutex::scoped_lock writeLock(mWriteMutex);
+
+			while (mPendingWrites.size() && !failed)
 				{
-				Nullable<std::string> dat = mQueuedItemsToWritePtr->get();
+				iovec buffers[kMaxBuffersPerWrite];
+				size_t bufferCount = 0;
+				size_t bytesToSkip = mBytesOfFrontMessageWritten;
 
-				if (dat)
+				for (auto it = mPendingWrites.begin();
+						it != mPendingWrites.end() && bufferCount + 2 <= kMaxBuffersPerWrite;
+						++it)
 					{
-					uint32_t sz = dat->size();
+					addBuffer(buffers, bufferCount, &it->size, sizeof(frame_size_type), bytesToSkip);
+					addBuffer(buffers, bufferCount, it->body.data(), it->body.size(), bytesToSkip);
+					}
+
+				msghdr message;
+				memset(&message, 0, sizeof(message));
+				message.msg_iov = buffers;
+				message.msg_iovlen = bufferCount;
+
+				//use MSG_NOSIGNAL, which will prevent a SIGPIPE signal from being sent to our
+				//process, which we don't currently handle anywhere.  We will still get EPIPE if
+				//the other end is closed.
+				ssize_t res = sendmsg(mFileDescriptor, &message, MSG_NOSIGNAL);
+
+				if (res < 0)
+					{
+					int err = errno;
+
+					if (err == EINTR)
+						continue;
 
-					write(sz, mFileDescriptor);
+					if (err == EAGAIN || err == EWOULDBLOCK)
+						{
+						//leave 'mWriteScheduled' set, since the loop will call us back
+						SocketEventLoop::loopFor(mFileDescriptor).armWrite(mFileDescriptor);
+						return;
+						}
+
+					LOG_DEBUG << "Disconnecting a SocketStringChannel during write because of error "
+						<< strerror(err) << ". " << mPendingWrites.size() << " messages unwritten."
+						;
 
-					writeBytes(mFileDescriptor, &(*dat)[0], sz);
+					failed = true;
 					}
 				else
-					//this is the clean shutdown case - just exit
-					return;
+					consumeWrittenBytes(res);
 				}
+
+			mWriteScheduled = false;
 			}
-		catch (ChannelDisconnected& )
-			{
+
+		if (failed)
 			disconnect();
-			}
-		catch (std::logic_error& e)
-			{
-			LOG_CRITICAL << "disconnecting socket channel due to exception: " << e.what();
-			abort();
-			}
-		catch (...)
-			{
-			LOG_CRITICAL << "SocketChannel threw unknown exception. aborting";
-			abort();
-			}
 		}
 
-	static void readloopStatic(
-					weak_ptr_type weakSocketPtr
+	static void addBuffer(
+					iovec* ioBuffers,
+					size_t& ioBufferCount,
+					const void* inData,
+					size_t inBytes,
+					size_t& ioBytesToSkip
 					)
 		{
-		pointer_type socket = weakSocketPtr.lock();
-
-		if (!socket)
+		if (ioBytesToSkip >= inBytes)
+			{
+			ioBytesToSkip -= inBytes;
 			return;
+			}
 
-		socket->readLoop();
+		ioBuffers[ioBufferCount].iov_base = (char*)inData + ioBytesToSkip;
+		ioBuffers[ioBufferCount].iov_len = inBytes - ioBytesToSkip;
+		ioBufferCount++;
+
+		ioBytesToSkip = 0;
 		}
 
-	void readLoop()
+	void consumeWrittenBytes(size_t inBytes)
 		{
-		boost::shared_ptr<ScopedFileDescriptorRegisterer> fdRegisterer = getFdRegistrar(mFileDescriptor);
+		size_t bytes = inBytes + mBytesOfFrontMessageWritten;
 
-		if (!fdRegisterer)
+		while (mPendingWrites.size())
 			{
-			disconnect();
-			return;
+			size_t frameBytes = sizeof(frame_size_type) + mPendingWrites.front().body.size();
+
+			if (bytes < frameBytes)
+				break;
+
+			bytes -= frameBytes;
+			mPendingWrites.pop_front();
 			}
 
+		mBytesOfFrontMessageWritten = bytes;
+		}
 
-		try
+	//called on the event loop when the socket has data or has been closed
+	void readAvailable()
+		{
+		for (long pass = 0; pass < kMaxReadsPerWakeup; pass++)
 			{
-			while (true)
+			if (isDisconnected())
+				return;
+
+			char* target;
+			size_t bytes;
+
+			if (mIsReadingLargeMessage)
 				{
-				uint32_t msgSize = 0;
-				read(msgSize, mFileDescriptor);
+				target = &mLargeMessage[mLargeMessageBytesRead];
+				bytes = mLargeMessage.size() - mLargeMessageBytesRead;
+				}
+			else
+				{
+				target = &mReadBuffer[mReadBufferEnd];
+				bytes = mReadBuffer.size() - mReadBufferEnd;
+				}
 
-				std::string toWrite;
+			ssize_t res = recv(mFileDescriptor, target, bytes, 0);
 
-				if (msgSize < 1024*1024)
-					{
-					toWrite.resize(msgSize);
+			if (res == 0)
+				{
+				LOG_DEBUG << "Disconnecting a SocketStringChannel because the other end closed it";
+				throw ChannelDisconnected();
+				}
 
-					readBytes(mFileDescriptor, &toWrite[0], toWrite.size());
-					}
-				else
-					{
-					std::ostringstream str;
+			if (res < 0)
+				{
+				int err = errno;
 
-					while (msgSize > 0)
-						{
-						std::string dat;
-						dat.resize(msgSize > 1024*1024?1024*1024:msgSize);
+				if (err == EAGAIN || err == EWOULDBLOCK)
+					return;
 
-						readBytes(mFileDescriptor, &dat[0], dat.size());
-						str << dat;
-						msgSize -= dat.size();
-						}
+				if (err == EINTR)
+					continue;
 
-					toWrite = str.str();
+				LOG_WARN << "Disconnecting a SocketStringChannel during read because of error "
+					<< strerror(err);
+
+				throw ChannelDisconnected();
+				}
+
+			if (mIsReadingLargeMessage)
+				{
+				mLargeMessageBytesRead += res;
+
+				if (mLargeMessageBytesRead == mLargeMessage.size())
+					{
+					std::string message;
+					message.swap(mLargeMessage);
+
+					mIsReadingLargeMessage = false;
+					mLargeMessageBytesRead = 0;
+
+					onMessage(message);
 					}
+				}
+			else
+				{
+				mReadBufferEnd += res;
 
-				onMessage(toWrite);
+				extractMessagesFromReadBuffer();
 				}
 			}
-		catch (ChannelDisconnected& e)
-			{
-			disconnect();
-			}
-		catch (std::logic_error& e)
+		}
+
+	void extractMessagesFromReadBuffer()
+		{
+		while (mReadBufferEnd - mReadBufferStart >= sizeof(frame_size_type))
 			{
-			LOG_CRITICAL << "disconnecting socket channel due to exception in onMessage: " << e.what();
-			abort();
+			size_t available = mReadBufferEnd - mReadBufferStart - sizeof(frame_size_type);
+
+			frame_size_type msgSize;
+			memcpy(&msgSize, &mReadBuffer[mReadBufferStart], sizeof(frame_size_type));
+
+			if (msgSize > kMaxFrameSize)
+				{
+				LOG_ERROR << "SocketStringChannel received a frame claiming to be "
+					<< msgSize << " bytes. Disconnecting.";
+				throw ChannelDisconnected();
+				}
+
+			if (msgSize > available)
+				{
+				//wait for the rest of a message that will fit in the buffer
+				if (msgSize <= mReadBuffer.size() - sizeof(frame_size_type))
+					break;
+
+				//read the rest of the message directly into its final location
+				mLargeMessage.resize(msgSize);
+				memcpy(
+					&mLargeMessage[0],
+					&mReadBuffer[mReadBufferStart + sizeof(frame_size_type)],
+					available
+					);
+
+				mLargeMessageBytesRead = available;
+				mIsReadingLargeMessage = true;
+
+				mReadBufferStart = 0;
+				mReadBufferEnd = 0;
+				return;
+				}
+
+			mReadBufferStart += sizeof(frame_size_type);
+
+			onMessage(std::string(&mReadBuffer[mReadBufferStart], msgSize));
+
+			mReadBufferStart += msgSize;
 			}
-		catch (...)
+
+		//move any partial message to the front of the buffer
+		if (mReadBufferStart)
 			{
-			LOG_CRITICAL << "disconnecting socket channel due to unknown exception";
-			abort();
+			memmove(&mReadBuffer[0], &mReadBuffer[mReadBufferStart], mReadBufferEnd - mReadBufferStart);
+			mReadBufferEnd -= mReadBufferStart;
+			mReadBufferStart = 0;
 			}
 		}
 
@@ -525,19 +607,39 @@ private:
 
 	int32_t	mFileDescriptor;
 
-	Ufora::thread::BsaThreadData mReadThread;
-
-	Ufora::thread::BsaThreadData mWriteThread;
-
 	string	mDescription;
 
-	boost::shared_ptr<Queue<Nullable<std::string> > > mQueuedItemsToWritePtr;
-
 	int64_t	mBytesWritten;
 
 	bool mIsDisconnected;
 
-	bool mThreadsStarted;
+	//whether the event loop is watching our file descriptor
+	bool mIsRegistered;
+
+	boost::shared_ptr<ScopedFileDescriptorRegisterer> mFdRegisterer;
+
+	//protects the outgoing queue, which the event loop drains without holding mMutex
+	boost::mutex mWriteMutex;
+
+	std::deque<OutgoingMessage> mPendingWrites;
+
+	//whether the event loop will flush mPendingWrites without being asked again
+	bool mWriteScheduled;
+
+	size_t mBytesOfFrontMessageWritten;
+
+	//read state. Only touched on the event loop.
+	std::vector<char> mReadBuffer;
+
+	size_t mReadBufferStart;
+
+	size_t mReadBufferEnd;
+
+	bool mIsReadingLargeMessage;
+
+	std::string mLargeMessage;
+
+	size_t mLargeMessageBytesRead;
 
 	boost::function1<void, std::string> mOnMessage;
 
@@ -549,4 +651,3 @@ private:
 
 
 #endif
-
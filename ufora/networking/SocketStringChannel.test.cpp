@@ -0,0 +1,259 @@
+/***************************************************************************
+   Copyright 2016 Ufora Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+****************************************************************************/
+#include "SocketStringChannel.hpp"
+
+#include "../core/UnitTest.hpp"
+#include "../core/Clock.hpp"
+#include "../core/threading/CallbackScheduler.hppml"
+#include "../core/threading/SimpleCallbackSchedulerFactory.hppml"
+
+#include <boost/lexical_cast.hpp>
+
+namespace {
+
+class ReceivedMessages {
+public:
+	ReceivedMessages() : mKeepMessages(false), mCount(0), mBytes(0), mDisconnected(false)
+		{
+		}
+
+	void onMessage(std::string message)
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		mCount++;
+		mBytes += message.size();
+
+		if (mKeepMessages)
+			mMessages.push_back(message);
+
+		mChanged.notify_all();
+		}
+
+	void onDisconnected()
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		mDisconnected = true;
+		mChanged.notify_all();
+		}
+
+	bool waitForCount(long inCount, double inTimeout)
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		double t0 = curClock();
+
+		while (mCount < inCount && !mDisconnected)
+			{
+			if (curClock() - t0 > inTimeout)
+				return false;
+
+			mChanged.timed_wait(lock, boost::posix_time::milliseconds(100));
+			}
+
+		return mCount >= inCount;
+		}
+
+	bool waitForDisconnect(double inTimeout)
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		double t0 = curClock();
+
+		while (!mDisconnected)
+			{
+			if (curClock() - t0 > inTimeout)
+				return false;
+
+			mChanged.timed_wait(lock, boost::posix_time::milliseconds(100));
+			}
+
+		return true;
+		}
+
+	std::vector<std::string> messages()
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		return mMessages;
+		}
+
+	int64_t bytes()
+		{
+		boost::mutex::scoped_lock lock(mMutex);
+
+		return mBytes;
+		}
+
+	bool mKeepMessages;
+
+private:
+	boost::mutex mMutex;
+
+	boost::condition_variable mChanged;
+
+	long mCount;
+
+	int64_t mBytes;
+
+	bool mDisconnected;
+
+	std::vector<std::string> mMessages;
+};
+
+class SocketStringChannelPair {
+public:
+	SocketStringChannelPair(bool inKeepMessages)
+		{
+		//a single callback thread, so messages are delivered in the order they were read
+		PolymorphicSharedPtr<CallbackScheduler> scheduler =
+			PolymorphicSharedPtr<CallbackSchedulerFactory>(new SimpleCallbackSchedulerFactory())
+				->createScheduler("SocketStringChannelTest", 1);
+
+		int fds[2];
+		lassert(socketpair(AF_UNIX, SOCK_STREAM, 0, fds) == 0);
+
+		received.mKeepMessages = inKeepMessages;
+
+		sender.reset(new SocketStringChannel(scheduler, fds[0]));
+		receiver.reset(new SocketStringChannel(scheduler, fds[1]));
+
+		sender->setHandlers(
+			boost::bind(&ReceivedMessages::onMessage, &senderReceived, _1),
+			boost::bind(&ReceivedMessages::onDisconnected, &senderReceived)
+			);
+		receiver->setHandlers(
+			boost::bind(&ReceivedMessages::onMessage, &received, _1),
+			boost::bind(&ReceivedMessages::onDisconnected, &received)
+			);
+		}
+
+	~SocketStringChannelPair()
+		{
+		sender->disconnect();
+		receiver->disconnect();
+		}
+
+	ReceivedMessages received;
+
+	ReceivedMessages senderReceived;
+
+	PolymorphicSharedPtr<Channel<std::string, std::string> > sender;
+
+	PolymorphicSharedPtr<Channel<std::string, std::string> > receiver;
+};
+
+std::string messageOfSize(size_t inSize, long inIndex)
+	{
+	std::string tr(inSize, 'a' + inIndex % 26);
+
+	std::string prefix = boost::lexical_cast<std::string>(inIndex) + ":";
+
+	std::copy(prefix.begin(), prefix.begin() + std::min(prefix.size(), inSize), tr.begin());
+
+	return tr;
+	}
+
+}
+
+BOOST_AUTO_TEST_CASE( test_SocketStringChannel_round_trip )
+	{
+	SocketStringChannelPair channels(true);
+
+	//sizes on either side of the read buffer and of the frame header
+	std::vector<size_t> sizes;
+	sizes.push_back(0);
+	sizes.push_back(1);
+	sizes.push_back(7);
+	sizes.push_back(8);
+	sizes.push_back(1000);
+	sizes.push_back(64 * 1024 - 8);
+	sizes.push_back(64 * 1024);
+	sizes.push_back(64 * 1024 + 1);
+	sizes.push_back(3 * 1024 * 1024 + 17);
+
+	std::vector<std::string> sent;
+
+	for (long pass = 0; pass < 3; pass++)
+		for (long k = 0; k < sizes.size(); k++)
+			{
+			sent.push_back(messageOfSize(sizes[k], sent.size()));
+			channels.sender->write(sent.back());
+			}
+
+	BOOST_REQUIRE(channels.received.waitForCount(sent.size(), 30.0));
+
+	std::vector<std::string> received = channels.received.messages();
+
+	BOOST_REQUIRE_EQUAL(received.size(), sent.size());
+
+	for (long k = 0; k < sent.size(); k++)
+		BOOST_CHECK(received[k] == sent[k]);
+	}
+
+BOOST_AUTO_TEST_CASE( test_SocketStringChannel_disconnect_is_seen_by_peer )
+	{
+	SocketStringChannelPair channels(false);
+
+	channels.sender->write("hello");
+
+	BOOST_REQUIRE(channels.received.waitForCount(1, 10.0));
+
+	channels.sender->disconnect();
+
+	BOOST_CHECK(channels.received.waitForDisconnect(10.0));
+
+	BOOST_CHECK_THROW(channels.sender->write("goodbye"), ChannelDisconnected);
+	}
+
+BOOST_AUTO_TEST_CASE( test_SocketStringChannel_throughput )
+	{
+	//not a correctness test: reports messages and megabytes per second across message sizes
+	const int64_t kBytesPerSize = 64 * 1024 * 1024;
+	const long kMaxMessagesPerSize = 100000;
+
+	std::vector<size_t> sizes;
+	sizes.push_back(16);
+	sizes.push_back(256);
+	sizes.push_back(4 * 1024);
+	sizes.push_back(64 * 1024);
+	sizes.push_back(1024 * 1024);
+	sizes.push_back(16 * 1024 * 1024);
+
+	for (long k = 0; k < sizes.size(); k++)
+		{
+		SocketStringChannelPair channels(false);
+
+		long messageCount = std::min<int64_t>(kMaxMessagesPerSize, kBytesPerSize / sizes[k]);
+
+		std::string message(sizes[k], 'x');
+
+		double t0 = curClock();
+
+		for (long m = 0; m < messageCount; m++)
+			channels.sender->write(message);
+
+		BOOST_REQUIRE(channels.received.waitForCount(messageCount, 120.0));
+
+		double elapsed = curClock() - t0;
+
+		LOG_INFO << "SocketStringChannel throughput for " << sizes[k] << "-byte messages: "
+			<< messageCount / elapsed << " msgs/sec, "
+			<< channels.received.bytes() / elapsed / 1024.0 / 1024.0 << " MB/s"
+			<< " (" << messageCount << " messages in " << elapsed << " seconds)";
+		}
+	}